@@ -0,0 +1,420 @@
+"""알림 메시지 렌더링 / 핸들러 핫패스 벤치마크
+
+사용법:
+    python benchmarks/bench_alerts.py                         # 전체 실행 후 결과 출력
+    python benchmarks/bench_alerts.py --filter blocks         # 이름에 'blocks'가 포함된 항목만 실행
+    python benchmarks/bench_alerts.py --output result.json    # 결과를 JSON으로 저장
+    python benchmarks/bench_alerts.py --save-baseline default # baselines/default.json 으로 저장
+    python benchmarks/bench_alerts.py --compare default       # baselines/default.json 과 비교
+
+슬랙/AWS 호출은 모두 스텁으로 대체하므로 네트워크 없이 실행됩니다.
+비교 모드에서 임계값을 넘는 회귀가 있으면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+RESULT_SCHEMA_VERSION = 1
+# 잔존 블록 수는 1 ~ 10 정도의 정수라 변화율이 의미 없으므로 절대 변화량(블록 수)으로 판단
+ABSOLUTE_THRESHOLDS = {"retained_blocks": 2}
+
+# 레거시 레이어는 layer.common.*, 모니터링 레이어는 common.* 으로 임포트
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "monitoring", "layer"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "monitoring", "lambda_functions", "services"))
+
+# SSM 조회를 건너뛰도록 토큰을 미리 설정
+for _token in ("SLACK_BOT_TOKEN", "SLACK_APP_TOKEN", "SLACK_SIGNING_SECRET"):
+    os.environ.setdefault(_token, "xoxb-benchmark")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+# 아웃박스 등 로컬 상태는 임시 디렉터리에 기록
+os.environ.setdefault("MONITORING_STATE_DIR", tempfile.mkdtemp(prefix="bench-state-"))
+# Logs Insights 추이 조회는 폴링 대기가 대부분이라 핸들러 벤치마크에서 제외
+os.environ.setdefault("ERROR_TREND_HOURS", "0")
+# 호출 횟수 / 경과 시간에 따라 경로가 바뀌는 상태는 고정 (반복 횟수와 관계없이 항상 전송 경로를 측정)
+# 폭주 감지를 끄지 않으면 약 30회 이후 개별 알림 대신 폭주 요약 경로만 측정됨
+os.environ.setdefault("FLOOD_THRESHOLD", "0")
+# 무음 규칙은 시작 시 한 번만 읽음 (빈 저장소, 측정 중 주기적 재조회 제외)
+os.environ.setdefault("SILENCE_REFRESH_INTERVAL", "86400")
+# 지연 히스토그램 내보내기 / 알림 이력 병합은 측정 중 시간 경계에 걸린 회차에서만 실행되므로 끔
+os.environ.setdefault("LATENCY_EXPORT_INTERVAL", "86400")
+os.environ.setdefault("ALERT_HISTORY_COMPACT_FILES", "1000000")
+
+SLACK_OK_RESPONSE = {"ok": True, "ts": "1710835200.000100", "channel": "C000BENCH"}
+SLACK_HISTORY_RESPONSE = {
+    "ok": True,
+    "messages": [{"ts": f"17108352{i:02d}.000100", "text": f"message {i}"} for i in range(50)]
+}
+
+
+class _StubAWSClient:
+    """boto3 클라이언트 스텁 (모든 API 호출에 빈 응답 반환)"""
+
+    class exceptions:
+        ResourceNotFoundException = type("ResourceNotFoundException", (Exception,), {})
+        ResourceAlreadyExistsException = type("ResourceAlreadyExistsException", (Exception,), {})
+
+    # aws_client 가 마감 확인 이벤트 핸들러를 등록
+    meta = SimpleNamespace(events=SimpleNamespace(register=lambda *args, **kwargs: None))
+
+    def __getattr__(self, name: str) -> Callable[..., Dict[str, Any]]:
+        return lambda *args, **kwargs: {}
+
+
+class _LambdaContext:
+    """호출마다 새 request id를 갖는 Lambda 컨텍스트 스텁"""
+
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+
+class Benchmark:
+    """단일 벤치마크 정의"""
+
+    def __init__(self, name: str, func: Callable[[], Any]):
+        self.name = name
+        self.func = func
+
+
+def _stubbed_io() -> ExitStack:
+    """슬랙/AWS 네트워크 호출을 스텁으로 대체"""
+    from slack_sdk import WebClient
+
+    stack = ExitStack()
+    stack.enter_context(mock.patch("boto3.client", lambda *args, **kwargs: _StubAWSClient()))
+    stack.enter_context(mock.patch.object(
+        WebClient, "chat_postMessage", lambda self, **kwargs: SLACK_OK_RESPONSE))
+    stack.enter_context(mock.patch.object(
+        WebClient, "conversations_history", lambda self, **kwargs: SLACK_HISTORY_RESPONSE))
+    return stack
+
+
+def _message_block_benchmarks() -> List[Benchmark]:
+    from common.constant import ServiceType
+    from common.message_blocks import MessageBlockBuilder
+
+    return [
+        Benchmark("blocks.error", lambda: MessageBlockBuilder.create_error_blocks(
+            service_type=ServiceType.PROD,
+            error_msg="ERROR db-connection-error-001 데이터베이스 연결 오류",
+            error_id="db-connection-error-001"
+        )),
+        Benchmark("blocks.batch", lambda: MessageBlockBuilder.create_batch_blocks(
+            service_type=ServiceType.PROD,
+            job_name="exhibition-crawling-batch",
+            status="FAILED",
+            job_id="exhibition-crawl-20241231-001"
+        )),
+        Benchmark("blocks.rag", lambda: MessageBlockBuilder.create_rag_blocks(
+            service_type=ServiceType.DEV,
+            accuracy=0.65,
+            threshold=0.7,
+            pipeline_id="test-pipeline-123"
+        )),
+    ]
+
+
+def _legacy_benchmarks() -> List[Benchmark]:
+    from layer.common.constant import SLACK_CHANNELS, SERVICE_TYPE
+    from layer.common.sns_slack import slack_alarm
+
+    def _new_alarm() -> slack_alarm:
+        alarm = slack_alarm(p_slack_channel=SLACK_CHANNELS.ERROR)
+        alarm.thread_ts = SLACK_OK_RESPONSE["ts"]
+        return alarm
+
+    def _service_message() -> Any:
+        alarm = slack_alarm(p_slack_channel=SLACK_CHANNELS.ERROR)
+        alarm.thread_ts = None
+        with mock.patch.object(alarm, "get_ts_of_service_message", return_value=None):
+            return alarm.send_service_message(p_service_type=SERVICE_TYPE.DEV)
+
+    return [
+        Benchmark("legacy.service_message", _service_message),
+        Benchmark("legacy.sub_message", lambda: _new_alarm().send_sub_message(
+            p_service_type=SERVICE_TYPE.DEV)),
+        Benchmark("legacy.error_message", lambda: _new_alarm().send_error_message(
+            p_lambda_nm="DEV-user-service",
+            p_error_msg="ERROR db-connection-error-001 데이터베이스 연결 오류"
+        )),
+        Benchmark("legacy.lookup_thread_ts", lambda: slack_alarm(
+            p_slack_channel=SLACK_CHANNELS.ERROR).get_ts_of_service_message(p_service_nm="DEV")),
+    ]
+
+
+def _summary_benchmarks() -> List[Benchmark]:
+    from common.constant import ServiceType
+    from common.slack_bot import MonitoringBot
+
+    class _StubDetails:
+        def get_error_details(self, error_id: str) -> Dict[str, str]:
+            return {
+                "stack_trace": "Traceback (most recent call last):\n" + "  File \"app.py\", line 1\n" * 40,
+                "related_logs": "\n".join(f"ERROR {error_id} line {i}" for i in range(100)),
+                "error_history": "최근 100개의 관련 에러가 발견되었습니다."
+            }
+
+        def get_batch_details(self, job_id: str) -> Dict[str, Any]:
+            return {
+                "total_processed": 1200, "success_count": 1190, "fail_count": 10,
+                "extract_time": 7200, "transform_time": 3600, "load_time": 3600
+            }
+
+        def get_rag_details(self, pipeline_id: str) -> Dict[str, Any]:
+            return {
+                "precision": "0.82", "recall": "0.78", "f1_score": "0.80", "mrr": "0.85",
+                "failed_queries": "실패한 쿼리가 없습니다.",
+                "improvement_suggestions": "현재 성능이 양호합니다."
+            }
+
+    # 슬랙 앱 초기화(auth.test 호출)를 건너뛰고 요약 포맷팅만 측정
+    bot = MonitoringBot.__new__(MonitoringBot)
+    bot.service_type = ServiceType.DEV
+    bot.logger = logging.getLogger(MonitoringBot.__name__)
+    bot.monitoring_details = _StubDetails()
+
+    return [
+        Benchmark("bot.error_summary", lambda: bot.get_error_summary("db-connection-error-001")),
+        Benchmark("bot.batch_summary", lambda: bot.get_batch_summary("exhibition-crawl-20241231-001")),
+        Benchmark("bot.rag_summary", lambda: bot.get_rag_performance_summary("test-pipeline-123")),
+    ]
+
+
+def _handler_benchmarks() -> List[Benchmark]:
+    import lambda_function
+
+    error_event = {
+        "service_type": "PROD",
+        "error_msg": "ERROR db-connection-error-001 데이터베이스 연결 오류",
+        "error_id": "db-connection-error-001"
+    }
+    rag_event = {
+        "pipeline_id": "test-pipeline-123",
+        "metrics": {"accuracy": 0.65, "precision": 0.82, "recall": 0.78, "f1": 0.80, "mrr": 0.85}
+    }
+
+    return [
+        Benchmark("handler.handle_error", lambda: lambda_function.handle_error(error_event, _LambdaContext())),
+        Benchmark("handler.handle_rag_metrics", lambda: lambda_function.handle_rag_metrics(rag_event, _LambdaContext())),
+    ]
+
+
+def _event_benchmarks() -> List[Benchmark]:
+    from collections import deque
+    from common.events import iter_error_events, parse_events
+    from layer.common.alarm_event import sns_alarm_event
+
+    def _load(name: str) -> Dict[str, Any]:
+        with open(os.path.join(ROOT_DIR, "test_events", f"{name}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    error_event = _load("error_notification_event")
+    batch_event = _load("batch_status_event")
+    rag_event = _load("rag_performance_event")
+    # 레코드 500건짜리 SNS 이벤트 (파싱된 이벤트를 유지하지 않고 소비)
+    sns_batch = {"Records": error_event["Records"] * 500}
+
+    return [
+        Benchmark("events.sns_alarm", lambda: list(parse_events(error_event))),
+        Benchmark("events.batch_status", lambda: list(parse_events(batch_event))),
+        Benchmark("events.rag_metrics", lambda: list(parse_events(rag_event))),
+        Benchmark("events.sns_batch_500", lambda: deque(iter_error_events(sns_batch), maxlen=0)),
+        Benchmark("legacy.sns_alarm", lambda: list(sns_alarm_event.iter_records(error_event))),
+    ]
+
+
+def collect_benchmarks() -> List[Benchmark]:
+    """등록된 전체 벤치마크 목록"""
+    benchmarks = []
+    for factory in (_message_block_benchmarks, _legacy_benchmarks,
+                    _summary_benchmarks, _handler_benchmarks, _event_benchmarks):
+        benchmarks.extend(factory())
+    return benchmarks
+
+
+def _calibrate(func: Callable[[], Any], min_time_ns: int) -> int:
+    """한 회차가 min_time_ns 이상 걸리도록 반복 횟수 결정"""
+    iterations = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time_ns or iterations >= 1_000_000:
+            return iterations
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_time_ns / elapsed) + 1))
+
+
+def _measure_allocations(func: Callable[[], Any], samples: int) -> Dict[str, float]:
+    """tracemalloc으로 호출당 최대 할당 메모리와 잔존 블록 수 측정"""
+    tracemalloc.start()
+    try:
+        func()  # 지연 초기화 비용 제외
+        peaks, blocks = [], []
+        for _ in range(samples):
+            # 순환 참조로 남아 있다가 GC 시점에 따라 수거되는 객체는 잔존 블록에서 제외
+            # (collect 는 dict / list free list 도 비우므로 한 번 더 호출해 측정 조건을 기존과 맞춤)
+            gc.collect()
+            func()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            base_current, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+            peaks.append(peak - base_current)
+            blocks.append(sum(stat.count_diff for stat in after.compare_to(before, "filename")
+                              if stat.count_diff > 0))
+        return {
+            "peak_alloc_bytes": statistics.median(peaks),
+            "retained_blocks": statistics.median(blocks)
+        }
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(bench: Benchmark, repeat: int, min_time_ms: float,
+                  alloc_samples: int) -> Dict[str, Any]:
+    """단일 벤치마크 실행 (CPU/벽시계 시간, 할당량)"""
+    func = bench.func
+    func()  # 워밍업
+    iterations = _calibrate(func, int(min_time_ms * 1_000_000))
+
+    cpu_samples, wall_samples = [], []
+    for _ in range(repeat):
+        cpu_start = time.process_time_ns()
+        wall_start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        wall_samples.append((time.perf_counter_ns() - wall_start) / iterations)
+        cpu_samples.append((time.process_time_ns() - cpu_start) / iterations)
+
+    result = {
+        "iterations": iterations,
+        "repeat": repeat,
+        "cpu_ns_per_op": statistics.median(cpu_samples),
+        "wall_ns_per_op": statistics.median(wall_samples),
+        "wall_ns_min": min(wall_samples),
+        "wall_ns_stdev": statistics.stdev(wall_samples) if len(wall_samples) > 1 else 0.0
+    }
+    result.update(_measure_allocations(func, alloc_samples))
+    return result
+
+
+def run_suite(name_filter: Optional[str], repeat: int, min_time_ms: float,
+              alloc_samples: int) -> Dict[str, Any]:
+    """벤치마크 전체 실행 후 결과 문서 생성"""
+    results = {}
+    with _stubbed_io():
+        for bench in collect_benchmarks():
+            if name_filter and name_filter not in bench.name:
+                continue
+            results[bench.name] = run_benchmark(bench, repeat, min_time_ms, alloc_samples)
+            print(f"{bench.name:<32} {results[bench.name]['cpu_ns_per_op'] / 1000:>10.1f} us/op "
+                  f"{results[bench.name]['peak_alloc_bytes']:>10.0f} B peak/op", file=sys.stderr)
+
+    return {
+        "schema": RESULT_SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": results
+    }
+
+
+def _resolve_baseline_path(name_or_path: str) -> str:
+    if os.path.sep in name_or_path or name_or_path.endswith(".json"):
+        return name_or_path
+    return os.path.join(BASELINE_DIR, f"{name_or_path}.json")
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float) -> List[Dict[str, Any]]:
+    """기준 결과와 비교해 지표별 변화율 계산 (ABSOLUTE_THRESHOLDS 지표는 절대 변화량으로 판단)"""
+    rows = []
+    for name, metrics in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            rows.append({"name": name, "metric": "-", "status": "new"})
+            continue
+        for metric in ("cpu_ns_per_op", "peak_alloc_bytes", "retained_blocks"):
+            before, after = base.get(metric), metrics.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            if metric in ABSOLUTE_THRESHOLDS:
+                delta, limit = after - before, ABSOLUTE_THRESHOLDS[metric]
+                status = "regression" if delta > limit else ("improvement" if delta < -limit else "ok")
+            else:
+                status = "regression" if change > threshold else (
+                    "improvement" if change < -threshold else "ok")
+            rows.append({"name": name, "metric": metric, "before": before,
+                         "after": after, "change": change, "status": status})
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<32} {'metric':<18} {'before':>14} {'after':>14} {'change':>9}  status")
+    for row in rows:
+        if row["status"] == "new":
+            print(f"{row['name']:<32} {'-':<18} {'-':>14} {'-':>14} {'-':>9}  new")
+            continue
+        print(f"{row['name']:<32} {row['metric']:<18} {row['before']:>14.1f} "
+              f"{row['after']:>14.1f} {row['change']:>+8.1%}  {row['status']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="알림 렌더링/핸들러 벤치마크")
+    parser.add_argument("--filter", help="이름에 해당 문자열이 포함된 벤치마크만 실행")
+    parser.add_argument("--repeat", type=int, default=7, help="측정 반복 회차")
+    parser.add_argument("--min-time-ms", type=float, default=50.0, help="회차당 최소 측정 시간")
+    parser.add_argument("--alloc-samples", type=int, default=5, help="할당량 측정 샘플 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--save-baseline", metavar="NAME", help="baselines/NAME.json 으로 저장")
+    parser.add_argument("--compare", metavar="NAME_OR_PATH", help="기준 결과와 비교")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 판단할 변화율")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    result = run_suite(args.filter, args.repeat, args.min_time_ms, args.alloc_samples)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(_resolve_baseline_path(args.save_baseline), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if not args.compare:
+        if not args.output:
+            json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        return 0
+
+    with open(_resolve_baseline_path(args.compare), encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare_results(baseline, result, args.threshold)
+    _print_comparison(rows)
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,34 @@
 import os
 from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
 from layer.common.utils import init_event
+from layer.common.worker_pool import listener_pool
+from layer.common.interaction_dedup import interaction_dedup
+from layer.common.lease_store import create_lease_store
+from layer.common.leased_socket_mode import leased_socket_mode_handler
 
 # SLACK_BOT_TOKEN, SLACK_SIGNING_SECRET, SLACK_APP_TOKEN을 환경변수에 추가하는 함수
 init_event()
 
+# 리스너 실행 풀 (동시 실행 수, 큐 길이, 리스너 타임아웃은 환경변수로 조정)
+pool = listener_pool(
+  p_concurrency=int(os.environ.get('LISTENER_CONCURRENCY', 10)),
+  p_heavy_concurrency=int(os.environ.get('HEAVY_LISTENER_CONCURRENCY', 4)),
+  p_max_queue=int(os.environ.get('LISTENER_MAX_QUEUE', 100)),
+  p_default_timeout=float(os.environ.get('LISTENER_TIMEOUT', 30)),
+  p_metrics_interval=float(os.environ.get('LISTENER_METRICS_INTERVAL', 60))
+)
+
+# 버튼 재전송 / 중복 클릭 제거 (완료된 요청은 INTERACTION_DEDUP_TTL 초 동안 첫 응답 재사용)
+dedup = interaction_dedup(
+  p_ttl=float(os.environ.get('INTERACTION_DEDUP_TTL', 600)),
+  p_max_entries=int(os.environ.get('INTERACTION_DEDUP_MAX_ENTRIES', 5000))
+)
+
 # Web Server - Install the Slack app and get xoxb- token in advance
 app = App(
   token=os.environ.get('SLACK_BOT_TOKEN', None),
-  signing_secret=os.environ.get('SLACK_SIGNING_SECRET', None)
+  signing_secret=os.environ.get('SLACK_SIGNING_SECRET', None),
+  listener_executor=pool.listener_executor
 )
 
 # 메세지 수신 시 실행되는 함수
@@ -44,8 +63,14 @@ def message_hello(message, say):
     text=f"Hey there <@{message['user']}>!"
   )
 
-# 버튼 클릭 시 실행되는 함수
+# 리스너가 LISTENER_TIMEOUT 을 넘겨 실행 중일 때 호출되는 함수
+def notify_listener_timeout(body, say, **kwargs):
+  say(f"<@{body['user']['id']}> 요청 처리가 지연되고 있습니다.")
+
+# 버튼 클릭 시 실행되는 함수 (조회 작업은 별도 풀에서 실행, 같은 버튼의 반복 클릭은 한 번만 실행)
 @app.action("button_click")
+@dedup.once()
+@pool.heavy(p_on_timeout=notify_listener_timeout)
 def action_button_click(body, ack, say):
   # Acknowledge the action
   ack()
@@ -53,4 +78,15 @@ def action_button_click(body, ack, say):
 
 
 if __name__ == "__main__":
-  SocketModeHandler(app, os.environ.get('SLACK_APP_TOKEN', None)).start()
+  pool.start()
+  # 여러 복제본을 띄우면 슬랙이 연결마다 envelope 를 나눠 보내고, 같은 요청은 임대 저장소로 한 번만 처리
+  # (LEASE_STORE=sqlite 는 같은 호스트 / 공유 볼륨, dynamodb 는 LEASE_TABLE 을 공유하는 복제본 간 조정)
+  # concurrency: 소켓 모드 클라이언트가 동시에 처리하는 envelope 수
+  leased_socket_mode_handler(
+    app,
+    os.environ.get('SLACK_APP_TOKEN', None),
+    p_store=create_lease_store(),
+    p_lease_ttl=float(os.environ.get('LEASE_TTL', 60)),
+    p_done_ttl=float(os.environ.get('LEASE_DONE_TTL', 600)),
+    concurrency=int(os.environ.get('SOCKET_MODE_CONCURRENCY', 10))
+  ).start()
@@ -5,31 +5,46 @@ logger.setLevel(logging.INFO)
 import warnings
 warnings.filterwarnings(action='ignore')
 
-import json
-
 from common.sns_slack import slack_alarm
+from common.alarm_event import sns_alarm_event
 from common.constant import SLACK_CHANNELS, SERVICE_TYPE
+from common.tracing import traced_handler, span
+from common.slack_transport import prime_slack_connection
+from common.utils import put_delivery_latency
+
+# init 단계에서 slack.com 연결을 미리 생성 (SLACK_PRIME_CONNECTION=true 일 때)
+prime_slack_connection()
 
+# 호출마다 구간별 소요시간을 구조화 로그 ({"type": "invocation_trace"}) 한 건으로 출력
+@traced_handler
 def lambda_handler(event:dict, context:str) -> None:
   logging.info("lambda_handler!!")
 
-  sup_event = json.loads(event['Records'][0]['Sns']['Message'])
-  error_msg = sup_event['AlarmDescription']
-  lambda_nm = sup_event['Trigger']['Dimensions'][0]['value']
-  service_type = sup_event['Trigger']['Dimensions'][0]['value'].split("-")[0]
-
   slack = slack_alarm(p_slack_channel=SLACK_CHANNELS.ERROR)
   logging.info("create a slack")
 
-  service = SERVICE_TYPE[service_type]
-  if not slack.get_ts_of_service_message(p_service_nm=service.name):
-    logging.info("send message to slack!!")
-    slack.send_service_message(p_service_type=service)
-  
-  # 에러 메세지 전달
-  logging.info("send error message to slack!!")
-  slack.send_error_message(p_lambda_nm=lambda_nm, p_error_msg=error_msg)
-  
+  # 레코드마다 알람 메세지를 한 번만 파싱해서 전달
+  # 에러 메세지는 모아 두었다가 호출이 끝날 때 (중간 레코드에서 오류가 나도) 같은 스레드끼리 묶어서 전송
+  latencies = []
+  try:
+    for alarm in sns_alarm_event.iter_records(event):
+      service = SERVICE_TYPE[alarm.service_nm]
+      if not slack.get_ts_of_service_message(p_service_nm=service.name):
+        logging.info("send message to slack!!")
+        slack.send_service_message(p_service_type=service)
+
+      slack.send_error_message(p_lambda_nm=alarm.lambda_nm, p_error_msg=alarm.error_msg, p_region=alarm.region, p_defer=True)
+      latencies.append((service.name, alarm.state_change_time))
+  finally:
+    # 에러 메세지 전달
+    logging.info("send error message to slack!!")
+    with span("slack.flush_replies", replies=len(latencies)):
+      sent = slack.flush_replies()
+    for (service_nm, state_change_time), ts in zip(latencies, sent):
+      # 알람 발생부터 슬랙 메세지 생성까지의 지연 기록
+      if ts and state_change_time:
+        put_delivery_latency(p_service_nm=service_nm, p_state_change_time=state_change_time, p_ts=ts)
+
   return event 
 
 
@@ -7,7 +7,10 @@ warnings.filterwarnings(action='ignore')
 
 from common.sns_slack import slack_alarm
 from common.constant import SLACK_CHANNELS, SERVICE_TYPE
+from common.tracing import traced_handler
 
+# 호출마다 구간별 소요시간을 구조화 로그 ({"type": "invocation_trace"}) 한 건으로 출력
+@traced_handler
 def lambda_handler(event:dict, context:str) -> None:
   logging.info("lambda_handler START")
   service_type = event.get('service_type', None)
@@ -24,6 +27,8 @@ def lambda_handler(event:dict, context:str) -> None:
     logging.info("send message to slack!!")
     slack.send_service_message(p_service_type=service)
   else:
-    slack.send_sub_message(p_service_type=service)
+    slack.send_sub_message(p_service_type=service, p_defer=True)
+  # 모아 둔 답글은 호출이 끝날 때 묶어서 전송
+  slack.flush_replies()
 
   logging.info("lambda_handler END")
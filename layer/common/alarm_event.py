@@ -0,0 +1,45 @@
+import json
+from dataclasses import dataclass
+
+# 알람 이벤트 형식 오류 (필드 경로 포함)
+class alarm_event_error(ValueError):
+  pass
+
+# SNS 로 전달된 CloudWatch 알람 메세지 (레코드마다 메세지를 한 번만 파싱)
+@dataclass(slots=True)
+class sns_alarm_event:
+  error_msg: str
+  lambda_nm: str
+  service_nm: str
+  region: str = None
+  state_change_time: str = None
+
+  # SNS 이벤트의 레코드를 순서대로 하나씩 파싱하는 함수
+  @classmethod
+  def iter_records(cls, p_event:dict):
+    for i, record in enumerate(p_event.get('Records') or []):
+      try:
+        message = json.loads(record['Sns']['Message'])
+      except (KeyError, TypeError, ValueError) as e:
+        raise alarm_event_error(f"Records[{i}].Sns.Message is not a JSON object: {e}") from None
+      yield cls.parse(message, f"Records[{i}].")
+
+  # 알람 메세지 파싱 함수 (첫 번째 차원 값이 람다 이름, '-' 앞부분이 서비스 이름)
+  @classmethod
+  def parse(cls, p_message:dict, p_path:str="") -> "sns_alarm_event":
+    if not isinstance(p_message, dict) or not p_message.get('AlarmDescription'):
+      raise alarm_event_error(f"{p_path}AlarmDescription is missing")
+    dimensions = (p_message.get('Trigger') or {}).get('Dimensions') or [{}]
+    lambda_nm = dimensions[0].get('value')
+    if not lambda_nm:
+      raise alarm_event_error(f"{p_path}Trigger.Dimensions[0].value is missing")
+
+    # 알람 ARN(arn:aws:cloudwatch:<region>:<account>:alarm:<name>)에서 리전 추출
+    alarm_arn = p_message.get('AlarmArn') or ''
+    return cls(
+      error_msg=p_message['AlarmDescription'],
+      lambda_nm=lambda_nm,
+      service_nm=lambda_nm.split("-", 1)[0],
+      region=alarm_arn.split(':')[3] if alarm_arn.count(':') >= 3 else None,
+      state_change_time=p_message.get('StateChangeTime')
+    )
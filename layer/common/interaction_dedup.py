@@ -0,0 +1,130 @@
+import logging, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+
+# 같은 버튼 상호작용 (재전송, 중복 클릭) 을 한 번만 처리하는 중복 제거기
+# 소켓 모드 프로세스는 계속 떠 있으므로 메모리에 최근 p_max_entries 건만 유지
+class interaction_dedup:
+  # 생성 함수 (완료 기록은 p_ttl, 처리 중 기록은 p_pending_ttl 동안 유효)
+  def __init__(self, p_ttl:float=600.0, p_pending_ttl:float=120.0, p_max_entries:int=5000):
+    self.ttl = p_ttl
+    self.pending_ttl = p_pending_ttl
+    self.max_entries = p_max_entries
+    self.__entries = OrderedDict()  # key -> [상태(pending/done), 첫 응답, 기록 시각]
+    self.__lock = threading.Lock()
+
+  # 상호작용 키 생성 함수 (채널, 메세지, 버튼, 값이 같으면 같은 요청)
+  @staticmethod
+  def key_of(p_body:dict) -> str:
+    actions = p_body.get("actions") or [{}]
+    container = p_body.get("container") or {}
+    channel = (p_body.get("channel") or {}).get("id") or container.get("channel_id")
+    message_ts = container.get("message_ts") or (p_body.get("message") or {}).get("ts")
+    if not actions[0].get("action_id"):
+      return None
+    return f"{channel}:{message_ts}:{actions[0]['action_id']}:{actions[0].get('value', '')}"
+
+  # 리스너를 한 번만 실행하는 데코레이터
+  # 반복 요청은 ack 만 하고, 첫 응답이 있으면 요청한 사용자에게만 보이는 메세지로 다시 보여줌
+  # 리스너가 Future 를 반환하면 (listener_pool.heavy) 작업 스레드에서 끝날 때 완료 / 실패를 기록
+  def once(self):
+    def decorator(func):
+      @wraps(func)
+      def wrapper(**kwargs):
+        body = kwargs.get("body") or {}
+        key = self.key_of(body)
+        if key is None:
+          return func(**kwargs)
+
+        entry = self.__begin(key)
+        if entry is not None:
+          logging.info(f"[interaction_dedup][once] duplicate {func.__name__} {key}")
+          self.__ack(kwargs)
+          self.__reply_cached(kwargs, body, entry)
+          return
+
+        # say 로 보낸 첫 응답을 기록 (무거운 리스너는 다른 스레드에서 say 를 호출해도 기록됨)
+        say = kwargs.get("say")
+        if say is not None:
+          kwargs["say"] = self.__recording_say(key, say)
+        try:
+          result = func(**kwargs)
+        except Exception:
+          self.__release(key)
+          raise
+        # 작업이 거절되거나 실패하면 기록을 지워 다음 요청에서 다시 처리 (pending_ttl 까지 기다리지 않음)
+        if isinstance(result, Future):
+          result.add_done_callback(lambda p_future: self.__finish(key, not p_future.cancelled() and p_future.exception() is None))
+        else:
+          self.__finish(key, True)
+        return result
+      return wrapper
+    return decorator
+
+  def __recording_say(self, p_key:str, p_say):
+    def say(*args, **kwargs):
+      result = p_say(*args, **kwargs)
+      text = kwargs.get("text") or (args[0] if args and isinstance(args[0], str) else None)
+      self.__record(p_key, text)
+      return result
+    say.client = getattr(p_say, "client", None)
+    say.channel = getattr(p_say, "channel", None)
+    return say
+
+  def __reply_cached(self, p_kwargs:dict, p_body:dict, p_entry:list):
+    say = p_kwargs.get("say")
+    client = getattr(say, "client", None)
+    user = (p_body.get("user") or {}).get("id")
+    if client is None or not user:
+      return
+    if p_entry[0] != "done":
+      text = "같은 요청을 처리하고 있습니다."
+    else:
+      text = p_entry[1] or "이미 처리된 요청입니다."
+    try:
+      client.chat_postEphemeral(channel=getattr(say, "channel", None) or p_body["channel"]["id"], user=user, text=text)
+    except Exception as e:
+      logging.error(f"[interaction_dedup][__reply_cached] {str(e)}")
+
+  @staticmethod
+  def __ack(p_kwargs:dict):
+    ack = p_kwargs.get("ack")
+    if ack:
+      ack()
+
+  # 처리 시작 기록 함수 (유효한 기존 기록이 있으면 그 기록 반환)
+  def __begin(self, p_key:str):
+    now = time.monotonic()
+    with self.__lock:
+      entry = self.__entries.get(p_key)
+      if entry is not None and now - entry[2] < (self.ttl if entry[0] == "done" else self.pending_ttl):
+        return list(entry)
+      self.__entries[p_key] = ["pending", None, now]
+      self.__entries.move_to_end(p_key)
+      while len(self.__entries) > self.max_entries:
+        self.__entries.popitem(last=False)
+    return None
+
+  # 처리 중 기록에 첫 응답 저장 함수 (리스너가 끝나야 완료로 바뀜)
+  def __record(self, p_key:str, p_result:str):
+    with self.__lock:
+      entry = self.__entries.get(p_key)
+      if entry is not None and entry[0] == "pending" and entry[1] is None:
+        entry[1] = p_result
+
+  # 리스너 종료 처리 함수 (성공하면 완료 기록, 실패하면 기록 삭제)
+  def __finish(self, p_key:str, p_succeeded:bool):
+    if not p_succeeded:
+      self.__release(p_key)
+      return
+    with self.__lock:
+      entry = self.__entries.get(p_key)
+      if entry is not None and entry[0] == "pending":
+        self.__entries[p_key] = ["done", entry[1], time.monotonic()]
+
+  def __release(self, p_key:str):
+    with self.__lock:
+      entry = self.__entries.get(p_key)
+      if entry is not None and entry[0] == "pending":
+        del self.__entries[p_key]
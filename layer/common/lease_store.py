@@ -0,0 +1,183 @@
+import os, time, socket, sqlite3, logging, threading, uuid
+from abc import ABC, abstractmethod
+import boto3
+
+# 처리 중 상태 (만료 전까지 다른 복제본이 가져가지 못함)
+CLAIMED = "claimed"
+# 처리 완료 상태 (만료 전까지 재전송된 같은 요청을 건너뜀)
+DONE = "done"
+
+# 복제본 식별자 생성 함수 (호스트, 프로세스, 임의값)
+def replica_id() -> str:
+  return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# 임대 저장소 기본 클래스 (복제본 간 envelope 처리 권한 조정)
+class lease_store(ABC):
+  # 처리 권한 획득 함수 (다른 복제본이 유효한 임대를 가지고 있으면 False)
+  @abstractmethod
+  def claim(self, p_key:str, p_owner:str, p_ttl:float) -> bool:
+    pass
+
+  # 처리 완료 기록 함수 (p_ttl 동안 같은 키의 재전송을 건너뜀)
+  @abstractmethod
+  def complete(self, p_key:str, p_owner:str, p_ttl:float):
+    pass
+
+  # 처리 실패 시 임대 반납 함수 (재전송된 요청을 다른 복제본이 처리할 수 있도록)
+  @abstractmethod
+  def release(self, p_key:str, p_owner:str):
+    pass
+
+  # 만료된 임대 삭제 함수
+  def purge(self) -> int:
+    return 0
+
+
+# 단일 프로세스용 메모리 임대 저장소
+class memory_lease_store(lease_store):
+  def __init__(self):
+    self.__leases = {}  # key -> [owner, 상태, 만료 시각]
+    self.__lock = threading.Lock()
+
+  def claim(self, p_key:str, p_owner:str, p_ttl:float) -> bool:
+    now = time.time()
+    with self.__lock:
+      lease = self.__leases.get(p_key)
+      if lease is not None and lease[2] > now:
+        return False
+      self.__leases[p_key] = [p_owner, CLAIMED, now + p_ttl]
+      return True
+
+  def complete(self, p_key:str, p_owner:str, p_ttl:float):
+    with self.__lock:
+      lease = self.__leases.get(p_key)
+      if lease is not None and lease[0] == p_owner:
+        self.__leases[p_key] = [p_owner, DONE, time.time() + p_ttl]
+
+  def release(self, p_key:str, p_owner:str):
+    with self.__lock:
+      lease = self.__leases.get(p_key)
+      if lease is not None and lease[0] == p_owner and lease[1] == CLAIMED:
+        del self.__leases[p_key]
+
+  def purge(self) -> int:
+    now = time.time()
+    with self.__lock:
+      expired = [key for key, lease in self.__leases.items() if lease[2] <= now]
+      for key in expired:
+        del self.__leases[key]
+    return len(expired)
+
+
+# SQLite 임대 저장소 (같은 호스트 / 공유 볼륨의 복제본이 같은 파일을 사용)
+class sqlite_lease_store(lease_store):
+  # 생성 함수 (여러 프로세스가 동시에 쓰므로 WAL 모드, 잠금 대기 p_busy_timeout 초)
+  def __init__(self, p_path:str, p_busy_timeout:float=5.0):
+    self.path = p_path
+    self.__lock = threading.Lock()
+    self.__conn = sqlite3.connect(p_path, check_same_thread=False, isolation_level=None, timeout=p_busy_timeout)
+    self.__conn.execute("PRAGMA journal_mode=WAL")
+    self.__conn.execute("PRAGMA synchronous=NORMAL")
+    self.__conn.executescript("""
+      CREATE TABLE IF NOT EXISTS leases (
+        key TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        status TEXT NOT NULL,
+        expires_at REAL NOT NULL
+      );
+      CREATE INDEX IF NOT EXISTS idx_leases_expires ON leases (expires_at);
+    """)
+
+  def claim(self, p_key:str, p_owner:str, p_ttl:float) -> bool:
+    now = time.time()
+    with self.__lock:
+      # 만료되지 않은 임대가 없을 때만 덮어씀 (한 문장으로 실행되어 복제본 간 경쟁에 안전)
+      cursor = self.__conn.execute(
+        "INSERT INTO leases (key, owner, status, expires_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, status = excluded.status, "
+        "expires_at = excluded.expires_at WHERE leases.expires_at <= ?",
+        (p_key, p_owner, CLAIMED, now + p_ttl, now)
+      )
+      return cursor.rowcount == 1
+
+  def complete(self, p_key:str, p_owner:str, p_ttl:float):
+    with self.__lock:
+      self.__conn.execute(
+        "UPDATE leases SET status = ?, expires_at = ? WHERE key = ? AND owner = ?",
+        (DONE, time.time() + p_ttl, p_key, p_owner)
+      )
+
+  def release(self, p_key:str, p_owner:str):
+    with self.__lock:
+      self.__conn.execute("DELETE FROM leases WHERE key = ? AND owner = ? AND status = ?", (p_key, p_owner, CLAIMED))
+
+  def purge(self) -> int:
+    with self.__lock:
+      return self.__conn.execute("DELETE FROM leases WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+# DynamoDB 임대 저장소 (여러 호스트의 복제본이 같은 테이블 사용, 만료된 항목은 테이블 TTL 로 삭제)
+# 테이블: 파티션 키 lease_key (S), TTL 속성 expires_at
+class dynamodb_lease_store(lease_store):
+  def __init__(self, p_table:str):
+    self.table = p_table
+    self.__client = boto3.client('dynamodb')
+
+  def claim(self, p_key:str, p_owner:str, p_ttl:float) -> bool:
+    now = time.time()
+    try:
+      self.__client.put_item(
+        TableName=self.table,
+        Item={
+          "lease_key": {"S": p_key},
+          "owner": {"S": p_owner},
+          "status": {"S": CLAIMED},
+          "expires_at": {"N": str(int(now + p_ttl))}
+        },
+        ConditionExpression="attribute_not_exists(lease_key) OR expires_at <= :now",
+        ExpressionAttributeValues={":now": {"N": str(int(now))}}
+      )
+      return True
+    except self.__client.exceptions.ConditionalCheckFailedException:
+      return False
+
+  def complete(self, p_key:str, p_owner:str, p_ttl:float):
+    try:
+      self.__client.update_item(
+        TableName=self.table,
+        Key={"lease_key": {"S": p_key}},
+        UpdateExpression="SET #status = :done, expires_at = :expires_at",
+        ConditionExpression="#owner = :owner",
+        ExpressionAttributeNames={"#status": "status", "#owner": "owner"},
+        ExpressionAttributeValues={
+          ":done": {"S": DONE},
+          ":expires_at": {"N": str(int(time.time() + p_ttl))},
+          ":owner": {"S": p_owner}
+        }
+      )
+    except self.__client.exceptions.ConditionalCheckFailedException:
+      logging.warning(f"[dynamodb_lease_store][complete] lease {p_key} was taken over")
+
+  def release(self, p_key:str, p_owner:str):
+    try:
+      self.__client.delete_item(
+        TableName=self.table,
+        Key={"lease_key": {"S": p_key}},
+        ConditionExpression="#owner = :owner AND #status = :claimed",
+        ExpressionAttributeNames={"#status": "status", "#owner": "owner"},
+        ExpressionAttributeValues={":owner": {"S": p_owner}, ":claimed": {"S": CLAIMED}}
+      )
+    except self.__client.exceptions.ConditionalCheckFailedException:
+      pass
+
+
+# 환경변수 설정으로 임대 저장소 생성 함수
+# LEASE_STORE: sqlite (기본값, LEASE_STORE_PATH 파일 공유) | dynamodb (LEASE_TABLE 공유) | memory (단일 프로세스)
+def create_lease_store() -> lease_store:
+  kind = os.environ.get('LEASE_STORE', 'sqlite').lower()
+  if kind == 'dynamodb':
+    return dynamodb_lease_store(p_table=os.environ['LEASE_TABLE'])
+  if kind == 'memory':
+    return memory_lease_store()
+  return sqlite_lease_store(p_path=os.environ.get('LEASE_STORE_PATH', '/tmp/socket_mode_leases.sqlite3'))
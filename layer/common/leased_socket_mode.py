@@ -0,0 +1,95 @@
+import time, logging, threading
+from slack_bolt import App
+from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_bolt.adapter.socket_mode.internals import run_bolt_app, send_response
+from slack_sdk.socket_mode.request import SocketModeRequest
+from slack_sdk.socket_mode.response import SocketModeResponse
+
+from .lease_store import lease_store, replica_id
+
+# 여러 복제본이 같은 앱 토큰으로 접속해도 envelope 를 한 번만 처리하는 소켓 모드 핸들러
+# 슬랙이 envelope 를 연결들에 나눠 보내므로 복제본 수만큼 처리량이 늘고,
+# 재전송 등으로 같은 요청이 다른 복제본에 도착하면 임대를 먼저 얻은 복제본만 처리
+class leased_socket_mode_handler(SocketModeHandler):
+  # 생성 함수 (처리 중 임대는 p_lease_ttl 초, 처리 완료 기록은 p_done_ttl 초 동안 유지)
+  def __init__(self, p_app:App, p_app_token:str, p_store:lease_store, p_lease_ttl:float=60.0,
+               p_done_ttl:float=600.0, p_purge_interval:float=60.0, **kwargs):
+    super().__init__(p_app, p_app_token, **kwargs)
+    self.store = p_store
+    self.owner = replica_id()
+    self.lease_ttl = p_lease_ttl
+    self.done_ttl = p_done_ttl
+    self.purge_interval = p_purge_interval
+    self.__purged_at = time.monotonic()
+    self.__lock = threading.Lock()
+    self.__counters = {"handled": 0, "skipped": 0, "failed": 0}
+
+  # 임대 키 생성 함수 (Events API 재전송은 envelope_id 가 바뀌므로 event_id 사용)
+  @staticmethod
+  def key_of(p_req:SocketModeRequest) -> str:
+    event_id = p_req.payload.get("event_id") if p_req.type == "events_api" else None
+    return f"event:{event_id}" if event_id else f"envelope:{p_req.envelope_id}"
+
+  # envelope 처리 함수 (임대를 얻지 못하면 ack 만 보내고 건너뜀)
+  def handle(self, client, req:SocketModeRequest) -> None:
+    key = self.key_of(req)
+    try:
+      claimed = self.store.claim(key, self.owner, self.lease_ttl)
+    except Exception as e:
+      # 저장소 장애 시에는 응답 누락보다 중복 응답이 나으므로 그대로 처리
+      logging.error(f"[leased_socket_mode_handler][handle] claim failed {key}: {str(e)}")
+      claimed = True
+
+    if not claimed:
+      self.__count("skipped")
+      logging.info(f"[leased_socket_mode_handler][handle] {key} is handled by another replica")
+      client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+      return
+
+    start = time.time()
+    try:
+      bolt_resp = run_bolt_app(self.app, req)
+    except Exception:
+      self.__count("failed")
+      self.__release(key)
+      raise
+    if bolt_resp.status >= 500:
+      # 재전송된 요청을 다른 복제본이 처리할 수 있도록 임대 반납
+      self.__count("failed")
+      self.__release(key)
+    else:
+      self.__count("handled")
+      self.__complete(key)
+    send_response(client, req, bolt_resp, start)
+    self.__maybe_purge()
+
+  # 처리 현황 조회 함수
+  def stats(self) -> dict:
+    with self.__lock:
+      return {"owner": self.owner, **self.__counters}
+
+  def __complete(self, p_key:str):
+    try:
+      self.store.complete(p_key, self.owner, self.done_ttl)
+    except Exception as e:
+      logging.error(f"[leased_socket_mode_handler][__complete] {str(e)}")
+
+  def __release(self, p_key:str):
+    try:
+      self.store.release(p_key, self.owner)
+    except Exception as e:
+      logging.error(f"[leased_socket_mode_handler][__release] {str(e)}")
+
+  def __maybe_purge(self):
+    with self.__lock:
+      if time.monotonic() - self.__purged_at < self.purge_interval:
+        return
+      self.__purged_at = time.monotonic()
+    try:
+      self.store.purge()
+    except Exception as e:
+      logging.error(f"[leased_socket_mode_handler][__maybe_purge] {str(e)}")
+
+  def __count(self, p_key:str):
+    with self.__lock:
+      self.__counters[p_key] += 1
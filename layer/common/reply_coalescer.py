@@ -0,0 +1,59 @@
+# 같은 스레드에 보내는 답글을 슬랙 메세지 제한 안에서 묶는 함수 모음
+# https://api.slack.com/reference/block-kit/blocks
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_TEXT_LENGTH = 40000
+REPLY_SEPARATOR = {"type": "divider"}
+TRUNCATION_MARKER = "… (메세지 길이 제한으로 잘림)"
+
+# 블록에 포함된 텍스트 길이 합계
+def block_text_length(p_block:dict) -> int:
+  length = len(p_block["text"].get("text", "")) if isinstance(p_block.get("text"), dict) else 0
+  for item in p_block.get("fields", []) + p_block.get("elements", []):
+    text = item.get("text")
+    if isinstance(text, dict):
+      length += len(text.get("text", ""))
+    elif isinstance(text, str):
+      length += len(text)
+  return length
+
+def _omission_block(p_omitted:int) -> dict:
+  return {"type": "context", "elements": [
+    {"type": "mrkdwn", "text": f"⚠️ 메세지 제한으로 이 답글의 일부를 생략했습니다 (블록 {p_omitted}개 생략)"}
+  ]}
+
+# 한 답글이 메세지 제한을 넘으면 블록 / 텍스트를 잘라 생략 표시 블록을 붙이는 함수 (조용히 버리지 않음)
+def fit_blocks(p_blocks:list[dict], p_max_blocks:int=SLACK_MAX_BLOCKS, p_max_text_length:int=SLACK_MAX_TEXT_LENGTH) -> list[dict]:
+  if len(p_blocks) <= p_max_blocks and sum(block_text_length(block) for block in p_blocks) <= p_max_text_length:
+    return p_blocks
+
+  budget = p_max_text_length - block_text_length(_omission_block(len(p_blocks)))
+  blocks = []
+  for block in p_blocks:
+    if len(blocks) == p_max_blocks - 1:
+      break
+    length = block_text_length(block)
+    if length > budget:
+      # 본문만 있는 블록 (section 등) 은 남은 길이만큼 잘라서 포함
+      inner = block.get("text")
+      if isinstance(inner, dict) and not block.get("fields") and budget > len(TRUNCATION_MARKER):
+        blocks.append({**block, "text": {**inner, "text": inner.get("text", "")[:budget - len(TRUNCATION_MARKER)] + TRUNCATION_MARKER}})
+      break
+    blocks.append(block)
+    budget -= length
+  blocks.append(_omission_block(len(p_blocks) - len(blocks)))
+  return blocks
+
+# 답글 (스레드 아이디, 블록 목록) 을 같은 스레드끼리 최소 개수의 메세지로 묶는 함수 (순서 유지)
+# 반환: (스레드 아이디, 블록 목록, 묶인 답글 인덱스 목록) 목록
+def pack_replies(p_replies:list[tuple], p_max_blocks:int=SLACK_MAX_BLOCKS, p_max_text_length:int=SLACK_MAX_TEXT_LENGTH) -> list[tuple]:
+  packs = []
+  for index, (thread_ts, blocks) in enumerate(p_replies):
+    blocks = fit_blocks(blocks, p_max_blocks, p_max_text_length)
+    length = sum(block_text_length(block) for block in blocks)
+    if packs:
+      last_ts, last_blocks, last_indexes, last_length = packs[-1]
+      if last_ts == thread_ts and len(last_blocks) + 1 + len(blocks) <= p_max_blocks and last_length + length <= p_max_text_length:
+        packs[-1] = (last_ts, last_blocks + [REPLY_SEPARATOR] + blocks, last_indexes + [index], last_length + length)
+        continue
+    packs.append((thread_ts, list(blocks), [index], length))
+  return [(thread_ts, blocks, indexes) for thread_ts, blocks, indexes, _ in packs]
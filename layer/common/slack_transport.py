@@ -0,0 +1,131 @@
+import io, os, ssl, time, inspect, logging, threading
+import http.client
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from slack_sdk import WebClient
+
+# 재사용한 연결이 이미 끊겨 있을 때 발생하는 오류 (새 연결로 한 번만 재시도)
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# pooled_web_client 가 대체하는 slack_sdk 내부 메서드 (requirements.txt 에 고정한 slack_sdk 버전 기준)
+TRANSPORT_HOOK = '_perform_urllib_http_request_internal'
+
+# 설치된 slack_sdk 의 내부 메서드가 고정한 버전과 같은 형식인지 확인하는 함수 (다르면 기본 WebClient 사용)
+def pooled_transport_supported() -> bool:
+  hook = getattr(WebClient, TRANSPORT_HOOK, None)
+  return hook is not None and list(inspect.signature(hook).parameters) == ['self', 'url', 'req']
+
+class slack_connection_pool:
+  # 생성 함수 (p_idle_timeout 초 넘게 쉰 연결은 서버가 끊었을 수 있으므로 버림)
+  def __init__(self, p_host:str='slack.com', p_max_idle:int=4, p_idle_timeout:float=50.0):
+    self.host = p_host
+    self.max_idle = p_max_idle
+    self.idle_timeout = p_idle_timeout
+    self.ssl_context = ssl.create_default_context()
+    self.__idle = []
+    self.__lock = threading.Lock()
+
+  # 연결 대여 함수 (유휴 연결이 있으면 재사용 여부와 함께 반환)
+  def acquire(self, p_timeout:float) -> tuple:
+    now = time.monotonic()
+    with self.__lock:
+      while self.__idle:
+        connection, released_at = self.__idle.pop()
+        if now - released_at < self.idle_timeout:
+          connection.timeout = p_timeout
+          if connection.sock is not None:
+            connection.sock.settimeout(p_timeout)
+          return connection, True
+        connection.close()
+    return http.client.HTTPSConnection(self.host, timeout=p_timeout, context=self.ssl_context), False
+
+  # 연결 반납 함수
+  def release(self, p_connection:http.client.HTTPSConnection):
+    with self.__lock:
+      if p_connection.sock is not None and len(self.__idle) < self.max_idle:
+        self.__idle.append((p_connection, time.monotonic()))
+        return
+    p_connection.close()
+
+  # 연결 미리 생성 함수 (람다 init 단계에서 DNS 조회 / TLS 핸드셰이크 수행)
+  def prime(self, p_timeout:float=5.0) -> bool:
+    connection = http.client.HTTPSConnection(self.host, timeout=p_timeout, context=self.ssl_context)
+    try:
+      connection.connect()
+    except OSError as e:
+      logging.warning(f"[slack_connection_pool][prime] {str(e)}")
+      connection.close()
+      return False
+    self.release(connection)
+    return True
+
+  # 요청 함수 (응답 본문을 모두 읽은 뒤 keep-alive 연결이면 반납)
+  def request(self, p_method:str, p_target:str, p_body:bytes, p_headers:dict, p_timeout:float) -> tuple:
+    connection, reused = self.acquire(p_timeout)
+    for attempt in range(2):
+      try:
+        connection.request(p_method, p_target, body=p_body, headers=p_headers)
+        response = connection.getresponse()
+        data = response.read()
+        break
+      except STALE_CONNECTION_ERRORS:
+        connection.close()
+        if not reused or attempt:
+          raise
+        connection = http.client.HTTPSConnection(self.host, timeout=p_timeout, context=self.ssl_context)
+      except Exception:
+        connection.close()
+        raise
+
+    if response.will_close:
+      connection.close()
+    else:
+      self.release(connection)
+    return response, data
+
+
+class pooled_web_client(WebClient):
+  # 생성 함수 (연결 풀의 SSL 설정을 클라이언트 SSL 설정으로 사용)
+  def __init__(self, p_token:str, p_pool:slack_connection_pool):
+    super().__init__(token=p_token, ssl=p_pool.ssl_context)
+    self.pool = p_pool
+
+  # urllib 대신 연결 풀로 요청 (오류 응답은 HTTPError 로 올려 slack_sdk 재시도 처리 유지)
+  # 프록시나 풀과 다른 SSL 설정이 있으면 기본 urllib 구현으로 보내 클라이언트 설정을 그대로 적용
+  def _perform_urllib_http_request_internal(self, url, req):
+    parts = urlsplit(url)
+    if self.proxy is not None or self.ssl is not self.pool.ssl_context or parts.scheme != 'https' or parts.netloc != self.pool.host:
+      return super()._perform_urllib_http_request_internal(url, req)
+
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    response, data = self.pool.request(req.get_method(), target, req.data, dict(req.header_items()), self.timeout)
+    if response.status >= 400:
+      raise HTTPError(url, response.status, response.reason, response.msg, io.BytesIO(data))
+    if response.msg.get_content_type() == "application/gzip":
+      return {"status": response.status, "headers": response.msg, "body": data}
+    charset = response.msg.get_content_charset() or "utf-8"
+    return {"status": response.status, "headers": response.msg, "body": data.decode(charset)}
+
+
+__pool = slack_connection_pool()
+__client = None
+__client_lock = threading.Lock()
+
+# 컨테이너 공용 슬랙 클라이언트 조회 함수 (토큰이 바뀌면 같은 연결 풀로 새로 생성, 연결 풀을 쓸 수 없는 slack_sdk 면 기본 클라이언트)
+def get_slack_client() -> WebClient:
+  global __client
+  token = os.environ.get('SLACK_BOT_TOKEN', None)
+  with __client_lock:
+    if __client is None or __client.token != token:
+      if pooled_transport_supported():
+        __client = pooled_web_client(p_token=token, p_pool=__pool)
+      else:
+        logging.warning(f"[slack_transport][get_slack_client] slack_sdk {TRANSPORT_HOOK} changed, connection pool is disabled")
+        __client = WebClient(token=token)
+    return __client
+
+# 연결 미리 생성 함수 (SLACK_PRIME_CONNECTION=true 일 때만)
+def prime_slack_connection() -> bool:
+  if os.environ.get('SLACK_PRIME_CONNECTION', 'false').lower() != 'true':
+    return False
+  return __pool.prime()
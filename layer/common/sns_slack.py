@@ -1,11 +1,13 @@
 import os
 import datetime, logging, time, copy
 
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackClientError
 
 from .constant import SLACK_CHANNELS, MESSAGE_BLOCKS, SERVICE_TYPE
 from .utils import init_alarm
+from .slack_transport import get_slack_client
+from .reply_coalescer import pack_replies
+from .tracing import span
 
 import warnings
 warnings.filterwarnings(action='ignore')
@@ -15,8 +17,9 @@ class slack_alarm:
   def __init__(self, p_slack_channel:SLACK_CHANNELS):
     init_alarm()
     self.slack_channel = p_slack_channel
-    self.client = WebClient(token=os.environ.get('SLACK_BOT_TOKEN', None))
+    self.client = get_slack_client() # 호출 간 keep-alive 연결을 재사용하는 공용 클라이언트
     self.thread_ts = None # 메세지 아이디 (스레드 아이디) -> 메세지가 생성되어야 알 수 있기때문에 None
+    self.__pending = [] # p_defer=True 로 모아 둔 답글 (스레드 아이디, 블록 목록), flush_replies 에서 전송
 
   # 메세지 전달 함수
   def __send_message(self, p_message_blocks:list[dict], p_thread_ts:str=None) -> dict:
@@ -24,11 +27,12 @@ class slack_alarm:
       logging.debug(f"[slack_alarm][__send_message] START")
       # https://api.slack.com/methods/chat.postMessage
       # 해당 채널에 메세지 전달 
-      result = self.client.chat_postMessage(
-        channel=self.slack_channel.value[1],
-        blocks=p_message_blocks,
-        thread_ts=p_thread_ts
-      )
+      with span("slack.chat_postMessage"):
+        result = self.client.chat_postMessage(
+          channel=self.slack_channel.value[1],
+          blocks=p_message_blocks,
+          thread_ts=p_thread_ts
+        )
       return result # result 는 메세지 아이디
 
     except SlackClientError as e:
@@ -43,7 +47,8 @@ class slack_alarm:
 
     today = time.mktime(datetime.date.today().timetuple())
     # 오늘 작성한 message 조회 
-    history = self.client.conversations_history(channel=self.slack_channel.value[1], oldest=today)["messages"]
+    with span("slack.conversations_history"):
+      history = self.client.conversations_history(channel=self.slack_channel.value[1], oldest=today)["messages"]
 
     for msg in history:
       try:
@@ -69,11 +74,39 @@ class slack_alarm:
     message[0]['text']['text'] = message[0]['text']['text'].format(service_nm=p_service_type.name)
     message[2]['text']['text'] = message[2]['text']['text'].format(service_msg=p_service_type.value[1])
 
-    self.thread_ts = self.__send_message(p_message_blocks=message)['ts']
+    result = self.__send_message(p_message_blocks=message)
+    if not result:
+      return None
+    self.thread_ts = result['ts']
     return self.thread_ts
 
-  # 스레드 메세지 전달 함수
-  def send_sub_message(self, p_service_type:SERVICE_TYPE):
+  # 모아 둔 답글을 같은 스레드끼리 묶어 전송하는 함수 (호출이 끝날 때 한 번 호출)
+  # 반환: 모아 둔 순서대로 각 답글이 포함된 메세지 아이디 (전송 실패 시 None)
+  def flush_replies(self) -> list[str]:
+    pending, self.__pending = self.__pending, []
+    results = [None] * len(pending)
+    for thread_ts, blocks, indexes in pack_replies(pending):
+      result = self.__send_message(p_message_blocks=blocks, p_thread_ts=thread_ts)
+      if not result:
+        continue
+      for index in indexes:
+        results[index] = result['ts']
+    logging.info(f"[slack_alarm][flush_replies] {len(pending)} replies sent")
+    return results
+
+  # 답글을 바로 보내거나 (p_defer=False) flush_replies 까지 모아 두는 함수
+  def __send_reply(self, p_message_blocks:list[dict], p_defer:bool) -> str:
+    if p_defer:
+      self.__pending.append((self.thread_ts, p_message_blocks))
+      return None
+    result = self.__send_message(p_message_blocks=p_message_blocks, p_thread_ts=self.thread_ts)
+    if not result:
+      return None
+    self.thread_ts = result['ts']
+    return self.thread_ts
+
+  # 스레드 메세지 전달 함수 (p_defer=True 이면 flush_replies 에서 전송)
+  def send_sub_message(self, p_service_type:SERVICE_TYPE, p_defer:bool=False):
     if not isinstance(p_service_type, SERVICE_TYPE):
       logging.error("[slack_alarm][send_sub_message] error of p_service_type")
       return 
@@ -83,12 +116,11 @@ class slack_alarm:
     
     message = copy.deepcopy(MESSAGE_BLOCKS.SUB_MSG.value[1])
     message[0]['text']['text'] = message[0]['text']['text'].format(service_nm=p_service_type.name)
-
-    self.thread_ts = self.__send_message(p_message_blocks=message, p_thread_ts=self.thread_ts)['ts']
-    return self.thread_ts
+    return self.__send_reply(p_message_blocks=message, p_defer=p_defer)
 
   # 오류 메세지 전달 함수
-  def send_error_message(self, p_lambda_nm:str, p_error_msg:str):
+  # p_region 이 없으면 람다가 실행 중인 리전의 로그 링크 사용, p_defer=True 이면 flush_replies 에서 전송
+  def send_error_message(self, p_lambda_nm:str, p_error_msg:str, p_region:str=None, p_defer:bool=False):
     if not self.thread_ts:
       logging.error("[slack_alarm][send_sub_message] no thread_ts")
       return
@@ -96,9 +128,8 @@ class slack_alarm:
     message = copy.deepcopy(MESSAGE_BLOCKS.ERROR.value[1])
     message[0]['text']['text'] = message[0]['text']['text'].format(error_msg=p_error_msg)
 
-    aws_log_link_url = f"https://ap-northeast-2.console.aws.amazon.com/cloudwatch/home?region=ap-northeast-2#logsV2:log-groups/log-group/$252Faws$252Flambda$252F{p_lambda_nm}"
+    region = p_region or os.environ.get("AWS_REGION", "ap-northeast-2")
+    aws_log_link_url = f"https://{region}.console.aws.amazon.com/cloudwatch/home?region={region}#logsV2:log-groups/log-group/$252Faws$252Flambda$252F{p_lambda_nm}"
     message[0]['accessory']['url'] = message[0]['accessory']['url'].format(aws_log_link_url=aws_log_link_url)
-
-    self.thread_ts = self.__send_message(p_message_blocks=message, p_thread_ts=self.thread_ts)['ts']
-    return self.thread_ts
+    return self.__send_reply(p_message_blocks=message, p_defer=p_defer)
 
@@ -0,0 +1,81 @@
+import contextvars, json, logging, time
+from contextlib import contextmanager
+from functools import wraps
+
+# 핸들러 호출 단위 구간(span) 기록
+# 모니터링 람다와 같은 형식 ({"type": "invocation_trace", ...}) 의 구조화 로그 한 건으로 출력
+__cold_start = True
+__current_trace = contextvars.ContextVar("invocation_trace", default=None)
+
+class invocation_trace:
+  # 생성 함수
+  def __init__(self, p_handler_nm:str, p_context, p_cold_start:bool):
+    self.handler_nm = p_handler_nm
+    self.request_id = getattr(p_context, "aws_request_id", None)
+    self.cold_start = p_cold_start
+    self.started_at = time.perf_counter()
+    self.spans = []
+
+  # 구간 기록 함수
+  def add_span(self, p_name:str, p_started_at:float, p_duration:float, p_error:str=None, **p_attrs):
+    record = {
+      "name": p_name,
+      "start_ms": round((p_started_at - self.started_at) * 1000, 3),
+      "duration_ms": round(p_duration * 1000, 3)
+    }
+    if p_error:
+      record["error"] = p_error
+    record.update(p_attrs)
+    self.spans.append(record)
+
+  # 구조화 로그 변환 함수 (같은 이름의 구간은 stages 에 합산)
+  def to_record(self, p_status:str) -> dict:
+    stages = {}
+    for record in self.spans:
+      stages[record["name"]] = round(stages.get(record["name"], 0.0) + record["duration_ms"], 3)
+    return {
+      "type": "invocation_trace",
+      "handler": self.handler_nm,
+      "request_id": self.request_id,
+      "cold_start": self.cold_start,
+      "status": p_status,
+      "duration_ms": round((time.perf_counter() - self.started_at) * 1000, 3),
+      "stages": stages,
+      "spans": self.spans
+    }
+
+# 구간 소요시간 측정 함수 (트레이스 밖에서는 아무 동작도 하지 않음)
+@contextmanager
+def span(p_name:str, **p_attrs):
+  trace = __current_trace.get()
+  if trace is None:
+    yield
+    return
+
+  started_at = time.perf_counter()
+  error = None
+  try:
+    yield
+  except Exception as e:
+    error = e.__class__.__name__
+    raise
+  finally:
+    trace.add_span(p_name, started_at, time.perf_counter() - started_at, p_error=error, **p_attrs)
+
+# 핸들러 호출마다 구간 기록을 구조화 로그 한 건으로 출력하는 데코레이터
+def traced_handler(func):
+  @wraps(func)
+  def wrapper(event, context):
+    global __cold_start
+    trace = invocation_trace(func.__name__, context, __cold_start)
+    __cold_start = False
+    token = __current_trace.set(trace)
+    status = "error"
+    try:
+      result = func(event, context)
+      status = "ok"
+      return result
+    finally:
+      __current_trace.reset(token)
+      logging.info(json.dumps(trace.to_record(status), ensure_ascii=False))
+  return wrapper
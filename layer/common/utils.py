@@ -1,27 +1,65 @@
-import os 
+import os, logging, datetime, json
 import boto3
 
 from .constant import SLACK_TOKENS 
+from .tracing import span
 
-def __set_environ(p_slack_token:SLACK_TOKENS):
-  ssm = boto3.client('ssm')
-  parameter = ssm.get_parameter(Name=p_slack_token.value[1], WithDecryption=True)
-  # os.environ["환경변수 키"] = "환경변수 값"
-  os.environ[p_slack_token.name] = parameter['Parameter']['Value']
+__ssm_client = None
+__cloudwatch_client = None
+
+# SSM 클라이언트는 한 번만 생성해서 재사용
+def __get_ssm_client():
+  global __ssm_client
+  if __ssm_client is None:
+    __ssm_client = boto3.client('ssm')
+  return __ssm_client
+
+def __set_environ(p_slack_tokens:list[SLACK_TOKENS]):
+  # get_parameters 한 번으로 여러 토큰 조회 (최대 10개)
+  tokens = {token.value[1]: token for token in p_slack_tokens}
+  with span("ssm.get_parameters", names=len(tokens)):
+    response = __get_ssm_client().get_parameters(Names=list(tokens), WithDecryption=True)
+  for parameter in response['Parameters']:
+    # os.environ["환경변수 키"] = "환경변수 값"
+    os.environ[tokens[parameter['Name']].name] = parameter['Value']
+  if response.get('InvalidParameters'):
+    logging.error(f"[__set_environ] invalid parameters: {response['InvalidParameters']}")
 
 
 # 글만 보내는 챗봇
 def init_alarm():
   SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN', None)
   if not SLACK_BOT_TOKEN:
-    __set_environ(SLACK_TOKENS.SLACK_BOT_TOKEN)
+    __set_environ([SLACK_TOKENS.SLACK_BOT_TOKEN])
 
 
 # 질문 답변이 가능한 챗봇 (이벤트 챗봇, 세가지 토큰 필요)
 def init_event():
-  SLACK_BOT_TOKEN = os.environ.get('SLACK_BOT_TOKEN', None)
-  SLACK_APP_TOKEN = os.environ.get('SLACK_APP_TOKEN', None)
-  SLACK_SIGNING_SECRET = os.environ.get('SLACK_SIGNING_SECRET', None)
-  if not SLACK_BOT_TOKEN or not SLACK_APP_TOKEN or not SLACK_SIGNING_SECRET:
-    for token in SLACK_TOKENS.__members__:
-      __set_environ(SLACK_TOKENS[token])
+  # 없는 토큰만 조회
+  missing_tokens = [SLACK_TOKENS[token] for token in SLACK_TOKENS.__members__ if not os.environ.get(token, None)]
+  if missing_tokens:
+    __set_environ(missing_tokens)
+
+
+# 알람 발생 시각(StateChangeTime)부터 슬랙 메세지 생성(ts)까지의 전송 지연 기록 함수
+# 호출마다 값 하나만 기록하고 백분위(p99 등) 집계는 CloudWatch 에서 수행
+def put_delivery_latency(p_service_nm:str, p_state_change_time:str, p_ts:str):
+  global __cloudwatch_client
+  try:
+    source_time = datetime.datetime.strptime(p_state_change_time, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+    latency_ms = max((float(p_ts) - source_time) * 1000, 0.0)
+    logging.info(json.dumps({"type": "delivery_latency", "service": p_service_nm, "alert_type": "ALARM", "latency_ms": latency_ms}))
+    if __cloudwatch_client is None:
+      __cloudwatch_client = boto3.client('cloudwatch')
+    with span("cloudwatch.put_metric_data"):
+      __cloudwatch_client.put_metric_data(
+        Namespace="Monitoring/Delivery",
+        MetricData=[{
+          "MetricName": "DeliveryLatency",
+          "Dimensions": [{"Name": "Service", "Value": p_service_nm}, {"Name": "AlertType", "Value": "ALARM"}],
+          "Values": [latency_ms],
+          "Unit": "Milliseconds"
+        }]
+      )
+  except Exception as e:
+    logging.error(f"[put_delivery_latency] {str(e)}")
@@ -0,0 +1,159 @@
+import json, logging, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+
+# 큐가 가득 차서 작업을 받을 수 없을 때 발생하는 오류
+class queue_full_error(RuntimeError):
+  pass
+
+class bounded_executor(ThreadPoolExecutor):
+  # 생성 함수 (대기 큐 길이를 p_max_queue 로 제한)
+  def __init__(self, p_name:str, p_max_workers:int, p_max_queue:int, p_submit_timeout:float=1.0):
+    super().__init__(max_workers=p_max_workers, thread_name_prefix=p_name)
+    self.name = p_name
+    self.max_workers = p_max_workers
+    self.submit_timeout = p_submit_timeout
+    self.__slots = threading.BoundedSemaphore(p_max_workers + p_max_queue)
+    self.__lock = threading.Lock()
+    self.__counters = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+  # 작업 등록 함수 (큐가 가득 차면 p_submit_timeout 만큼 기다린 뒤 거절)
+  def submit(self, fn, /, *args, **kwargs) -> Future:
+    if not self.__slots.acquire(timeout=self.submit_timeout):
+      self.__count("rejected")
+      raise queue_full_error(f"[bounded_executor][{self.name}] queue is full")
+
+    self.__count("queued")
+
+    def run():
+      self.__count("queued", -1)
+      self.__count("running")
+      try:
+        return fn(*args, **kwargs)
+      except Exception:
+        self.__count("failed")
+        raise
+      finally:
+        self.__count("running", -1)
+        self.__count("completed")
+
+    try:
+      future = super().submit(run)
+    except Exception:
+      self.__count("queued", -1)
+      self.__slots.release()
+      raise
+    future.add_done_callback(lambda _: self.__slots.release())
+    return future
+
+  # 큐 길이 등 현재 상태 조회 함수
+  def stats(self) -> dict:
+    with self.__lock:
+      return {"pool": self.name, "max_workers": self.max_workers, **self.__counters}
+
+  def __count(self, p_key:str, p_delta:int=1):
+    with self.__lock:
+      self.__counters[p_key] += p_delta
+
+
+class listener_pool:
+  # 생성 함수
+  # 가벼운 리스너는 bolt 에 넘기는 listener_executor 에서, 무거운 조회는 heavy_executor 에서 실행
+  def __init__(self, p_concurrency:int=10, p_heavy_concurrency:int=4, p_max_queue:int=100,
+               p_default_timeout:float=30.0, p_metrics_interval:float=60.0):
+    self.listener_executor = bounded_executor("listener", p_concurrency, p_max_queue)
+    self.heavy_executor = bounded_executor("heavy", p_heavy_concurrency, p_max_queue)
+    self.default_timeout = p_default_timeout
+    self.metrics_interval = p_metrics_interval
+    self.__running = {}  # 실행 중인 작업 id -> (리스너 이름, 마감 시간, 타임아웃 콜백, 리스너 인자)
+    self.__timed_out = {}
+    self.__lock = threading.Lock()
+    self.__stop = threading.Event()
+    self.__watchdog = None
+
+  # 무거운 리스너를 별도 풀에서 실행하는 데코레이터
+  # ack 는 즉시 호출하고, 실행 시간이 p_timeout 을 넘으면 p_on_timeout(**kwargs) 호출
+  # 등록한 작업의 Future 반환 (큐가 가득 차서 거절되면 실패한 Future)
+  def heavy(self, p_timeout:float=None, p_on_timeout=None):
+    def decorator(func):
+      @wraps(func)
+      def wrapper(**kwargs):
+        ack = kwargs.get("ack")
+        if ack:
+          ack()
+          kwargs["ack"] = lambda *args, **ack_kwargs: None
+        try:
+          return self.heavy_executor.submit(self.__run_with_deadline, func, p_timeout or self.default_timeout, p_on_timeout, kwargs)
+        except queue_full_error as e:
+          logging.error(f"[listener_pool][heavy] {func.__name__} rejected: {e}")
+          say = kwargs.get("say")
+          if say:
+            say("요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+          future = Future()
+          future.set_exception(e)
+          return future
+      return wrapper
+    return decorator
+
+  # 실행 시간 감시 및 큐 길이 메트릭 출력 스레드 시작 함수
+  def start(self):
+    if self.__watchdog and self.__watchdog.is_alive():
+      return
+    self.__stop.clear()
+    self.__watchdog = threading.Thread(target=self.__watch, name="listener-pool-watchdog", daemon=True)
+    self.__watchdog.start()
+
+  def shutdown(self):
+    self.__stop.set()
+    self.listener_executor.shutdown(wait=False)
+    self.heavy_executor.shutdown(wait=False)
+
+  # 메트릭 조회 함수
+  def stats(self) -> dict:
+    with self.__lock:
+      timed_out = dict(self.__timed_out)
+    return {
+      "listener": self.listener_executor.stats(),
+      "heavy": self.heavy_executor.stats(),
+      "timed_out": timed_out
+    }
+
+  def __run_with_deadline(self, p_func, p_timeout:float, p_on_timeout, p_kwargs:dict):
+    task_id = object()
+    with self.__lock:
+      self.__running[task_id] = (p_func.__name__, time.monotonic() + p_timeout, p_on_timeout, p_kwargs)
+    try:
+      return p_func(**p_kwargs)
+    except Exception as e:
+      logging.error(f"[listener_pool][{p_func.__name__}] {str(e)}")
+      raise
+    finally:
+      with self.__lock:
+        self.__running.pop(task_id, None)
+
+  # 마감 시간이 지난 작업을 찾아 타임아웃 처리 (스레드는 강제 종료할 수 없으므로 알림과 집계만 수행)
+  def __check_deadlines(self):
+    now = time.monotonic()
+    expired = []
+    with self.__lock:
+      for task_id, (name, deadline, on_timeout, kwargs) in list(self.__running.items()):
+        if deadline <= now:
+          self.__timed_out[name] = self.__timed_out.get(name, 0) + 1
+          self.__running[task_id] = (name, float("inf"), on_timeout, kwargs)
+          expired.append((name, on_timeout, kwargs))
+
+    for name, on_timeout, kwargs in expired:
+      logging.warning(f"[listener_pool][{name}] listener timed out")
+      if on_timeout:
+        try:
+          on_timeout(**kwargs)
+        except Exception as e:
+          logging.error(f"[listener_pool][{name}] timeout callback failed: {e}")
+
+  def __watch(self):
+    last_report = time.monotonic()
+    while not self.__stop.wait(0.5):
+      self.__check_deadlines()
+      if time.monotonic() - last_report >= self.metrics_interval:
+        last_report = time.monotonic()
+        logging.info(json.dumps({"type": "listener_pool_metrics", **self.stats()}))
@@ -1,25 +1,112 @@
+import os
 import json
+import time
 import logging
-import boto3
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from common.sns_slack import SlackAlarm
-from common.constant import ServiceType, SlackConfig
+from common.constant import ServiceType, MonitoringType, Severity
 from common.monitoring_details import MonitoringDetails
 from common.utils import format_error_message, put_monitoring_metrics
+from common.tracing import traced_handler
+from common.outbox import SlackOutbox, get_default_outbox
+from common.alert_history import flush_alert_history
+from common.latency import export_latency
+from common.routing import get_routing_table
+from common.message_blocks import MessageBlockBuilder
+from common.silences import get_silence_engine
+from common.batch_lifecycle import get_batch_tracker
+from common.slack_transport import prime_slack_connection
+from common.resilience import aws_client, bounded_timeout, deadline_handler
+from common.flood import ErrorSample, FloodSummary, get_flood_detector
+from common.fleet_sweep import get_fleet_sweep
+from common.thresholds import get_threshold_rules
+from common.events import (
+    BatchJobEvent, ErrorEvent, EventValidationError, MonitoringEvent, RagMetricsEvent, ScheduleEvent,
+    iter_error_events, iter_payloads, parse_events
+)
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# 슬랙 전송 대기 최대 시간 (초과 시 아웃박스에 남아 다음 호출에서 재시도)
+OUTBOX_FLUSH_TIMEOUT = float(os.environ.get('SLACK_OUTBOX_FLUSH_TIMEOUT', '3'))
+ERROR_TREND_HOURS = int(os.environ.get('ERROR_TREND_HOURS', '24'))
+# 에러 추이 결과를 기다리는 최대 시간(초, 알림은 먼저 전송하고 추이 답글만 생략)
+ERROR_TREND_TIMEOUT = float(os.environ.get('ERROR_TREND_TIMEOUT', '5'))
+
+# init 단계에서 slack.com 연결을 미리 열어 첫 호출의 DNS / TLS 비용 제거 (SLACK_PRIME_CONNECTION)
+prime_slack_connection()
+
 class LambdaMonitoringHandler:
     """Lambda 모니터링 핸들러"""
     
     def __init__(self):
-        self.cloudwatch = boto3.client('cloudwatch')
+        self.cloudwatch = aws_client('cloudwatch')
         
     def setup_monitoring(self, service_type: ServiceType) -> MonitoringDetails:
         """모니터링 설정 초기화"""
         return MonitoringDetails(service_type=service_type)
 
+    def resolve_channels(self, event: MonitoringEvent, service_type: ServiceType,
+                         monitoring_type: MonitoringType, default_severity: Severity) -> List[str]:
+        """라우팅 테이블로 알림 채널 조회"""
+        return get_routing_table().resolve(service_type, monitoring_type, event.severity or default_severity,
+                                           event.labels)
+
+    def check_silenced(self, event: MonitoringEvent, service_type: ServiceType,
+                       monitoring_type: MonitoringType, default_severity: Severity,
+                       **labels: str) -> bool:
+        """무음 규칙에 해당하면 무음 처리 건수를 기록하고 True 반환"""
+        alert_labels = {
+            'service': service_type.name,
+            'monitoring_type': monitoring_type.name,
+            'severity': (event.severity or default_severity).name,
+            **(event.labels or {}),
+            **{k: str(v) for k, v in labels.items() if v is not None}
+        }
+        silence = get_silence_engine().suppress(alert_labels)
+        if not silence:
+            return False
+
+        put_monitoring_metrics(
+            namespace="Monitoring/Silences",
+            metric_name="SuppressedAlerts",
+            value=1.0,
+            dimensions=[
+                {'Name': 'Service', 'Value': service_type.name},
+                {'Name': 'MonitoringType', 'Value': monitoring_type.name}
+            ]
+        )
+        return True
+
+    def send_flood_summaries(self, summaries: List[FloodSummary], outbox: SlackOutbox) -> None:
+        """에러 폭주 요약을 서비스의 에러 알림 채널로 전송"""
+        for summary in summaries:
+            service_type = ServiceType[summary.service]
+            monitoring_details = self.setup_monitoring(service_type)
+            for channel in get_routing_table().resolve(service_type, MonitoringType.ERROR, Severity.ERROR):
+                SlackAlarm(channel=channel, monitoring_details=monitoring_details, outbox=outbox).send_flood_summary(
+                    service_type=service_type,
+                    summary=summary,
+                    idempotency_key=f"flood:{summary.service}:{summary.phase}:{summary.period_end:.0f}:{channel}"
+                )
+
+    def idempotency_key(self, context: Any, kind: str, fallback: str,
+                        event_id: Optional[str] = None) -> str:
+        """알림 멱등성 키 생성 (레코드별 id, 없으면 비동기 재시도 시 동일한 request id 사용)"""
+        request_id = getattr(context, 'aws_request_id', None)
+        return f"{kind}:{event_id or request_id or fallback}"
+
+    def handle_results(self, results: List[str]) -> Dict[str, Any]:
+        """레코드별 처리 결과를 응답 하나로 합침 (같은 결과는 건수로 표시)"""
+        if len(results) == 1:
+            return self.handle_response(results[0])
+        counts: Dict[str, int] = {}
+        for result in results:
+            counts[result] = counts.get(result, 0) + 1
+        return self.handle_response(", ".join(f"{result} ({count})" for result, count in counts.items())
+                                    or 'No events processed')
+
     def handle_response(self, message: str) -> Dict[str, Any]:
         """Lambda 응답 생성"""
         return {
@@ -29,93 +116,276 @@ class LambdaMonitoringHandler:
             })
         }
 
-def handle_error(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """에러 알림 처리"""
-    try:
-        handler = LambdaMonitoringHandler()
-        service_type = ServiceType[event['service_type']]
-        error_msg = event['error_msg']
-        error_id = event.get('error_id')
-        log_group = event.get('log_group', service_type.value.log_group)
+def process_error(handler: LambdaMonitoringHandler, error: ErrorEvent, context: Any) -> str:
+    """에러 1건 알림 처리"""
+    service_type = error.service_type
 
-        # 에러 메시지 포맷팅
-        formatted_error = format_error_message(
-            service_type=service_type,
-            error_msg=error_msg,
-            error_id=error_id
-        )
+    # 에러 메시지 포맷팅
+    formatted_error = format_error_message(
+        service_type=service_type,
+        error_msg=error.error_msg,
+        error_id=error.error_id
+    )
 
-        # 메트릭 기록
-        put_monitoring_metrics(
-            namespace="Monitoring/Errors",
-            metric_name="ErrorCount",
-            value=1.0,
-            dimensions=[
-                {'Name': 'Service', 'Value': service_type.name},
-                {'Name': 'ErrorType', 'Value': 'Application'}
-            ]
+    # 메트릭 기록
+    put_monitoring_metrics(
+        namespace="Monitoring/Errors",
+        metric_name="ErrorCount",
+        value=1.0,
+        dimensions=[
+            {'Name': 'Service', 'Value': service_type.name},
+            {'Name': 'ErrorType', 'Value': 'Application'}
+        ]
+    )
+
+    # 무음 규칙 (배포 등 예정된 작업 구간) 에 해당하면 전송하지 않음
+    if handler.check_silenced(error, service_type, MonitoringType.ERROR, Severity.ERROR,
+                              log_group=error.log_group):
+        return 'Error notification silenced'
+
+    # 서비스별 에러 발생률이 임계값을 넘으면 개별 알림 대신 표본과 건수를 주기적으로 요약
+    flood = get_flood_detector().observe(service_type.name, ErrorSample(
+        at=time.time(), error_id=formatted_error['error_id'], message=error.error_msg, log_group=error.log_group
+    ))
+    if flood.summaries:
+        outbox = get_default_outbox()
+        handler.send_flood_summaries(flood.summaries, outbox)
+        outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+    if flood.absorbed:
+        return 'Error notification absorbed by flood mode'
+
+    # 에러 추이 집계 쿼리는 알림 전송과 동시에 서버에서 실행
+    monitoring_details = handler.setup_monitoring(service_type)
+    trend_query = []
+    if ERROR_TREND_HOURS > 0:
+        first_line = error.error_msg.split('\n', 1)[0][:200]
+        trend_query = monitoring_details.start_error_trend(
+            pattern=f"ERROR {service_type.name} {first_line}",
+            log_groups=sorted({error.log_group, service_type.value.log_group}),
+            hours=ERROR_TREND_HOURS
         )
 
-        # 슬랙 알림 전송
+    # 슬랙 알림 전송 (라우팅 규칙에 해당하는 모든 채널)
+    outbox = get_default_outbox()
+    channels = handler.resolve_channels(error, service_type, MonitoringType.ERROR, Severity.ERROR)
+    slack_alarms = []
+    for channel in channels:
         slack_alarm = SlackAlarm(
-            channel=SlackConfig.CHANNELS['ERROR'][0],
-            monitoring_details=handler.setup_monitoring(service_type)
+            channel=channel,
+            monitoring_details=monitoring_details,
+            outbox=outbox
         )
-        
+
         slack_alarm.send_error_alert(
             service_type=service_type,
             error_msg=formatted_error['error'],
             error_id=formatted_error['error_id'],
-            log_group=log_group
+            log_group=error.log_group,
+            idempotency_key=handler.idempotency_key(context, f"error:{channel}", formatted_error['error_id'],
+                                                    error.event_id),
+            region=error.region,
+            source_time=error.source_time,
+            # 관련 배치 작업 / 파이프라인이 있으면 인시던트 컨텍스트에서 함께 조회
+            related=error.related
         )
-        
-        return handler.handle_response('Error notification sent successfully')
-        
-    except KeyError as ke:
-        logger.error(f"Invalid event format: {ke}")
-        raise Exception(f"Invalid event format: {ke}")
+        slack_alarms.append(slack_alarm)
+    outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+
+    # 에러 추이를 알림 스레드에 답글로 전송
+    trend_blocks = MessageBlockBuilder.create_error_trend_blocks(
+        monitoring_details.get_error_trend(trend_query, ERROR_TREND_TIMEOUT)
+    )
+    if trend_blocks:
+        for slack_alarm in slack_alarms:
+            slack_alarm.send_thread_reply(
+                blocks=trend_blocks,
+                text="에러 발생 추이",
+                idempotency_key=f"{slack_alarm.thread_key or slack_alarm.thread_ts}:trend"
+            )
+        outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+
+    return 'Error notification sent successfully'
+
+def process_batch_status(handler: LambdaMonitoringHandler, job: BatchJobEvent) -> str:
+    """Batch 작업 상태 변경 1건 처리 (작업별 메시지 1개를 상태 전이마다 수정)"""
+    severity = Severity.ERROR if job.failed else Severity.INFO
+    if handler.check_silenced(job, job.service_type, MonitoringType.BATCH, severity,
+                              job_name=job.job_name, job_queue=job.job_queue):
+        return 'Batch status notification silenced'
+
+    outbox = get_default_outbox()
+    tracker = get_batch_tracker(outbox)
+    channels = handler.resolve_channels(job, job.service_type, MonitoringType.BATCH, severity)
+    results = [tracker.track(channel, job.service_type, job.detail, region=job.region,
+                             source_time=job.source_time)
+               for channel in channels]
+    # 에러가 멈춰 handle_error 가 호출되지 않아도 폭주 요약 / 종료 알림이 나가도록 여기서도 확인
+    handler.send_flood_summaries(get_flood_detector().due(), outbox)
+    outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+
+    return f"Batch status processed: {', '.join(results)}"
+
+def process_rag_metrics(handler: LambdaMonitoringHandler, rag: RagMetricsEvent, context: Any) -> str:
+    """RAG 파이프라인 성능 지표 1건 처리"""
+    service_type = rag.service_type
+
+    # 서비스 / 파이프라인별 임계값 규칙으로 모든 지표를 비교해 알림 대상 지표가 미달인 경우 알림 전송
+    metrics = rag.metrics
+    result = get_threshold_rules().evaluate(MonitoringType.RAG, service_type, metrics, rag.pipeline_id)
+    if not result.alert:
+        return 'RAG metrics processed successfully'
+    if handler.check_silenced(rag, service_type, MonitoringType.RAG, Severity.WARNING,
+                              pipeline_id=rag.pipeline_id):
+        return 'RAG performance alert silenced'
+
+    outbox = get_default_outbox()
+    monitoring_details = handler.setup_monitoring(service_type)
+    channels = handler.resolve_channels(rag, service_type, MonitoringType.RAG, Severity.WARNING)
+    for channel in channels:
+        slack_alarm = SlackAlarm(
+            channel=channel,
+            monitoring_details=monitoring_details,
+            outbox=outbox
+        )
+
+        slack_alarm.send_rag_performance(
+            service_type=service_type,
+            accuracy=rag.accuracy,
+            threshold=result.thresholds.get('accuracy', service_type.value.threshold),
+            pipeline_id=rag.pipeline_id,
+            idempotency_key=handler.idempotency_key(context, f"rag:{channel}", rag.pipeline_id, rag.event_id),
+            source_time=rag.source_time,
+            # 이벤트에 없는 지표는 0 으로 판단하지만 메시지에는 보고된 지표만 표시
+            breaches=[breach for breach in result.breaches if breach.metric in metrics]
+        )
+    outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+
+    # 메트릭 기록
+    put_monitoring_metrics(
+        namespace="Monitoring/RAG",
+        metric_name="PerformanceAlert",
+        value=1.0,
+        dimensions=[
+            {'Name': 'Service', 'Value': service_type.name},
+            {'Name': 'MetricType', 'Value': 'Accuracy'}
+        ]
+    )
+    return 'RAG metrics processed successfully'
+
+def process_fleet_sweep(handler: LambdaMonitoringHandler) -> str:
+    """전체 서비스 상태 점검 (상태가 바뀐 서비스만 알림)"""
+    result = get_fleet_sweep().sweep()
+
+    outbox = get_default_outbox()
+    for change in result.changes:
+        service_type = ServiceType[change.service]
+        severity = Severity.ERROR if change.state == "ALERT" else Severity.INFO
+        monitoring_details = handler.setup_monitoring(service_type)
+        for channel in get_routing_table().resolve(service_type, MonitoringType.ERROR, severity):
+            SlackAlarm(channel=channel, monitoring_details=monitoring_details, outbox=outbox).send_fleet_status(
+                service_type=service_type,
+                change=change,
+                idempotency_key=f"fleet:{change.service}:{change.period_end:.0f}:{channel}"
+            )
+    # 에러가 멈춘 서비스의 폭주 요약 / 종료 알림도 함께 전송
+    handler.send_flood_summaries(get_flood_detector().due(), outbox)
+    outbox.flush(bounded_timeout(OUTBOX_FLUSH_TIMEOUT))
+
+    return f"Fleet sweep: {result.queries} queries, {len(result.changes)} state changes"
+
+@traced_handler
+@flush_alert_history
+@deadline_handler
+@export_latency
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """MonitoringFunction 진입점 (SNS / EventBridge / 로그 구독 / 스케줄 이벤트를 종류별로 처리)"""
+    try:
+        monitoring = LambdaMonitoringHandler()
+        results = []
+        for parsed in parse_events(event):
+            if isinstance(parsed, ErrorEvent):
+                results.append(process_error(monitoring, parsed, context))
+            elif isinstance(parsed, BatchJobEvent):
+                results.append(process_batch_status(monitoring, parsed))
+            elif isinstance(parsed, RagMetricsEvent):
+                results.append(process_rag_metrics(monitoring, parsed, context))
+            elif isinstance(parsed, ScheduleEvent):
+                results.append(process_fleet_sweep(monitoring))
+        return monitoring.handle_results(results)
+
+    except EventValidationError as e:
+        logger.error(str(e))
+        raise
+    except Exception as e:
+        logger.error(f"Error in handler: {str(e)}")
+        raise
+
+@traced_handler
+@flush_alert_history
+@deadline_handler
+@export_latency
+def handle_error(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """에러 알림 처리 (직접 호출, SNS 알람 레코드, 로그 구독 이벤트)"""
+    try:
+        handler = LambdaMonitoringHandler()
+        # 레코드를 하나씩 파싱하며 처리 (레코드가 많아도 파싱된 이벤트는 1건만 유지)
+        return handler.handle_results([process_error(handler, error, context)
+                                       for error in iter_error_events(event)])
+
+    except EventValidationError as e:
+        logger.error(str(e))
+        raise
     except Exception as e:
         logger.error(f"Error in handle_error: {str(e)}")
         raise
 
+@traced_handler
+@flush_alert_history
+@deadline_handler
+@export_latency
+def handle_batch_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Batch 작업 상태 변경 처리 (SNS 토픽을 거친 EventBridge 이벤트면 레코드별로 처리)"""
+    try:
+        handler = LambdaMonitoringHandler()
+        return handler.handle_results([process_batch_status(handler, BatchJobEvent.parse(payload, envelope))
+                                       for payload, envelope in iter_payloads(event)])
+
+    except EventValidationError as e:
+        logger.error(str(e))
+        raise
+    except Exception as e:
+        logger.error(f"Error in handle_batch_status: {str(e)}")
+        raise
+
+@traced_handler
+@flush_alert_history
+@deadline_handler
+@export_latency
 def handle_rag_metrics(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Kubeflow RAG 파이프라인 성능 지표 처리"""
     try:
         handler = LambdaMonitoringHandler()
-        pipeline_id = event['pipeline_id']
-        metrics = event['metrics']
-        service_type = ServiceType.DEV  # 기본값으로 DEV 환경 설정
-        
-        # 성능 지표가 임계값 미달인 경우 알림 전송
-        if metrics['accuracy'] < service_type.value.threshold:
-            slack_alarm = SlackAlarm(
-                channel=SlackConfig.CHANNELS['ALARM'][0],
-                monitoring_details=handler.setup_monitoring(service_type)
-            )
-            
-            slack_alarm.send_rag_performance(
-                service_type=service_type,
-                accuracy=metrics['accuracy'],
-                threshold=service_type.value.threshold,
-                pipeline_id=pipeline_id
-            )
+        return handler.handle_results([process_rag_metrics(handler, RagMetricsEvent.parse(payload, envelope),
+                                                           context)
+                                       for payload, envelope in iter_payloads(event)])
 
-            # 메트릭 기록
-            put_monitoring_metrics(
-                namespace="Monitoring/RAG",
-                metric_name="PerformanceAlert",
-                value=1.0,
-                dimensions=[
-                    {'Name': 'Service', 'Value': service_type.name},
-                    {'Name': 'MetricType', 'Value': 'Accuracy'}
-                ]
-            )
-        
-        return handler.handle_response('RAG metrics processed successfully')
-        
-    except KeyError as ke:
-        logger.error(f"Invalid event format: {ke}")
-        raise Exception(f"Invalid event format: {ke}")
+    except EventValidationError as e:
+        logger.error(str(e))
+        raise
     except Exception as e:
         logger.error(f"Error in handle_rag_metrics: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+@traced_handler
+@flush_alert_history
+@deadline_handler
+@export_latency
+def handle_fleet_sweep(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """정기 스케줄 (rate(5 minutes)) 전체 서비스 상태 점검 (상태가 바뀐 서비스만 알림)"""
+    try:
+        handler = LambdaMonitoringHandler()
+        return handler.handle_response(process_fleet_sweep(handler))
+
+    except Exception as e:
+        logger.error(f"Error in handle_fleet_sweep: {str(e)}")
+        raise
@@ -0,0 +1,402 @@
+import os
+import re
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from importlib.util import find_spec
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .local_store import state_path
+from .tracing import span
+
+# pyarrow 는 이력을 처음 기록 / 조회할 때 import (모듈 import 시 콜드 스타트가 약 200~290ms 늘어남)
+# pyarrow 가 없는 환경에서는 이력 기록 / 조회를 건너뜀
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+pa = ds = pafs = pq = None
+
+def _import_pyarrow() -> None:
+    global pa, ds, pafs, pq
+    if pq is None:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.fs as pafs
+        import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# 파티션 컬럼 (디렉터리 이름 date=YYYY-MM-DD/service=PROD, 파일에는 저장하지 않음)
+PARTITION_COLUMNS = ("date", "service")
+# 조회 / 집계에 쓸 수 있는 컬럼
+GROUP_COLUMNS = ("date", "service", "alert_type", "channel")
+# /alerts 명령의 필터 별칭
+FILTER_ALIASES = {"type": "alert_type", "alert_type": "alert_type", "service": "service", "channel": "channel"}
+DEFAULT_GROUP_BY = ("service", "alert_type")
+MAX_QUERY_HOURS = 24 * 90
+# part 파일은 기록 시각의 정시 구간이 끝나고 이 시간(초)이 지나면 (더 이상 추가되지 않으면) 구간별로 병합
+COMPACT_GRACE = 300
+# 조회 중 병합으로 파일이 지워졌을 때 목록을 다시 읽는 횟수
+QUERY_ATTEMPTS = 3
+PART_FILE = re.compile(r'part-(\d+)-[0-9a-f]+\.parquet')
+COMPACT_FILE = re.compile(r'compact-(\d{10})\.parquet')
+
+@dataclass
+class AlertRecord:
+    sent_at: float  # 슬랙 메시지 생성 시각 (epoch 초)
+    service: str
+    alert_type: str
+    channel: str
+    key: str
+    summary: str = ""
+    latency_ms: Optional[float] = None
+
+@dataclass
+class AlertQuery:
+    hours: int = 24
+    filters: Dict[str, List[str]] = field(default_factory=dict)
+    group_by: Tuple[str, ...] = DEFAULT_GROUP_BY
+    limit: int = 20
+
+    @classmethod
+    def parse(cls, text: str) -> 'AlertQuery':
+        """'7d service=PROD,DEV type=ERROR by date,service' 형식의 조회 조건 파싱"""
+        query = cls()
+        tokens = (text or "").split()
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            window = re.fullmatch(r'(\d+)([hd])', token)
+            if window:
+                hours = int(window.group(1)) * (24 if window.group(2) == 'd' else 1)
+                query.hours = max(1, min(hours, MAX_QUERY_HOURS))
+            elif '=' in token:
+                name, _, values = token.partition('=')
+                column = FILTER_ALIASES.get(name.lower())
+                if column is None:
+                    raise ValueError(f"알 수 없는 필터: {name}")
+                query.filters[column] = [value.upper() if column != "channel" else value
+                                         for value in values.split(',') if value]
+            elif token.lower() == 'by' and i + 1 < len(tokens):
+                i += 1
+                group_by = tuple(column.strip() for column in tokens[i].split(',') if column.strip())
+                unknown = [column for column in group_by if column not in GROUP_COLUMNS]
+                if unknown:
+                    raise ValueError(f"집계할 수 없는 컬럼: {', '.join(unknown)}")
+                query.group_by = group_by
+            else:
+                raise ValueError(f"알 수 없는 조건: {token}")
+            i += 1
+        return query
+
+@dataclass
+class AlertQueryResult:
+    rows: List[Dict[str, Any]]  # group_by 컬럼 값과 count
+    total: int
+    files: int
+    elapsed: float
+
+class AlertHistory:
+    """전송한 알림의 컬럼형 이력 (날짜 / 서비스별 Parquet 파티션, 마감된 시간대의 part 파일은 하나로 병합)
+
+    root 는 로컬 경로 또는 s3://버킷/경로 (ALERT_HISTORY_DIR). 기본값 /tmp 는 컨테이너마다 따로 쌓이므로
+    여러 컨테이너의 알림을 함께 조회하려면 공유 경로 (S3) 를 지정해야 함.
+
+    버퍼는 호출이 끝날 때마다 기록하므로 알림을 보낸 호출마다 파티션당 작은 파일 (S3 PUT) 1개가 생김.
+    마감된 시간대는 그 파티션에 다음 기록이 있을 때 part 파일이 compact_files 개 이상이면 하나로 병합하므로
+    조회가 읽는 파일 수는 파티션당 시간대별 1개 + 마감 전 시간대의 part 파일 수로 유지됨.
+    """
+
+    def __init__(self, root: Optional[str] = None, flush_rows: int = 500, flush_interval: float = 60.0,
+                 compact_files: int = 2):
+        self.root = root or os.environ.get('ALERT_HISTORY_DIR') or state_path('alert_history')
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_files = compact_files
+        self._buffer: List[AlertRecord] = []
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._location: Optional[Tuple['pafs.FileSystem', str]] = None
+        self._compacted_hours: Dict[str, int] = {}
+
+    @property
+    def available(self) -> bool:
+        return PYARROW_AVAILABLE
+
+    def _resolve(self) -> Tuple['pafs.FileSystem', str]:
+        """root 의 파일 시스템과 그 안의 기준 경로 (S3 는 처음 사용할 때 연결)"""
+        if self._location is None:
+            _import_pyarrow()
+            if "://" in self.root:
+                self._location = pafs.FileSystem.from_uri(self.root)
+            else:
+                self._location = (pafs.LocalFileSystem(), os.path.abspath(self.root))
+        return self._location
+
+    @property
+    def filesystem(self) -> 'pafs.FileSystem':
+        return self._resolve()[0]
+
+    @property
+    def base(self) -> str:
+        return self._resolve()[1]
+
+    @property
+    def local(self) -> bool:
+        return isinstance(self.filesystem, pafs.LocalFileSystem)
+
+    @staticmethod
+    def schema() -> 'pa.Schema':
+        _import_pyarrow()
+        return pa.schema([
+            ("sent_at", pa.timestamp("ms", tz="UTC")),
+            ("alert_type", pa.string()),
+            ("channel", pa.string()),
+            ("key", pa.string()),
+            ("summary", pa.string()),
+            ("latency_ms", pa.float64())
+        ])
+
+    def append(self, record: AlertRecord) -> None:
+        if not self.available:
+            return
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def maybe_flush(self) -> bool:
+        if time.monotonic() - self._flushed_at < self.flush_interval:
+            return False
+        self.flush()
+        return True
+
+    def flush(self) -> int:
+        """버퍼의 알림을 파티션별 새 파일로 기록 (마감된 시간대가 생긴 파티션은 병합)"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._flushed_at = time.monotonic()
+        if not records or not self.available:
+            return 0
+
+        partitions: Dict[Tuple[str, str], List[AlertRecord]] = {}
+        for record in records:
+            date = datetime.fromtimestamp(record.sent_at, timezone.utc).strftime('%Y-%m-%d')
+            partitions.setdefault((date, record.service), []).append(record)
+
+        try:
+            _import_pyarrow()
+            with span('alert_history.flush', rows=len(records)):
+                for (date, service), rows in partitions.items():
+                    directory = self._partition_dir(date, service)
+                    self._write(directory, f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet",
+                                self._to_table(rows))
+                    # 병합할 수 있는 건 마감된 시간대뿐이므로 파티션마다 시간대가 마감될 때 한 번만 확인
+                    closed_hour = int((time.time() - COMPACT_GRACE) // 3600)
+                    if self._compacted_hours.get(directory) != closed_hour:
+                        self._compacted_hours[directory] = closed_hour
+                        self.compact(directory)
+        except Exception as e:
+            logger.error(f"Failed to write alert history: {str(e)}")
+        return len(records)
+
+    def compact(self, directory: str, now: Optional[float] = None) -> int:
+        """마감된 시간대의 part 파일이 compact_files 개 이상이면 compact 파일 하나로 병합 (병합한 part 파일 수 반환)
+
+        병합 파일 이름이 시간대로 정해져 있어 여러 컨테이너가 동시에 병합해도 같은 내용을 같은 이름으로 쓰고,
+        병합 파일을 완전히 기록한 뒤에 part 파일을 지움 (조회는 병합 파일이 있는 시간대의 part 파일을 건너뜀).
+        """
+        _import_pyarrow()
+        now = now or time.time()
+        files = self._data_files(directory)
+        compacted = {match.group(1) for match in map(COMPACT_FILE.fullmatch, map(os.path.basename, files))
+                     if match}
+        by_hour: Dict[str, List[str]] = {}
+        for path in files:
+            match = PART_FILE.fullmatch(os.path.basename(path))
+            if not match:
+                continue
+            written_at = int(match.group(1)) / 1000
+            if written_at // 3600 * 3600 + 3600 + COMPACT_GRACE > now:
+                continue  # 아직 part 파일이 추가될 수 있는 시간대
+            by_hour.setdefault(time.strftime('%Y%m%d%H', time.gmtime(written_at)), []).append(path)
+
+        merged = 0
+        for hour, parts in by_hour.items():
+            if hour not in compacted:
+                if len(parts) < max(self.compact_files, 2):
+                    continue
+                try:
+                    with span('alert_history.compact', files=len(parts)):
+                        table = pa.concat_tables([pq.read_table(path, schema=self.schema(),
+                                                                filesystem=self.filesystem)
+                                                  for path in parts])
+                        self._write(directory, f"compact-{hour}.parquet", table.sort_by("sent_at"))
+                except FileNotFoundError:
+                    continue  # 다른 쪽이 이미 병합하고 part 파일을 지우는 중
+            # 병합 파일에 모두 포함된 part 파일 삭제 (다른 쪽이 먼저 지운 파일은 무시)
+            for path in parts:
+                try:
+                    self.filesystem.delete_file(path)
+                except FileNotFoundError:
+                    pass
+            merged += len(parts)
+        return merged
+
+    def query(self, query: AlertQuery, now: Optional[float] = None) -> AlertQueryResult:
+        """기간 / 필터 조건의 알림 건수 집계 (기간 밖 날짜와 필터 밖 서비스 파티션은 읽지 않음)"""
+        if not self.available:
+            raise RuntimeError("pyarrow is not installed")
+        _import_pyarrow()
+        self.flush()
+        started_at = time.monotonic()
+        end = datetime.fromtimestamp(now or time.time(), timezone.utc)
+        start = end - timedelta(hours=query.hours)
+
+        expression = ((ds.field("date") >= start.strftime('%Y-%m-%d'))
+                      & (ds.field("date") <= end.strftime('%Y-%m-%d'))
+                      & (ds.field("sent_at") >= pa.scalar(start, type=pa.timestamp("ms", tz="UTC")))
+                      & (ds.field("sent_at") <= pa.scalar(end, type=pa.timestamp("ms", tz="UTC"))))
+        for column, values in query.filters.items():
+            expression = expression & ds.field(column).isin(values)
+
+        with span('alert_history.query', hours=query.hours):
+            for attempt in range(QUERY_ATTEMPTS):
+                files = self._query_files(start, end, query.filters.get("service"))
+                if not files:
+                    return AlertQueryResult(rows=[], total=0, files=0, elapsed=0.0)
+                try:
+                    dataset = ds.dataset(files, filesystem=self.filesystem, format="parquet",
+                                         schema=self._dataset_schema(),
+                                         partitioning=ds.partitioning(self._partition_schema(), flavor="hive"),
+                                         partition_base_dir=self.base)
+                    fragments = list(dataset.get_fragments(filter=expression))
+                    # 집계에 필요한 컬럼만 읽음 (기간 필터용 sent_at 포함)
+                    table = dataset.to_table(columns=list(dict.fromkeys([*query.group_by, "sent_at"])),
+                                             filter=expression)
+                    break
+                except FileNotFoundError:
+                    # 목록을 읽은 뒤 병합으로 지워진 part 파일 (병합 파일이 생겼으므로 목록을 다시 읽음)
+                    if attempt == QUERY_ATTEMPTS - 1:
+                        raise
+            if query.group_by:
+                grouped = table.group_by(list(query.group_by)).aggregate([("sent_at", "count")])
+                grouped = grouped.rename_columns(["count" if name == "sent_at_count" else name
+                                                  for name in grouped.column_names])
+                grouped = grouped.sort_by([("count", "descending")])
+                rows = grouped.slice(0, query.limit).to_pylist()
+            else:
+                rows = [{"count": table.num_rows}]
+        return AlertQueryResult(rows=rows, total=table.num_rows, files=len(fragments),
+                                elapsed=time.monotonic() - started_at)
+
+    def _query_files(self, start: datetime, end: datetime, services: Optional[List[str]]) -> List[str]:
+        """기간에 해당하는 날짜 (서비스 필터가 있으면 해당 서비스) 파티션의 조회 대상 파일"""
+        files = []
+        day = start.date()
+        while day <= end.date():
+            date_dir = f"{self.base}/date={day.strftime('%Y-%m-%d')}"
+            if services:
+                directories = [f"{date_dir}/service={service}" for service in services]
+            else:
+                directories = [info.path for info in self.filesystem.get_file_info(
+                    pafs.FileSelector(date_dir, allow_not_found=True)) if info.type == pafs.FileType.Directory]
+            for directory in directories:
+                files.extend(self._live_files(directory))
+            day += timedelta(days=1)
+        return files
+
+    def _live_files(self, directory: str) -> List[str]:
+        """병합 파일이 있는 시간대의 part 파일 (삭제 대기 중인 파일) 을 뺀 데이터 파일"""
+        files = self._data_files(directory)
+        compacted = {match.group(1) for match in map(COMPACT_FILE.fullmatch, map(os.path.basename, files))
+                     if match}
+        if not compacted:
+            return files
+        live = []
+        for path in files:
+            match = PART_FILE.fullmatch(os.path.basename(path))
+            if match and time.strftime('%Y%m%d%H', time.gmtime(int(match.group(1)) / 1000)) in compacted:
+                continue
+            live.append(path)
+        return live
+
+    def _to_table(self, records: List[AlertRecord]) -> 'pa.Table':
+        return pa.Table.from_pydict({
+            "sent_at": [int(record.sent_at * 1000) for record in records],
+            "alert_type": [record.alert_type for record in records],
+            "channel": [record.channel for record in records],
+            "key": [record.key for record in records],
+            "summary": [record.summary[:200] for record in records],
+            "latency_ms": [record.latency_ms for record in records]
+        }, schema=self.schema())
+
+    def _partition_schema(self) -> 'pa.Schema':
+        return pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+
+    def _dataset_schema(self) -> 'pa.Schema':
+        return pa.unify_schemas([self.schema(), self._partition_schema()])
+
+    def _partition_dir(self, date: str, service: str) -> str:
+        directory = f"{self.base}/date={date}/service={service}"
+        if self.local:
+            self.filesystem.create_dir(directory, recursive=True)
+        return directory
+
+    def _data_files(self, directory: str) -> List[str]:
+        infos = self.filesystem.get_file_info(pafs.FileSelector(directory, allow_not_found=True))
+        return sorted(info.path for info in infos
+                      if info.type == pafs.FileType.File and info.base_name.endswith(".parquet")
+                      and not info.base_name.startswith("."))
+
+    def _write(self, directory: str, filename: str, table: 'pa.Table') -> None:
+        path = f"{directory}/{filename}"
+        if not self.local:
+            # S3 객체는 업로드가 끝나야 조회되므로 바로 기록
+            pq.write_table(table, path, filesystem=self.filesystem, compression="zstd")
+            return
+        # 조회 중인 프로세스가 쓰다 만 파일을 읽지 않도록 임시 이름으로 쓴 뒤 교체
+        temp_path = f"{directory}/.{filename}.{uuid.uuid4().hex[:8]}.tmp"
+        pq.write_table(table, temp_path, filesystem=self.filesystem, compression="zstd")
+        os.replace(temp_path, path)
+
+def record_from_message(service: str, alert_type: str, channel: str, key: str, sent_at: float,
+                        blocks: Optional[List[Dict[str, Any]]] = None, text: Optional[str] = None,
+                        source_time: Optional[float] = None) -> AlertRecord:
+    """전송한 메시지로 이력 레코드 생성 (요약은 text, 없으면 header 블록 텍스트)"""
+    summary = text or next((block.get("text", {}).get("text", "") for block in blocks or []
+                            if block.get("type") == "header"), "")
+    latency_ms = max((sent_at - source_time) * 1000, 0.0) if source_time is not None else None
+    return AlertRecord(sent_at=sent_at, service=service, alert_type=alert_type, channel=channel,
+                       key=key, summary=summary, latency_ms=latency_ms)
+
+_history: Optional[AlertHistory] = None
+_history_lock = threading.Lock()
+
+def get_alert_history() -> AlertHistory:
+    """컨테이너 공용 알림 이력"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = AlertHistory(
+                flush_rows=int(os.environ.get('ALERT_HISTORY_FLUSH_ROWS', '500')),
+                flush_interval=float(os.environ.get('ALERT_HISTORY_FLUSH_INTERVAL', '60')),
+                compact_files=int(os.environ.get('ALERT_HISTORY_COMPACT_FILES', '2'))
+            )
+            if not _history.available:
+                logger.warning("pyarrow is not installed, alert history is disabled")
+        return _history
+
+def flush_alert_history(func: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """핸들러가 끝날 때 (예외 포함) 이력 버퍼를 기록 (버퍼는 컨테이너 메모리에만 있어 회수되면 유실)"""
+
+    @wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        try:
+            return func(event, context)
+        finally:
+            get_alert_history().flush()
+
+    return wrapper
@@ -0,0 +1,288 @@
+import os
+import time
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from .constant import MonitoringType, ServiceType
+from .local_store import SQLiteStore
+from .message_blocks import MessageBlockBuilder
+from .outbox import OutboxMessage, SlackOutbox
+from .resilience import aws_client
+from .run_history import PhaseComparison, RunHistory, get_run_history, run_durations
+from .thresholds import ThresholdBreach, ThresholdRules, batch_metrics, get_threshold_rules
+
+# Batch 작업 상태 진행 순서 (EventBridge 이벤트는 순서가 보장되지 않으므로 뒤로 가는 전이는 무시)
+STATUS_ORDER = {
+    "SUBMITTED": 0,
+    "PENDING": 1,
+    "RUNNABLE": 2,
+    "STARTING": 3,
+    "RUNNING": 4,
+    "SUCCEEDED": 5,
+    "FAILED": 5
+}
+
+def status_rank(status: str) -> int:
+    return STATUS_ORDER.get(status, 0)
+
+@dataclass
+class BatchJobRecord:
+    job_id: str
+    channel: str
+    job_name: str
+    status: str
+    message_key: str  # 최초 메시지의 아웃박스 키
+    ts: Optional[str] = None  # 최초 메시지 전송 후 기록되는 슬랙 메시지 ts
+    updated_at: float = 0.0
+
+class BatchJobStore(ABC):
+    """jobId -> 슬랙 메시지 매핑 저장소 인터페이스"""
+
+    @abstractmethod
+    def get(self, job_id: str, channel: str) -> Optional[BatchJobRecord]:
+        """작업의 채널별 메시지 기록 조회"""
+
+    @abstractmethod
+    def save(self, record: BatchJobRecord, create: bool = False) -> bool:
+        """기록 저장 (ts 가 없으면 이미 기록된 ts 유지)
+
+        create 이면 기록이 없을 때만, 아니면 저장된 상태보다 진행된 상태일 때만 저장하고
+        조건이 맞지 않으면 (다른 컨테이너가 먼저 기록) False 반환
+        """
+
+    @abstractmethod
+    def set_ts(self, job_id: str, channel: str, ts: str) -> None:
+        """최초 메시지 전송 후 슬랙 메시지 ts 기록"""
+
+class SQLiteBatchJobStore(SQLiteStore, BatchJobStore):
+    """컨테이너 로컬 SQLite 저장소 (단일 컨테이너 / 테스트용)"""
+
+    FILENAME = "batch_jobs.sqlite3"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            job_id TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            job_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            message_key TEXT NOT NULL,
+            ts TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (job_id, channel)
+        );
+        CREATE INDEX IF NOT EXISTS idx_batch_jobs_updated ON batch_jobs (updated_at);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or os.environ.get('BATCH_JOB_STORE_PATH'))
+
+    def get(self, job_id: str, channel: str) -> Optional[BatchJobRecord]:
+        row = self._execute("SELECT * FROM batch_jobs WHERE job_id = ? AND channel = ?",
+                            (job_id, channel)).fetchone()
+        return BatchJobRecord(**dict(row)) if row else None
+
+    def save(self, record: BatchJobRecord, create: bool = False) -> bool:
+        record.updated_at = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM batch_jobs WHERE job_id = ? AND channel = ?",
+                               (record.job_id, record.channel)).fetchone()
+            if row is not None and (create or status_rank(record.status) <= status_rank(row['status'])):
+                return False
+            conn.execute(
+                "INSERT INTO batch_jobs (job_id, channel, job_name, status, message_key, ts, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, channel) DO UPDATE SET status = excluded.status, "
+                "ts = COALESCE(excluded.ts, batch_jobs.ts), updated_at = excluded.updated_at",
+                (record.job_id, record.channel, record.job_name, record.status,
+                 record.message_key, record.ts, record.updated_at)
+            )
+        return True
+
+    def set_ts(self, job_id: str, channel: str, ts: str) -> None:
+        self._execute("UPDATE batch_jobs SET ts = ? WHERE job_id = ? AND channel = ?", (ts, job_id, channel))
+
+    def purge(self, older_than: float) -> int:
+        return self._execute("DELETE FROM batch_jobs WHERE updated_at < ?", (older_than,)).rowcount
+
+class DynamoBatchJobStore(BatchJobStore):
+    """여러 컨테이너가 공유하는 DynamoDB 저장소 (오래된 항목은 테이블 TTL 로 삭제)
+
+    테이블: 파티션 키 job_id (S), 정렬 키 channel (S), TTL 속성 expires_at
+    """
+
+    def __init__(self, table: str, ttl: Optional[float] = None):
+        self.table = table
+        self.ttl = ttl if ttl is not None else float(os.environ.get('BATCH_JOB_TTL', '604800'))
+        self._client = aws_client('dynamodb')
+
+    def get(self, job_id: str, channel: str) -> Optional[BatchJobRecord]:
+        item = self._client.get_item(
+            TableName=self.table,
+            Key={'job_id': {'S': job_id}, 'channel': {'S': channel}},
+            ConsistentRead=True
+        ).get('Item')
+        if not item:
+            return None
+        return BatchJobRecord(job_id=job_id, channel=channel, job_name=item['job_name']['S'],
+                              status=item['status']['S'], message_key=item['message_key']['S'],
+                              ts=item['ts']['S'] if 'ts' in item else None,
+                              updated_at=float(item['updated_at']['N']))
+
+    def save(self, record: BatchJobRecord, create: bool = False) -> bool:
+        record.updated_at = time.time()
+        values = {
+            ':job_name': {'S': record.job_name},
+            ':status': {'S': record.status},
+            ':rank': {'N': str(status_rank(record.status))},
+            ':message_key': {'S': record.message_key},
+            ':updated_at': {'N': str(record.updated_at)},
+            ':expires_at': {'N': str(int(record.updated_at + self.ttl))}
+        }
+        expression = ("SET job_name = :job_name, #status = :status, status_rank = :rank, "
+                      "message_key = :message_key, updated_at = :updated_at, expires_at = :expires_at")
+        if record.ts:
+            expression += ", ts = :ts"
+            values[':ts'] = {'S': record.ts}
+        # 읽은 뒤 무조건 쓰면 늦게 도착한 이전 상태가 진행된 상태를 덮어쓰므로 저장된 순위와 비교해 조건부 저장
+        # (status_rank 가 없는 이전 기록은 진행된 상태로 갱신 허용)
+        if create:
+            condition = "attribute_not_exists(job_id)"
+        else:
+            condition = "attribute_exists(job_id) AND (attribute_not_exists(status_rank) OR status_rank < :rank)"
+        try:
+            self._client.update_item(
+                TableName=self.table,
+                Key={'job_id': {'S': record.job_id}, 'channel': {'S': record.channel}},
+                UpdateExpression=expression,
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues=values
+            )
+            return True
+        except self._client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def set_ts(self, job_id: str, channel: str, ts: str) -> None:
+        self._client.update_item(
+            TableName=self.table,
+            Key={'job_id': {'S': job_id}, 'channel': {'S': channel}},
+            UpdateExpression="SET ts = :ts",
+            ExpressionAttributeValues={':ts': {'S': ts}}
+        )
+
+def create_batch_job_store() -> BatchJobStore:
+    """BATCH_JOB_TABLE 이 있으면 DynamoDB 공유 저장소, 없으면 로컬 SQLite 저장소"""
+    table = os.environ.get('BATCH_JOB_TABLE')
+    return DynamoBatchJobStore(table) if table else SQLiteBatchJobStore()
+
+class BatchLifecycleTracker:
+    """작업별 첫 이벤트는 새 메시지로, 이후 상태 전이는 같은 메시지 수정으로 전송"""
+
+    def __init__(self, outbox: SlackOutbox, store: Optional[BatchJobStore] = None,
+                 history: Optional[RunHistory] = None, thresholds: Optional[ThresholdRules] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.outbox = outbox
+        self.store = store or create_batch_job_store()
+        self.history = history or get_run_history()
+        self.thresholds = thresholds or get_threshold_rules()
+        self.outbox.add_delivery_listener(self._on_delivered)
+
+    def track(self, channel: str, service_type: ServiceType, detail: Dict[str, Any],
+              region: Optional[str] = None, source_time: Optional[float] = None) -> str:
+        """Batch Job State Change 이벤트 detail 처리 (posted / updated / ignored 반환)"""
+        job_id = detail['jobId']
+        status = detail['status']
+        # 순서가 뒤바뀐 / 중복 이벤트는 실행 이력과 임계값에 반영하기 전에 무시
+        record = self.store.get(job_id, channel)
+        if self._is_stale(record, status):
+            return "ignored"
+
+        blocks = MessageBlockBuilder.create_batch_blocks(
+            service_type=service_type,
+            job_name=detail['jobName'],
+            status=status,
+            job_id=job_id,
+            region=region,
+            created_at=detail.get('createdAt'),
+            started_at=detail.get('startedAt'),
+            stopped_at=detail.get('stoppedAt'),
+            status_reason=detail.get('statusReason'),
+            comparisons=self._compare_run(detail),
+            breaches=self._check_thresholds(service_type, detail)
+        )
+        text = f"배치 작업 {detail['jobName']}: {status}"
+        metadata = {'batch_job_id': job_id, 'batch_status': status}
+        labels = {'service': service_type.name, 'alert_type': MonitoringType.BATCH.name}
+
+        # 저장이 조건부이므로 같은 작업의 이벤트를 여러 컨테이너가 동시에 처리해도 한 곳만 전송
+        if record is None:
+            record = BatchJobRecord(job_id=job_id, channel=channel, job_name=detail['jobName'],
+                                    status=status, message_key=self.message_key(job_id, channel))
+            if self.store.save(record, create=True):
+                self.outbox.enqueue(key=record.message_key, channel=channel, blocks=blocks,
+                                    text=text, metadata=metadata, source_time=source_time, labels=labels)
+                return "posted"
+            # 다른 컨테이너가 최초 메시지를 먼저 기록했으면 그 메시지 수정으로 처리
+            record = self.store.get(job_id, channel)
+            if record is None or self._is_stale(record, status):
+                return "ignored"
+
+        record.status = status
+        if not self.store.save(record):
+            self.logger.info(f"Ignoring transition for {job_id} to {status}: a later status was saved concurrently")
+            return "ignored"
+        # ts 가 아직 없으면 (최초 메시지 전송 전) 아웃박스가 원본 전송 후 수정
+        self.outbox.enqueue_update(key=f"{record.message_key}:{status}", channel=channel,
+                                   blocks=blocks, text=text, ts=record.ts,
+                                   message_key=record.message_key, metadata=metadata,
+                                   source_time=source_time, labels=labels)
+        return "updated"
+
+    def _is_stale(self, record: Optional[BatchJobRecord], status: str) -> bool:
+        if record is None or status_rank(status) > status_rank(record.status):
+            return False
+        self.logger.info(f"Ignoring stale transition for {record.job_id}: {record.status} -> {status}")
+        return True
+
+    def _on_delivered(self, message: OutboxMessage, ts: str) -> None:
+        """작업의 최초 메시지가 전송되면 ts 를 저장 (다른 컨테이너도 같은 메시지를 수정)"""
+        job_id = message.metadata.get('batch_job_id')
+        if message.op != "post" or not job_id or message.key != self.message_key(job_id, message.channel):
+            return
+        self.store.set_ts(job_id, message.channel, ts)
+
+    def _compare_run(self, detail: Dict[str, Any]) -> Optional[List[PhaseComparison]]:
+        """종료된 작업의 구간별 소요 시간을 같은 작업명의 이전 실행 분위수와 비교"""
+        if detail['status'] not in ("SUCCEEDED", "FAILED"):
+            return None
+        durations = run_durations(detail)
+        if not durations:
+            return None
+        try:
+            return self.history.observe(detail['jobId'], detail['jobName'], durations,
+                                        succeeded=detail['status'] == "SUCCEEDED")
+        except Exception as e:
+            self.logger.error(f"Failed to compare run history for {detail['jobId']}: {str(e)}")
+            return None
+
+    def _check_thresholds(self, service_type: ServiceType, detail: Dict[str, Any]) -> Optional[List[ThresholdBreach]]:
+        """종료된 작업이 보고한 processedStats 를 작업명에 맞는 임계값 규칙과 비교"""
+        if detail['status'] not in ("SUCCEEDED", "FAILED"):
+            return None
+        metrics = batch_metrics(detail)
+        if not metrics:
+            return None
+        return self.thresholds.evaluate(MonitoringType.BATCH, service_type, metrics, detail['jobName']).breaches
+
+    @staticmethod
+    def message_key(job_id: str, channel: str) -> str:
+        return f"batch:{job_id}:{channel}"
+
+_batch_tracker: Optional[BatchLifecycleTracker] = None
+
+def get_batch_tracker(outbox: SlackOutbox) -> BatchLifecycleTracker:
+    """컨테이너 단위로 재사용되는 작업 추적기"""
+    global _batch_tracker
+    if _batch_tracker is None or _batch_tracker.outbox is not outbox:
+        _batch_tracker = BatchLifecycleTracker(outbox)
+    return _batch_tracker
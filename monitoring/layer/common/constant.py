@@ -19,6 +19,12 @@ class MonitoringType(Enum):
     BATCH = ("batch", "배치 작업 모니터링")
     RAG = ("rag", "RAG 성능 모니터링")
 
+class Severity(Enum):
+    CRITICAL = ("critical", "치명")
+    ERROR = ("error", "오류")
+    WARNING = ("warning", "경고")
+    INFO = ("info", "정보")
+
 class SlackConfig:
     CHANNELS = {
         "ALARM": ("C084FGGMNS0", "알람"),
@@ -28,7 +34,8 @@ class SlackConfig:
     ACTIONS = {
         "VIEW_ERROR_DETAIL": "view_error_detail",
         "VIEW_BATCH_DETAIL": "view_batch_detail",
-        "VIEW_RAG_DETAIL": "view_rag_detail"
+        "VIEW_RAG_DETAIL": "view_rag_detail",
+        "VIEW_INCIDENT_CONTEXT": "view_incident_context"
     }
     
     TOKENS = {
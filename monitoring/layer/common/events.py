@@ -0,0 +1,313 @@
+import os
+import json
+import gzip
+import base64
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from .constant import ServiceType, Severity
+from .latency import event_source_time, parse_source_time
+
+logger = logging.getLogger(__name__)
+
+BATCH_DETAIL_TYPE = "Batch Job State Change"
+SCHEDULE_DETAIL_TYPE = "Scheduled Event"
+RAG_SOURCE = "custom.rag"
+# RAG 평가 지표 (accuracy 는 필수)
+RAG_METRICS = ("accuracy", "precision", "recall", "f1", "mrr")
+# 에러 알림에서 관련 리소스로 함께 조회할 키
+RELATED_KEYS = ("job_id", "pipeline_id")
+
+class EventValidationError(ValueError):
+    """이벤트 형식 오류 (이벤트 종류와 필드 경로 포함)"""
+
+    def __init__(self, kind: str, path: str, reason: str = "is missing"):
+        super().__init__(f"Invalid {kind} event: {path} {reason}")
+        self.kind = kind
+        self.path = path
+
+def _require(data: Dict[str, Any], key: str, kind: str, path: str = "") -> Any:
+    value = data.get(key) if isinstance(data, dict) else None
+    if value is None or value == "":
+        raise EventValidationError(kind, f"{path}{key}")
+    return value
+
+def _number(value: Any, kind: str, path: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise EventValidationError(kind, path, f"is not a number: {value!r}") from None
+
+def _service_type(payload: Dict[str, Any], kind: str, default: Optional[str] = None) -> ServiceType:
+    name = payload.get('service_type') or default or os.environ.get('SERVICE_TYPE', 'DEV')
+    try:
+        return ServiceType[name]
+    except KeyError:
+        raise EventValidationError(kind, "service_type", f"is not a known service: {name!r}") from None
+
+def _severity(payload: Dict[str, Any], kind: str) -> Optional[Severity]:
+    name = payload.get('severity')
+    if name is None:
+        return None
+    try:
+        return Severity[name]
+    except KeyError:
+        raise EventValidationError(kind, "severity", f"is not a known severity: {name!r}") from None
+
+def _labels(payload: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    labels = payload.get('labels')
+    return {str(k): str(v) for k, v in labels.items()} if labels else None
+
+def _source_time(payload: Dict[str, Any], envelope: Optional[Dict[str, Any]]) -> Optional[float]:
+    source_time = event_source_time(payload)
+    if source_time is None and envelope:
+        return parse_source_time(envelope.get('Timestamp'))
+    return source_time
+
+@dataclass(slots=True)
+class AlarmEvent:
+    """SNS 로 전달된 CloudWatch 알람 메시지"""
+    alarm_name: str
+    description: str
+    dimension: str  # 첫 번째 Trigger 차원 값
+    state: Optional[str] = None
+    region: Optional[str] = None
+    source_time: Optional[float] = None
+
+    @classmethod
+    def parse(cls, message: Dict[str, Any], envelope: Optional[Dict[str, Any]] = None) -> 'AlarmEvent':
+        dimensions = (message.get('Trigger') or {}).get('Dimensions') or [{}]
+        alarm_arn = message.get('AlarmArn')
+        return cls(
+            alarm_name=_require(message, 'AlarmName', "alarm"),
+            description=_require(message, 'AlarmDescription', "alarm"),
+            dimension=_require(dimensions[0], 'value', "alarm", "Trigger.Dimensions[0]."),
+            state=message.get('NewStateValue'),
+            # 알람 ARN (arn:aws:cloudwatch:<region>:<account>:alarm:<name>) 에서 리전 추출
+            region=alarm_arn.split(':')[3] if alarm_arn and alarm_arn.count(':') >= 3 else None,
+            source_time=_source_time(message, envelope)
+        )
+
+@dataclass(slots=True)
+class ErrorEvent:
+    service_type: ServiceType
+    error_msg: str
+    log_group: str
+    error_id: Optional[str] = None
+    region: Optional[str] = None
+    severity: Optional[Severity] = None
+    labels: Optional[Dict[str, str]] = None
+    related: Optional[Dict[str, str]] = None
+    source_time: Optional[float] = None
+    event_id: Optional[str] = None  # 레코드별 멱등성 키 (SNS MessageId, 로그 이벤트 id)
+
+    @classmethod
+    def parse(cls, payload: Dict[str, Any], envelope: Optional[Dict[str, Any]] = None) -> 'ErrorEvent':
+        """직접 호출 이벤트 ({service_type, error_msg, ...})"""
+        _require(payload, 'service_type', "error")
+        service_type = _service_type(payload, "error")
+        return cls(
+            service_type=service_type,
+            error_msg=_require(payload, 'error_msg', "error"),
+            log_group=payload.get('log_group') or service_type.value.log_group,
+            error_id=payload.get('error_id'),
+            region=payload.get('region'),
+            severity=_severity(payload, "error"),
+            labels=_labels(payload),
+            related={key: str(payload[key]) for key in RELATED_KEYS if payload.get(key)} or None,
+            source_time=_source_time(payload, envelope),
+            event_id=envelope.get('MessageId') if envelope else None
+        )
+
+    @classmethod
+    def from_alarm(cls, alarm: AlarmEvent, envelope: Optional[Dict[str, Any]] = None) -> 'ErrorEvent':
+        """CloudWatch 알람 (알람 설명이 에러 메시지, 첫 번째 차원 값이 에러 ID)"""
+        service_type = _service_type({}, "alarm")
+        return cls(
+            service_type=service_type,
+            error_msg=alarm.description,
+            log_group=service_type.value.log_group,
+            error_id=alarm.dimension,
+            region=alarm.region,
+            source_time=alarm.source_time,
+            event_id=envelope.get('MessageId') if envelope else None
+        )
+
+    @classmethod
+    def from_log_event(cls, service_type: ServiceType, log_group: str,
+                       log_event: Dict[str, Any]) -> 'ErrorEvent':
+        """구독 필터로 전달된 로그 이벤트 1건"""
+        timestamp = log_event.get('timestamp')
+        return cls(
+            service_type=service_type,
+            error_msg=_require(log_event, 'message', "logs", "logEvents[]."),
+            log_group=log_group,
+            source_time=timestamp / 1000 if timestamp else None,
+            event_id=log_event.get('id')
+        )
+
+@dataclass(slots=True)
+class BatchJobEvent:
+    """EventBridge Batch Job State Change 이벤트"""
+    job_id: str
+    job_name: str
+    status: str
+    service_type: ServiceType
+    detail: Dict[str, Any]  # 원본 detail (복사하지 않고 상태 추적기에 그대로 전달)
+    job_queue: Optional[str] = None
+    region: Optional[str] = None
+    severity: Optional[Severity] = None
+    labels: Optional[Dict[str, str]] = None
+    source_time: Optional[float] = None
+    event_id: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status == 'FAILED'
+
+    @classmethod
+    def parse(cls, payload: Dict[str, Any], envelope: Optional[Dict[str, Any]] = None) -> 'BatchJobEvent':
+        detail = _require(payload, 'detail', "batch")
+        return cls(
+            job_id=_require(detail, 'jobId', "batch", "detail."),
+            job_name=_require(detail, 'jobName', "batch", "detail."),
+            status=_require(detail, 'status', "batch", "detail."),
+            service_type=_service_type(payload, "batch"),
+            detail=detail,
+            job_queue=detail.get('jobQueue'),
+            region=payload.get('region'),
+            severity=_severity(payload, "batch"),
+            labels=_labels(payload),
+            source_time=_source_time(payload, envelope),
+            event_id=payload.get('id') or (envelope.get('MessageId') if envelope else None)
+        )
+
+@dataclass(slots=True)
+class RagMetricsEvent:
+    """RAG 파이프라인 평가 지표 (직접 호출 {pipeline_id, metrics} 또는 EventBridge custom.rag 이벤트)"""
+    pipeline_id: str
+    accuracy: float
+    service_type: ServiceType
+    precision: Optional[float] = None
+    recall: Optional[float] = None
+    f1: Optional[float] = None
+    mrr: Optional[float] = None
+    region: Optional[str] = None
+    severity: Optional[Severity] = None
+    labels: Optional[Dict[str, str]] = None
+    source_time: Optional[float] = None
+    event_id: Optional[str] = None
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """값이 있는 지표"""
+        return {name: getattr(self, name) for name in RAG_METRICS if getattr(self, name) is not None}
+
+    @classmethod
+    def parse(cls, payload: Dict[str, Any], envelope: Optional[Dict[str, Any]] = None) -> 'RagMetricsEvent':
+        # EventBridge 이벤트는 detail 아래에 문자열 값으로 지표가 들어옴
+        body, path = (payload['detail'], "detail.") if isinstance(payload.get('detail'), dict) else (payload, "")
+        pipeline_id = body.get('pipeline_id') or _require(body, 'pipelineRunId', "rag", path)
+        metrics = _require(body, 'metrics', "rag", path)
+        values = {}
+        for name in RAG_METRICS:
+            if metrics.get(name) is not None:
+                values[name] = _number(metrics[name], "rag", f"{path}metrics.{name}")
+        if 'accuracy' not in values:
+            raise EventValidationError("rag", f"{path}metrics.accuracy")
+        return cls(
+            pipeline_id=str(pipeline_id),
+            service_type=_service_type(payload, "rag", ServiceType.DEV.name),
+            region=payload.get('region'),
+            severity=_severity(payload, "rag"),
+            labels=_labels(payload),
+            source_time=_source_time(payload, envelope),
+            event_id=payload.get('id') or (envelope.get('MessageId') if envelope else None),
+            **values
+        )
+
+@dataclass(slots=True)
+class ScheduleEvent:
+    """EventBridge 정기 스케줄 이벤트"""
+    source_time: Optional[float] = None
+
+MonitoringEvent = Union[ErrorEvent, BatchJobEvent, RagMetricsEvent, ScheduleEvent]
+
+def event_kind(payload: Dict[str, Any]) -> str:
+    """SNS 를 벗긴 이벤트 종류 (error / batch / rag / schedule / logs / unknown)"""
+    if 'awslogs' in payload:
+        return "logs"
+    if 'AlarmName' in payload or 'error_msg' in payload:
+        return "error"
+    detail_type = payload.get('detail-type')
+    if detail_type == BATCH_DETAIL_TYPE:
+        return "batch"
+    if payload.get('source') == RAG_SOURCE or 'pipeline_id' in payload:
+        return "rag"
+    if detail_type == SCHEDULE_DETAIL_TYPE:
+        return "schedule"
+    return "unknown"
+
+def iter_payloads(event: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """(이벤트, SNS 봉투) 를 레코드 순서대로 반환 (SNS 메시지는 꺼낼 때 한 번만 JSON 파싱)"""
+    records = event.get('Records')
+    if records is None:
+        yield event, None
+        return
+    for i, record in enumerate(records):
+        envelope = record.get('Sns') if isinstance(record, dict) else None
+        if not isinstance(envelope, dict):
+            raise EventValidationError("sns", f"Records[{i}].Sns")
+        try:
+            message = json.loads(envelope['Message'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise EventValidationError("sns", f"Records[{i}].Sns.Message", f"is not a JSON object: {e}") from None
+        if not isinstance(message, dict):
+            raise EventValidationError("sns", f"Records[{i}].Sns.Message", "is not a JSON object")
+        yield message, envelope
+
+def iter_log_errors(event: Dict[str, Any]) -> Iterator[ErrorEvent]:
+    """CloudWatch Logs 구독 이벤트 (gzip + base64) 의 로그 이벤트를 에러로 하나씩 반환"""
+    try:
+        data = json.loads(gzip.decompress(base64.b64decode(event['awslogs']['data'])))
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        raise EventValidationError("logs", "awslogs.data", f"is not a gzip JSON payload: {e}") from None
+    # 구독 필터 생성 시 보내는 연결 확인 메시지
+    if data.get('messageType') == 'CONTROL_MESSAGE':
+        return
+    log_group = _require(data, 'logGroup', "logs")
+    service_type = _service_type({}, "logs")
+    for log_event in data.get('logEvents') or []:
+        yield ErrorEvent.from_log_event(service_type, log_group, log_event)
+
+def _parse_error(payload: Dict[str, Any], envelope: Optional[Dict[str, Any]]) -> ErrorEvent:
+    if 'AlarmName' in payload:
+        return ErrorEvent.from_alarm(AlarmEvent.parse(payload, envelope), envelope)
+    return ErrorEvent.parse(payload, envelope)
+
+def iter_error_events(event: Dict[str, Any]) -> Iterator[ErrorEvent]:
+    """에러 이벤트 (직접 호출, SNS 알람 레코드, 로그 구독) 를 레코드 단위로 파싱해 하나씩 반환"""
+    if 'awslogs' in event:
+        yield from iter_log_errors(event)
+        return
+    for payload, envelope in iter_payloads(event):
+        yield _parse_error(payload, envelope)
+
+def parse_events(event: Dict[str, Any]) -> Iterator[MonitoringEvent]:
+    """호출 이벤트를 종류별 모델로 하나씩 파싱 (처리하지 않는 종류는 로그만 남기고 건너뜀)"""
+    if 'awslogs' in event:
+        yield from iter_log_errors(event)
+        return
+    for payload, envelope in iter_payloads(event):
+        kind = event_kind(payload)
+        if kind == "error":
+            yield _parse_error(payload, envelope)
+        elif kind == "batch":
+            yield BatchJobEvent.parse(payload, envelope)
+        elif kind == "rag":
+            yield RagMetricsEvent.parse(payload, envelope)
+        elif kind == "schedule":
+            yield ScheduleEvent(source_time=_source_time(payload, envelope))
+        else:
+            logger.warning(f"Skipping unsupported event: source={payload.get('source')}, "
+                           f"detail-type={payload.get('detail-type')}")
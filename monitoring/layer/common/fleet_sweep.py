@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from .constant import ServiceType
+from .resilience import aws_client, get_circuit_breaker
+from .tracing import span
+
+# numpy 는 스윕을 실행할 때 import (스윕을 하지 않는 호출의 콜드 스타트에서 제외)
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# get_metric_data 요청당 최대 쿼리 수
+MAX_METRIC_DATA_QUERIES = 500
+
+@dataclass(frozen=True)
+class FleetRule:
+    """서비스 / 로그 그룹마다 하나씩 만드는 지표 임계값 규칙"""
+    name: str
+    label: str
+    namespace: str
+    metric_name: str
+    stat: str
+    threshold: float
+    higher_is_bad: bool = True
+    # 데이터 포인트가 없을 때 값 (건수 지표는 0, 지연 같은 분포 지표는 판단하지 않음)
+    missing: float = 0.0
+    per_log_group: bool = False
+    dimensions: Tuple[Tuple[str, str], ...] = ()
+
+    def metric_dimensions(self, service: str, log_group: Optional[str]) -> List[Dict[str, str]]:
+        if self.per_log_group:
+            return [{'Name': 'LogGroupName', 'Value': log_group}]
+        return [{'Name': 'Service', 'Value': service}] + [{'Name': k, 'Value': v} for k, v in self.dimensions]
+
+@dataclass
+class FleetQuery:
+    id: str
+    service: str
+    rule: FleetRule
+    log_group: Optional[str] = None
+
+    def to_metric_query(self, period: int) -> Dict[str, Any]:
+        return {
+            'Id': self.id,
+            'MetricStat': {
+                'Metric': {
+                    'Namespace': self.rule.namespace,
+                    'MetricName': self.rule.metric_name,
+                    'Dimensions': self.rule.metric_dimensions(self.service, self.log_group)
+                },
+                'Period': period,
+                'Stat': self.rule.stat
+            },
+            'ReturnData': True
+        }
+
+@dataclass
+class Breach:
+    rule: str
+    label: str
+    value: float
+    threshold: float
+    higher_is_bad: bool
+    log_group: Optional[str] = None
+
+@dataclass
+class ServiceChange:
+    service: str
+    state: str  # ALERT: 임계값 초과 규칙 있음, OK: 모두 정상
+    previous: str
+    breaches: List[Breach] = field(default_factory=list)
+    period_end: float = 0.0
+
+@dataclass
+class SweepResult:
+    changes: List[ServiceChange]
+    states: Dict[str, str]
+    queries: int
+    requests: int
+    elapsed: float
+
+def default_rules() -> List[FleetRule]:
+    """환경변수 임계값으로 기본 규칙 생성 (임계값이 0 이하인 규칙은 제외)"""
+    rules = [
+        FleetRule("errors", "에러 건수", "Monitoring/Errors", "ErrorCount", "Sum",
+                  float(os.environ.get('FLEET_ERROR_THRESHOLD', '10')),
+                  dimensions=(("ErrorType", "Application"),)),
+        FleetRule("rag_alerts", "RAG 성능 알림", "Monitoring/RAG", "PerformanceAlert", "Sum",
+                  float(os.environ.get('FLEET_RAG_ALERT_THRESHOLD', '3')),
+                  dimensions=(("MetricType", "Accuracy"),)),
+        FleetRule("delivery_p90", "알림 전송 지연 p90(ms)", "Monitoring/Delivery", "DeliveryLatency", "p90",
+                  float(os.environ.get('FLEET_DELIVERY_P90_MS', '60000')), missing=float('nan'),
+                  dimensions=(("AlertType", "ERROR"),)),
+        FleetRule("error_logs", "에러 로그 수집 건수", "AWS/Logs", "IncomingLogEvents", "Sum",
+                  float(os.environ.get('FLEET_ERROR_LOG_THRESHOLD', '50')), per_log_group=True),
+        # 애플리케이션 로그가 끊긴 경우 (기본값 0 은 사용 안 함)
+        FleetRule("log_silence", "로그 수집 건수", "AWS/Logs", "IncomingLogEvents", "Sum",
+                  float(os.environ.get('FLEET_MIN_LOG_EVENTS', '0')), higher_is_bad=False,
+                  per_log_group=True)
+    ]
+    return [rule for rule in rules if rule.threshold > 0]
+
+def service_log_groups(service_type: ServiceType) -> Dict[str, str]:
+    """규칙 이름별 로그 그룹 (에러 로그 그룹은 템플릿의 /aws/{서비스}/errors)"""
+    return {
+        "error_logs": f"/aws/{service_type.name}/errors",
+        "log_silence": service_type.value.log_group
+    }
+
+class FleetSweep:
+    """모든 서비스 / 로그 그룹 지표를 get_metric_data 로 한 번에 조회해 임계값을 일괄 판정
+
+    최근 두 구간을 함께 조회해 직전 구간과 상태가 달라진 서비스만 반환하므로 스윕 간 상태 저장이 필요 없음.
+    """
+
+    def __init__(self, cloudwatch_client=None, rules: Optional[List[FleetRule]] = None,
+                 services: Optional[Sequence[ServiceType]] = None, period: int = 300, delay: int = 120):
+        self.cloudwatch = cloudwatch_client
+        self.rules = rules if rules is not None else default_rules()
+        self.services = list(services or ServiceType)
+        self.period = period
+        # CloudWatch 지표 수집 지연 (마지막 구간이 다 채워진 뒤에 판정)
+        self.delay = delay
+
+    def build_queries(self) -> List[FleetQuery]:
+        queries = []
+        for service_type in self.services:
+            log_groups = service_log_groups(service_type)
+            for rule in self.rules:
+                log_group = log_groups.get(rule.name) if rule.per_log_group else None
+                if rule.per_log_group and not log_group:
+                    continue
+                queries.append(FleetQuery(f"q{len(queries)}", service_type.name, rule, log_group))
+        return queries
+
+    def sweep(self, now: Optional[float] = None) -> SweepResult:
+        started_at = time.monotonic()
+        now = now if now is not None else time.time()
+        # 마지막으로 다 채워진 구간 끝 (스윕 주기와 구간이 같으면 구간마다 한 번씩만 판정)
+        end = int((now - self.delay) // self.period * self.period)
+        end_time = datetime.fromtimestamp(end, timezone.utc)
+        start_time = end_time - timedelta(seconds=2 * self.period)
+
+        queries = self.build_queries()
+        if not queries:
+            return SweepResult([], {}, 0, 0, 0.0)
+        import numpy as np
+        # 쿼리별 [직전 구간, 마지막 구간] 값
+        values = np.array([[query.rule.missing] * 2 for query in queries], dtype=float)
+        requests = self._fetch(queries, start_time, end_time, values)
+
+        states, changes = self.evaluate(queries, values, end)
+        elapsed = time.monotonic() - started_at
+        logger.info(f"Fleet sweep: {len(queries)} queries in {requests} requests, "
+                    f"{len(changes)} state changes, {elapsed * 1000:.0f}ms")
+        return SweepResult(changes, states, len(queries), requests, elapsed)
+
+    def _fetch(self, queries: List[FleetQuery], start_time: datetime, end_time: datetime,
+               values: 'np.ndarray') -> int:
+        """MAX_METRIC_DATA_QUERIES 개씩 나눠 조회하고 NextToken 으로 끝까지 읽어 values 에 채움"""
+        cloudwatch = self.cloudwatch or aws_client('cloudwatch')
+        index = {query.id: i for i, query in enumerate(queries)}
+        previous_start = start_time.timestamp()
+        requests = 0
+        for offset in range(0, len(queries), MAX_METRIC_DATA_QUERIES):
+            chunk = queries[offset:offset + MAX_METRIC_DATA_QUERIES]
+            kwargs = {'MetricDataQueries': [query.to_metric_query(self.period) for query in chunk],
+                      'StartTime': start_time, 'EndTime': end_time, 'ScanBy': 'TimestampAscending'}
+            while True:
+                with get_circuit_breaker("cloudwatch:fleet").guard():
+                    with span('cloudwatch.get_metric_data', queries=len(chunk)):
+                        response = cloudwatch.get_metric_data(**kwargs)
+                requests += 1
+                for result in response.get('MetricDataResults', []):
+                    row = index[result['Id']]
+                    for timestamp, value in zip(result.get('Timestamps', []), result.get('Values', [])):
+                        column = int((timestamp.timestamp() - previous_start) // self.period)
+                        if 0 <= column < 2:
+                            values[row, column] = value
+                if not response.get('NextToken'):
+                    break
+                kwargs['NextToken'] = response['NextToken']
+        return requests
+
+    def evaluate(self, queries: List[FleetQuery], values: 'np.ndarray',
+                 period_end: float) -> Tuple[Dict[str, str], List[ServiceChange]]:
+        """모든 쿼리의 두 구간 값을 한 번에 임계값과 비교해 서비스별 상태 변화 계산"""
+        import numpy as np
+        thresholds = np.array([query.rule.threshold for query in queries], dtype=float)[:, None]
+        higher_is_bad = np.array([query.rule.higher_is_bad for query in queries], dtype=bool)[:, None]
+        services = sorted({query.service for query in queries})
+        positions = {service: i for i, service in enumerate(services)}
+        service_index = np.array([positions[query.service] for query in queries])
+
+        # 값이 없는 (NaN) 쿼리는 비교 결과가 False 가 되어 정상으로 판정
+        with np.errstate(invalid='ignore'):
+            breached = np.where(higher_is_bad, values > thresholds, values < thresholds)
+        service_breached = np.zeros((len(services), 2), dtype=bool)
+        np.logical_or.at(service_breached, service_index, breached)
+
+        states = {service: "ALERT" if service_breached[i, 1] else "OK" for i, service in enumerate(services)}
+        changes = []
+        for i in np.flatnonzero(service_breached[:, 0] != service_breached[:, 1]):
+            rows = np.flatnonzero((service_index == i) & breached[:, 1])
+            changes.append(ServiceChange(
+                service=services[i],
+                state=states[services[i]],
+                previous="ALERT" if service_breached[i, 0] else "OK",
+                breaches=[Breach(queries[row].rule.name, queries[row].rule.label, float(values[row, 1]),
+                                 queries[row].rule.threshold, queries[row].rule.higher_is_bad,
+                                 queries[row].log_group) for row in rows],
+                period_end=period_end
+            ))
+        return states, changes
+
+def get_fleet_sweep() -> FleetSweep:
+    """환경변수 설정으로 스윕 생성 (FLEET_SWEEP_PERIOD 는 스케줄 주기와 같게 설정)"""
+    return FleetSweep(
+        period=int(os.environ.get('FLEET_SWEEP_PERIOD', '300')),
+        delay=int(os.environ.get('FLEET_SWEEP_DELAY', '120'))
+    )
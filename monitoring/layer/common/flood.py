@@ -0,0 +1,222 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 메시지 패턴 집계 시 숫자 / UUID / 16진수 값을 같은 값으로 보고 묶음
+SIGNATURE_PATTERN = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b|\d+'
+)
+# 정확히 집계할 패턴 / 로그 그룹 수 (초과분은 OTHER 로 합산)
+MAX_COUNT_KEYS = 20
+OTHER = "(기타)"
+SUMMARY_MESSAGE_LIMIT = 300
+
+def error_signature(message: str) -> str:
+    """에러 메시지 첫 줄에서 가변 값을 지운 패턴"""
+    first_line = (message or "").strip().split('\n', 1)[0]
+    return SIGNATURE_PATTERN.sub('#', first_line)[:SUMMARY_MESSAGE_LIMIT]
+
+@dataclass
+class ErrorSample:
+    at: float
+    error_id: str
+    message: str
+    log_group: str = ""
+
+class RateCounter:
+    """고정 메모리 구간 이동 건수 (현재 구간 건수 + 이전 구간 건수를 경과 비율로 가중)"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._bucket_start = 0.0
+        self._current = 0
+        self._previous = 0
+
+    def _advance(self, now: float) -> None:
+        elapsed = now - self._bucket_start
+        if elapsed >= 2 * self.window:
+            self._previous, self._current = 0, 0
+            self._bucket_start = now - (elapsed % self.window)
+        elif elapsed >= self.window:
+            self._previous, self._current = self._current, 0
+            self._bucket_start += self.window
+
+    def add(self, now: float, count: int = 1) -> None:
+        self._advance(now)
+        self._current += count
+
+    def rate(self, now: float) -> float:
+        """최근 window 초 동안의 건수 추정값"""
+        self._advance(now)
+        weight = max(1.0 - (now - self._bucket_start) / self.window, 0.0)
+        return self._previous * weight + self._current
+
+class ErrorReservoir:
+    """크기가 고정된 대표 에러 표본 (Algorithm R) 과 정확한 건수"""
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None):
+        self.size = size
+        self.seen = 0
+        self.samples: List[ErrorSample] = []
+        self.signatures: Dict[str, int] = {}
+        self.log_groups: Dict[str, int] = {}
+        self._rng = rng or random.Random()
+
+    def add(self, sample: ErrorSample) -> None:
+        self.seen += 1
+        if len(self.samples) < self.size:
+            self.samples.append(sample)
+        else:
+            # 지금까지 본 seen 건 모두 같은 확률 (size / seen) 로 표본에 남음
+            index = self._rng.randrange(self.seen)
+            if index < self.size:
+                self.samples[index] = sample
+        self._count(self.signatures, error_signature(sample.message))
+        self._count(self.log_groups, sample.log_group or "-")
+
+    @staticmethod
+    def _count(counts: Dict[str, int], key: str) -> None:
+        if key in counts or len(counts) < MAX_COUNT_KEYS:
+            counts[key] = counts.get(key, 0) + 1
+        else:
+            counts[OTHER] = counts.get(OTHER, 0) + 1
+
+@dataclass
+class FloodSummary:
+    service: str
+    phase: str  # started: 폭주 모드 시작, ongoing: 주기 요약, ended: 폭주 종료 (마지막 구간 요약)
+    started_at: float
+    period_start: float
+    period_end: float
+    count: int  # 이번 구간 건수
+    total: int  # 폭주 시작 이후 전체 건수
+    rate: float  # 최근 window 초 동안의 건수
+    window: float
+    samples: List[ErrorSample] = field(default_factory=list)
+    signatures: List[Tuple[str, int]] = field(default_factory=list)
+    log_groups: List[Tuple[str, int]] = field(default_factory=list)
+
+@dataclass
+class FloodDecision:
+    absorbed: bool  # True 이면 개별 알림을 보내지 않음 (요약에 포함)
+    summaries: List[FloodSummary] = field(default_factory=list)
+
+class _ServiceFlood:
+    def __init__(self, window: float):
+        self.rate = RateCounter(window)
+        self.active = False
+        self.started_at = 0.0
+        self.period_start = 0.0
+        self.total = 0
+        self.reservoir: Optional[ErrorReservoir] = None
+
+class FloodDetector:
+    """서비스별 에러 폭주 감지 (window 초 동안 threshold 건 이상이면 개별 알림 대신 summary_interval 마다 요약)
+
+    폭주 중에는 서비스당 표본 sample_size 건과 패턴 / 로그 그룹별 건수만 유지하므로 메모리와 슬랙 전송량이 일정함.
+    건수가 threshold * exit_ratio 아래로 떨어지면 마지막 구간을 요약하고 개별 알림으로 돌아감.
+    """
+
+    def __init__(self, threshold: int = 30, window: float = 60.0, sample_size: int = 5,
+                 summary_interval: float = 300.0, exit_ratio: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        self.threshold = threshold
+        self.window = window
+        self.sample_size = sample_size
+        self.summary_interval = summary_interval
+        self.exit_ratio = exit_ratio
+        self._rng = rng or random.Random()
+        self._services: Dict[str, _ServiceFlood] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def observe(self, service: str, sample: ErrorSample, now: Optional[float] = None) -> FloodDecision:
+        """에러 1건 기록 후 개별 알림 여부와 지금 보낼 요약 반환"""
+        if not self.enabled:
+            return FloodDecision(absorbed=False)
+        now = now if now is not None else time.time()
+        with self._lock:
+            state = self._services.setdefault(service, _ServiceFlood(self.window))
+            state.rate.add(now)
+            summaries = self._due_locked(now)
+            if not state.active and state.rate.rate(now) >= self.threshold:
+                state.active = True
+                state.started_at = state.period_start = now
+                state.total = 0
+                state.reservoir = ErrorReservoir(self.sample_size, self._rng)
+                logger.warning(f"Flood mode started for {service}: "
+                               f"{state.rate.rate(now):.0f} errors in {self.window:.0f}s")
+            if state.active:
+                state.reservoir.add(sample)
+                state.total += 1
+                if state.total == 1:
+                    summaries.append(self._summary(service, state, "started", now))
+            return FloodDecision(absorbed=state.active, summaries=summaries)
+
+    def due(self, now: Optional[float] = None) -> List[FloodSummary]:
+        """주기가 지난 서비스의 요약과 폭주가 끝난 서비스의 마지막 요약"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            return self._due_locked(now if now is not None else time.time())
+
+    def active_services(self) -> List[str]:
+        with self._lock:
+            return [service for service, state in self._services.items() if state.active]
+
+    def _due_locked(self, now: float) -> List[FloodSummary]:
+        summaries = []
+        for service, state in self._services.items():
+            if not state.active:
+                continue
+            if state.rate.rate(now) < self.threshold * self.exit_ratio:
+                state.active = False
+                logger.info(f"Flood mode ended for {service} after {state.total} errors")
+                summaries.append(self._summary(service, state, "ended", now))
+                state.reservoir = None
+            elif now - state.period_start >= self.summary_interval:
+                summaries.append(self._summary(service, state, "ongoing", now))
+                state.period_start = now
+                state.reservoir = ErrorReservoir(self.sample_size, self._rng)
+        return summaries
+
+    def _summary(self, service: str, state: _ServiceFlood, phase: str, now: float) -> FloodSummary:
+        reservoir = state.reservoir
+        return FloodSummary(
+            service=service, phase=phase, started_at=state.started_at,
+            period_start=state.period_start, period_end=now,
+            count=reservoir.seen, total=state.total, rate=state.rate.rate(now), window=self.window,
+            samples=sorted(reservoir.samples, key=lambda sample: sample.at),
+            signatures=self._top(reservoir.signatures), log_groups=self._top(reservoir.log_groups)
+        )
+
+    @staticmethod
+    def _top(counts: Dict[str, int]) -> List[Tuple[str, int]]:
+        return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+_detector: Optional[FloodDetector] = None
+_detector_lock = threading.Lock()
+
+def get_flood_detector() -> FloodDetector:
+    """컨테이너 공용 폭주 감지기 (FLOOD_THRESHOLD=0 이면 사용 안 함)"""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = FloodDetector(
+                threshold=int(os.environ.get('FLOOD_THRESHOLD', '30')),
+                window=float(os.environ.get('FLOOD_WINDOW', '60')),
+                sample_size=int(os.environ.get('FLOOD_SAMPLE_SIZE', '5')),
+                summary_interval=float(os.environ.get('FLOOD_SUMMARY_INTERVAL', '300'))
+            )
+        return _detector
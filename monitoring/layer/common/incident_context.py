@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import logging
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from .tracing import span
+from .resilience import current_deadline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_TIMEOUT = 8.0
+
+@dataclass
+class SourceResult:
+    name: str
+    status: str  # ok: 조회 완료, timeout: 제한 시간 초과, error: 조회 실패, skipped: 조회할 ID 없음
+    value: Any = None
+    elapsed: float = 0.0
+
+def incident_ids(value: str) -> Dict[str, str]:
+    """인시던트 컨텍스트 버튼 값 (error_id / job_id / pipeline_id JSON) 파싱"""
+    try:
+        ids = json.loads(value or '{}')
+    except ValueError:
+        return {}
+    if not isinstance(ids, dict):
+        return {}
+    return {key: str(ids[key]) for key in ('error_id', 'job_id', 'pipeline_id') if ids.get(key)}
+
+def parse_source_timeouts(value: str) -> Dict[str, float]:
+    """'logs=8,batch=5' 형식의 원본별 제한 시간(초) 파싱"""
+    timeouts = {}
+    for item in (value or '').split(','):
+        name, _, seconds = item.partition('=')
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+class IncidentContextCollector:
+    """여러 상세 조회를 동시에 실행하고 원본별 제한 시간까지만 대기 (전체 소요시간은 가장 느린 원본 기준)"""
+
+    def __init__(self, max_workers: int = 8, timeout: float = DEFAULT_SOURCE_TIMEOUT,
+                 source_timeouts: Optional[Dict[str, float]] = None):
+        self.timeout = timeout
+        self.source_timeouts = source_timeouts or {}
+        # 에러 로그 조회가 내부에서 대상 실행기를 쓰므로 같은 풀에 넣지 않도록 별도 풀 사용
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="incident")
+
+    def collect(self, fetchers: Dict[str, Optional[Callable[[], Any]]],
+                deadline: Optional[float] = None) -> Dict[str, SourceResult]:
+        """fetchers 의 값이 None 이면 건너뜀, deadline(monotonic, 기본값은 호출 마감) 이 원본별 제한 시간보다 우선"""
+        started_at = time.monotonic()
+        deadline = deadline if deadline is not None else current_deadline()
+        results: Dict[str, SourceResult] = {}
+        futures = {}
+        for name, fetch in fetchers.items():
+            if fetch is None:
+                results[name] = SourceResult(name, "skipped")
+                continue
+            # 작업 스레드에서도 현재 호출의 트레이스에 구간이 기록되도록 컨텍스트 복사
+            futures[name] = self._executor.submit(contextvars.copy_context().run, self._timed, name, fetch)
+
+        for name, future in futures.items():
+            limit = started_at + self.source_timeouts.get(name, self.timeout)
+            if deadline is not None:
+                limit = min(limit, deadline)
+            try:
+                value, elapsed = future.result(timeout=max(limit - time.monotonic(), 0))
+                results[name] = SourceResult(name, "ok", value, elapsed)
+            except FutureTimeoutError:
+                # 실행 중인 조회는 중단할 수 없으므로 결과만 버림
+                future.cancel()
+                logger.warning(f"Incident source {name} timed out")
+                results[name] = SourceResult(name, "timeout", elapsed=limit - started_at)
+            except Exception as e:
+                logger.error(f"Incident source {name} failed: {str(e)}")
+                results[name] = SourceResult(name, "error", str(e), time.monotonic() - started_at)
+        return {name: results[name] for name in fetchers}
+
+    @staticmethod
+    def _timed(name: str, fetch: Callable[[], Any]) -> Any:
+        started_at = time.monotonic()
+        with span(f'incident.{name}'):
+            value = fetch()
+        return value, time.monotonic() - started_at
+
+_collector: Optional[IncidentContextCollector] = None
+_collector_lock = threading.Lock()
+
+def get_incident_collector() -> IncidentContextCollector:
+    """컨테이너 공용 인시던트 컨텍스트 수집기"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = IncidentContextCollector(
+                max_workers=int(os.environ.get('INCIDENT_CONTEXT_MAX_WORKERS', '8')),
+                timeout=float(os.environ.get('INCIDENT_CONTEXT_TIMEOUT', str(DEFAULT_SOURCE_TIMEOUT))),
+                source_timeouts=parse_source_timeouts(os.environ.get('INCIDENT_CONTEXT_SOURCE_TIMEOUTS', ''))
+            )
+        return _collector
@@ -0,0 +1,216 @@
+import os
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from .local_store import SQLiteStore
+from .resilience import aws_client
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class InteractionRecord:
+    key: str
+    status: str  # pending: 처리 중, done: 처리 완료 (result 에 첫 응답 저장)
+    result: Optional[str]
+    updated_at: float
+
+def interaction_key(body: Dict[str, Any]) -> Optional[str]:
+    """버튼 상호작용 식별 키 (같은 메시지의 같은 버튼, 같은 값이면 재시도 / 중복 클릭으로 간주)"""
+    actions = body.get('actions') or []
+    if not actions or not actions[0].get('action_id'):
+        return None
+    container = body.get('container') or {}
+    channel = (body.get('channel') or {}).get('id') or container.get('channel_id')
+    message_ts = body.get('message_ts') or container.get('message_ts') or (body.get('message') or {}).get('ts')
+    return f"{channel}:{message_ts}:{actions[0]['action_id']}:{actions[0].get('value', '')}"
+
+def is_slack_retry(request: Any) -> bool:
+    """슬랙 재전송 요청 여부 (X-Slack-Retry-Num 헤더)"""
+    headers = getattr(request, 'headers', None) or {}
+    return bool(headers.get('x-slack-retry-num'))
+
+class InteractionStore(ABC):
+    """상호작용 처리 기록 저장소 인터페이스"""
+
+    @abstractmethod
+    def begin(self, key: str, now: float, ttl: float, pending_ttl: float) -> Optional[InteractionRecord]:
+        """처리 시작 기록 (유효한 기존 기록이 있으면 기록하지 않고 기존 기록 반환)"""
+
+    @abstractmethod
+    def complete(self, key: str, result: str, now: float) -> None:
+        pass
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """처리 실패 시 기록 삭제 (다음 요청에서 다시 처리)"""
+
+    @abstractmethod
+    def purge(self, older_than: float, max_entries: int) -> int:
+        """만료된 기록 삭제 및 최대 건수 유지"""
+
+class SQLiteInteractionStore(SQLiteStore, InteractionStore):
+    """SQLite 기반 상호작용 처리 기록 저장소"""
+
+    FILENAME = "interactions.sqlite3"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS interactions (
+            key TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            result TEXT,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_interactions_updated ON interactions (updated_at);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or os.environ.get('INTERACTION_STORE_PATH'))
+
+    def begin(self, key: str, now: float, ttl: float, pending_ttl: float) -> Optional[InteractionRecord]:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM interactions WHERE key = ?", (key,)).fetchone()
+            if row:
+                # 처리 중 기록은 pending_ttl 이 지나면 (처리하던 컨테이너 종료 등) 다시 처리
+                age = now - row['updated_at']
+                if age < (ttl if row['status'] == 'done' else pending_ttl):
+                    return InteractionRecord(**dict(row))
+            conn.execute(
+                "INSERT OR REPLACE INTO interactions (key, status, result, updated_at) "
+                "VALUES (?, 'pending', NULL, ?)", (key, now)
+            )
+        return None
+
+    def complete(self, key: str, result: str, now: float) -> None:
+        self._execute("UPDATE interactions SET status = 'done', result = ?, updated_at = ? WHERE key = ?",
+                      (result, now, key))
+
+    def release(self, key: str) -> None:
+        self._execute("DELETE FROM interactions WHERE key = ? AND status = 'pending'", (key,))
+
+    def purge(self, older_than: float, max_entries: int) -> int:
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM interactions WHERE updated_at < ?", (older_than,)).rowcount
+            deleted += conn.execute(
+                "DELETE FROM interactions WHERE key IN (SELECT key FROM interactions "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)", (max_entries,)
+            ).rowcount
+        return deleted
+
+class DynamoInteractionStore(InteractionStore):
+    """여러 컨테이너가 공유하는 DynamoDB 저장소 (조건부 쓰기로 같은 상호작용은 한 컨테이너만 처리)
+
+    테이블: 파티션 키 key (S), TTL 속성 expires_at
+    TTL 삭제는 지연될 수 있으므로 만료 여부는 조건식에서 updated_at 으로 판단
+    """
+
+    def __init__(self, table: str, ttl: Optional[float] = None):
+        self.table = table
+        self.ttl = ttl if ttl is not None else float(os.environ.get('INTERACTION_DEDUP_TTL', '600'))
+        self._client = aws_client('dynamodb')
+
+    def begin(self, key: str, now: float, ttl: float, pending_ttl: float) -> Optional[InteractionRecord]:
+        try:
+            self._client.put_item(
+                TableName=self.table,
+                Item={'key': {'S': key}, 'status': {'S': 'pending'}, 'updated_at': {'N': repr(now)},
+                      'expires_at': {'N': str(int(now + ttl))}},
+                ConditionExpression="attribute_not_exists(#key) "
+                                    "OR (#status = :done AND updated_at < :done_before) "
+                                    "OR (#status = :pending AND updated_at < :pending_before)",
+                ExpressionAttributeNames={'#key': 'key', '#status': 'status'},
+                ExpressionAttributeValues={':done': {'S': 'done'}, ':pending': {'S': 'pending'},
+                                           ':done_before': {'N': repr(now - ttl)},
+                                           ':pending_before': {'N': repr(now - pending_ttl)}},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+            return None
+        except self._client.exceptions.ConditionalCheckFailedException as e:
+            item = e.response.get('Item') or {}
+            return InteractionRecord(
+                key=key,
+                status=item.get('status', {}).get('S', 'pending'),
+                result=item['result']['S'] if 'result' in item else None,
+                updated_at=float(item['updated_at']['N']) if 'updated_at' in item else now
+            )
+
+    def complete(self, key: str, result: str, now: float) -> None:
+        names = {'#key': 'key', '#status': 'status'}
+        values = {':done': {'S': 'done'}, ':now': {'N': repr(now)}, ':expires': {'N': str(int(now + self.ttl))}}
+        update = "SET #status = :done, updated_at = :now, expires_at = :expires"
+        if result is not None:
+            update += ", #result = :result"
+            names['#result'] = 'result'
+            values[':result'] = {'S': result}
+        try:
+            self._client.update_item(
+                TableName=self.table, Key={'key': {'S': key}}, UpdateExpression=update,
+                ConditionExpression="attribute_exists(#key)",
+                ExpressionAttributeNames=names, ExpressionAttributeValues=values
+            )
+        except self._client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    def release(self, key: str) -> None:
+        try:
+            self._client.delete_item(
+                TableName=self.table, Key={'key': {'S': key}}, ConditionExpression="#status = :pending",
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':pending': {'S': 'pending'}}
+            )
+        except self._client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    def purge(self, older_than: float, max_entries: int) -> int:
+        # 만료된 기록은 테이블 TTL (expires_at) 로 삭제
+        return 0
+
+def create_interaction_store() -> InteractionStore:
+    """INTERACTION_TABLE 이 있으면 DynamoDB 공유 저장소, 없으면 로컬 SQLite 저장소 (컨테이너마다 따로 기록)"""
+    table = os.environ.get('INTERACTION_TABLE')
+    return DynamoInteractionStore(table) if table else SQLiteInteractionStore()
+
+class InteractionDeduplicator:
+    """같은 상호작용은 한 번만 처리하고 반복 요청에는 첫 응답을 재사용"""
+
+    def __init__(self, store: InteractionStore, ttl: float = 600.0, pending_ttl: float = 120.0,
+                 max_entries: int = 5000, purge_every: int = 100):
+        self.store = store
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._begun = 0
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Optional[InteractionRecord]:
+        """처음 들어온 상호작용이면 None, 반복이면 기존 기록 반환"""
+        now = time.time()
+        with self._lock:
+            self._begun += 1
+            purge = self._begun % self.purge_every == 0
+        if purge:
+            self.store.purge(now - self.ttl, self.max_entries)
+        return self.store.begin(key, now, self.ttl, self.pending_ttl)
+
+    def complete(self, key: str, result: str) -> None:
+        self.store.complete(key, result, time.time())
+
+    def release(self, key: str) -> None:
+        self.store.release(key)
+
+_deduplicator: Optional[InteractionDeduplicator] = None
+_deduplicator_lock = threading.Lock()
+
+def get_interaction_deduplicator() -> InteractionDeduplicator:
+    """컨테이너 공용 상호작용 중복 제거기"""
+    global _deduplicator
+    with _deduplicator_lock:
+        if _deduplicator is None:
+            _deduplicator = InteractionDeduplicator(
+                create_interaction_store(),
+                ttl=float(os.environ.get('INTERACTION_DEDUP_TTL', '600')),
+                max_entries=int(os.environ.get('INTERACTION_DEDUP_MAX_ENTRIES', '5000'))
+            )
+        return _deduplicator
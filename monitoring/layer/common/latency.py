@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from .tracing import span
+from .resilience import aws_client
+
+logger = logging.getLogger(__name__)
+
+LATENCY_NAMESPACE = "Monitoring/Delivery"
+LATENCY_METRIC_NAME = "DeliveryLatency"
+# put_metric_data 의 Values / Counts 배열 최대 길이
+MAX_METRIC_VALUES = 150
+MAX_METRIC_DATA = 1000
+# 구간당 하위 구간 수 (2^n 구간마다 선형 분할, 상대 오차 약 1/SUB_BUCKETS)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+def parse_source_time(value: Any) -> Optional[float]:
+    """이벤트 시각(epoch 초 / 밀리초 숫자, ISO 8601 문자열)을 epoch 초로 변환"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        # Batch createdAt 등 밀리초 단위 값
+        return value / 1000 if value > 1e11 else float(value)
+    text = str(value).strip()
+    try:
+        number = float(text)
+    except ValueError:
+        pass
+    else:
+        return number / 1000 if number > 1e11 else number
+    try:
+        # Python 3.11 부터 'Z' 와 CloudWatch 알람 StateChangeTime 의 '+0000' 형식 시간대를 바로 파싱
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        logger.warning(f"Unparseable source time: {value}")
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def event_source_time(event: Dict[str, Any]) -> Optional[float]:
+    """알림 원인 이벤트의 발생 시각 (SNS 알람 StateChangeTime, EventBridge time, Batch createdAt 순)"""
+    if 'Records' in event:
+        sns = event['Records'][0].get('Sns', {})
+        try:
+            message = json.loads(sns.get('Message') or '{}')
+        except ValueError:
+            message = {}
+        if isinstance(message, dict):
+            source_time = event_source_time(message)
+            if source_time is not None:
+                return source_time
+        return parse_source_time(sns.get('Timestamp'))
+    for key in ('StateChangeTime', 'time', 'timestamp'):
+        if event.get(key):
+            return parse_source_time(event[key])
+    return parse_source_time((event.get('detail') or {}).get('createdAt'))
+
+class LatencyHistogram:
+    """로그-선형 구간 히스토그램 (2의 거듭제곱 구간을 SUB_BUCKETS 개로 나눠 밀리초 단위 기록)"""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @staticmethod
+    def bucket_index(value_ms: float) -> int:
+        value = max(int(value_ms), 0)
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 1 - SUB_BUCKET_BITS
+        return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def bucket_bounds(index: int) -> Tuple[int, int]:
+        """구간의 [하한, 상한) 값"""
+        if index < SUB_BUCKETS:
+            return index, index + 1
+        shift = index // SUB_BUCKETS - 1
+        lower = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+        return lower, lower + (1 << shift)
+
+    def record(self, value_ms: float, count: int = 1) -> None:
+        index = self.bucket_index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value_ms * count
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q 분위 값 (구간 중앙값, 최대값을 넘지 않음)"""
+        if not self.total:
+            return None
+        rank = max(q / 100 * self.total, 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lower, upper = self.bucket_bounds(index)
+                return min((lower + upper - 1) / 2, self.max)
+        return self.max
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """(구간 대표값, 건수) 목록"""
+        for index in sorted(self.counts):
+            lower, upper = self.bucket_bounds(index)
+            yield (lower + upper - 1) / 2, self.counts[index]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.total,
+            'avg': round(self.sum / self.total, 1) if self.total else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+class LatencyRecorder:
+    """서비스 / 알림 종류별 전송 지연 히스토그램 (CloudWatch 로 내보낸 뒤 초기화)
+
+    Lambda 에서는 핸들러가 끝날 때마다 (export_latency), 계속 실행되는 프로세스에서는 아웃박스 전송 스레드가
+    export_interval 마다 내보냄.
+    """
+
+    def __init__(self, cloudwatch_client=None, export_interval: float = 60.0,
+                 namespace: str = LATENCY_NAMESPACE):
+        self.cloudwatch = cloudwatch_client
+        self.export_interval = export_interval
+        self.namespace = namespace
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._exported_at = time.monotonic()
+
+    def observe(self, service: str, alert_type: str, source_time: float,
+                delivered_at: float) -> float:
+        """원인 이벤트 발생부터 슬랙 메시지 생성까지의 지연(밀리초) 기록"""
+        latency_ms = max((delivered_at - source_time) * 1000, 0.0)
+        with self._lock:
+            self._histograms.setdefault((service, alert_type), LatencyHistogram()).record(latency_ms)
+        return latency_ms
+
+    def maybe_export(self) -> bool:
+        if time.monotonic() - self._exported_at < self.export_interval:
+            return False
+        self.export()
+        return True
+
+    def export(self) -> None:
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+            self._exported_at = time.monotonic()
+        if not histograms:
+            return
+
+        metric_data = []
+        for (service, alert_type), histogram in histograms.items():
+            logger.info(json.dumps({"type": "delivery_latency", "service": service,
+                                    "alert_type": alert_type, **histogram.summary()}))
+            values = list(histogram.buckets())
+            for i in range(0, len(values), MAX_METRIC_VALUES):
+                chunk = values[i:i + MAX_METRIC_VALUES]
+                metric_data.append({
+                    'MetricName': LATENCY_METRIC_NAME,
+                    'Dimensions': [
+                        {'Name': 'Service', 'Value': service},
+                        {'Name': 'AlertType', 'Value': alert_type}
+                    ],
+                    'Values': [value for value, _ in chunk],
+                    'Counts': [float(count) for _, count in chunk],
+                    'Unit': 'Milliseconds'
+                })
+
+        try:
+            cloudwatch = self.cloudwatch or aws_client('cloudwatch')
+            for i in range(0, len(metric_data), MAX_METRIC_DATA):
+                with span('cloudwatch.put_metric_data', metrics=len(metric_data[i:i + MAX_METRIC_DATA])):
+                    cloudwatch.put_metric_data(Namespace=self.namespace,
+                                               MetricData=metric_data[i:i + MAX_METRIC_DATA])
+        except Exception as e:
+            logger.error(f"Failed to export delivery latency: {str(e)}")
+
+_latency_recorder: Optional[LatencyRecorder] = None
+_latency_recorder_lock = threading.Lock()
+
+def get_latency_recorder() -> LatencyRecorder:
+    """컨테이너 공용 지연 기록기"""
+    global _latency_recorder
+    with _latency_recorder_lock:
+        if _latency_recorder is None:
+            _latency_recorder = LatencyRecorder(
+                export_interval=float(os.environ.get('LATENCY_EXPORT_INTERVAL', '60'))
+            )
+        return _latency_recorder
+
+def export_latency(func: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """핸들러가 끝날 때 (예외 포함) 지연 히스토그램을 내보냄 (표본은 컨테이너 메모리에만 있어 멈추거나 회수되면 유실)
+
+    내보내기도 호출 마감 안에서 끝나도록 deadline_handler 안쪽에 적용.
+    """
+
+    @wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        try:
+            return func(event, context)
+        finally:
+            get_latency_recorder().export()
+
+    return wrapper
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+# 로컬 상태 저장 경로 (Lambda에서는 /tmp만 쓰기 가능)
+STATE_DIR_ENV = "MONITORING_STATE_DIR"
+
+def state_path(filename: str) -> str:
+    """로컬 상태 파일 경로 생성"""
+    state_dir = os.environ.get(STATE_DIR_ENV, '/tmp')
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, filename)
+
+class SQLiteStore:
+    """로컬 SQLite 저장소 공통 로직"""
+
+    FILENAME = "monitoring.sqlite3"
+    SCHEMA = ""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path(self.FILENAME)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False,
+                                     isolation_level=None, timeout=5.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self.SCHEMA:
+            self._conn.executescript(self.SCHEMA)
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
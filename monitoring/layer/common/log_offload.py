@@ -0,0 +1,185 @@
+import os
+import logging
+import tempfile
+import threading
+import http.client
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+from .tracing import span
+from .resilience import call_timeout, deadline_reached
+
+logger = logging.getLogger(__name__)
+
+# 인라인 메시지에 싣는 미리보기 크기 (슬랙 section 텍스트 제한 3000자 이내)
+PREVIEW_STACK_TRACE_CHARS = 1500
+PREVIEW_LOG_LINES = 20
+PREVIEW_LOG_CHARS = 1000
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def iter_log_events(logs_client, log_group: str, filter_pattern: str,
+                    start_time: int, end_time: int) -> Iterator[Dict[str, Any]]:
+    """filter_log_events 페이지를 순서대로 읽으며 이벤트 단위로 반환 (한 번에 한 페이지만 메모리에 유지)"""
+    paginator = logs_client.get_paginator('filter_log_events')
+    pages = paginator.paginate(
+        logGroupName=log_group,
+        filterPattern=filter_pattern,
+        startTime=start_time,
+        endTime=end_time
+    )
+    for page in pages:
+        yield from page.get('events', [])
+        # 마감이 가까우면 다음 페이지를 요청하지 않고 받은 로그까지만 사용
+        if deadline_reached():
+            logger.warning(f"Stopped reading {log_group} before deadline")
+            return
+
+class LogPreview:
+    """로그 이벤트의 크기 제한된 미리보기 (스택 트레이스 앞부분, 관련 로그 마지막 몇 줄, 건수)"""
+
+    def __init__(self, stack_trace_chars: int = PREVIEW_STACK_TRACE_CHARS,
+                 log_lines: int = PREVIEW_LOG_LINES, log_chars: int = PREVIEW_LOG_CHARS):
+        self.stack_trace_chars = stack_trace_chars
+        self.log_chars = log_chars
+        self.stack_trace = ""
+        self.related_logs = deque(maxlen=log_lines)
+        self.event_count = 0
+        self.stack_trace_count = 0
+        self.truncated = False
+
+    def add(self, message: str) -> None:
+        self.event_count += 1
+        if 'Traceback' in message:
+            self.stack_trace_count += 1
+            self.add_stack_trace(message)
+        else:
+            self.add_related_log(message)
+
+    def add_stack_trace(self, message: str) -> None:
+        if len(self.stack_trace) >= self.stack_trace_chars:
+            self.truncated = True
+            return
+        combined = f"{self.stack_trace}\n{message}" if self.stack_trace else message
+        if len(combined) > self.stack_trace_chars:
+            self.truncated = True
+        self.stack_trace = combined[:self.stack_trace_chars]
+
+    def add_related_log(self, message: str) -> None:
+        if len(self.related_logs) == self.related_logs.maxlen:
+            self.truncated = True
+        self.related_logs.append(message.rstrip("\n"))
+
+    @classmethod
+    def merge(cls, previews: Dict[str, 'LogPreview']) -> 'LogPreview':
+        """대상별 미리보기를 하나로 합치기 (대상이 여럿이면 각 줄 앞에 대상 이름 표시)"""
+        if len(previews) == 1:
+            return next(iter(previews.values()))
+        merged = cls()
+        for label, preview in previews.items():
+            merged.event_count += preview.event_count
+            merged.stack_trace_count += preview.stack_trace_count
+            merged.truncated = merged.truncated or preview.truncated
+            if preview.stack_trace:
+                merged.add_stack_trace(f"[{label}] {preview.stack_trace}")
+            for line in preview.related_logs:
+                merged.add_related_log(f"[{label}] {line}")
+        return merged
+
+    def related_logs_text(self) -> str:
+        text = "\n".join(self.related_logs)
+        if len(text) > self.log_chars:
+            self.truncated = True
+            return "..." + text[-self.log_chars:]
+        return text
+
+class LogSpool:
+    """로그 이벤트를 임시 파일에 순차 기록 (max_bytes 초과분은 버리고 건수만 집계)"""
+
+    def __init__(self, max_bytes: int = 50 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self._file = tempfile.NamedTemporaryFile(mode='wb', prefix='logs-', suffix='.log',
+                                                 dir=directory, delete=False)
+        self.path = self._file.name
+        self.size = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def write(self, message: str) -> None:
+        data = (message.rstrip("\n") + "\n").encode('utf-8')
+        with self._lock:
+            # 제한 시간을 넘긴 대상이 finish 이후에 기록하는 경우도 버림
+            if self._file.closed or self.size + len(data) > self.max_bytes:
+                self.dropped += 1
+                return
+            self._file.write(data)
+            self.size += len(data)
+
+    def finish(self) -> None:
+        with self._lock:
+            self._finish()
+
+    def _finish(self) -> None:
+        if not self._file.closed:
+            if self.dropped:
+                self._file.write(f"... {self.dropped}개 이벤트 생략 (최대 {self.max_bytes} bytes)\n".encode('utf-8'))
+            self._file.close()
+            self.size = os.path.getsize(self.path)
+
+    def close(self) -> None:
+        self.finish()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'LogSpool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def collect_events(events: Iterable[Dict[str, Any]], preview: LogPreview,
+                   spool: Optional[LogSpool] = None, prefix: str = "") -> LogPreview:
+    """이벤트를 한 건씩 미리보기와 임시 파일에 나눠 기록 (spool 마무리는 호출하는 쪽에서 finish)"""
+    for event in events:
+        message = event.get('message', '')
+        preview.add(message)
+        if spool is not None:
+            spool.write(prefix + message)
+    return preview
+
+def upload_file(client, path: str, filename: str, channel: str,
+                thread_ts: Optional[str] = None, title: Optional[str] = None,
+                initial_comment: Optional[str] = None) -> Optional[str]:
+    """파일을 청크 단위로 스트리밍 업로드 후 스레드에 공유 (files_upload_v2 와 같은 외부 업로드 흐름)"""
+    length = os.path.getsize(path)
+    with span('slack.files_upload', bytes=length):
+        upload = client.files_getUploadURLExternal(filename=filename, length=length)
+        _stream_to_url(upload['upload_url'], path, length)
+        client.files_completeUploadExternal(
+            files=[{"id": upload['file_id'], "title": title or filename}],
+            channel_id=channel,
+            thread_ts=thread_ts,
+            initial_comment=initial_comment
+        )
+    return upload['file_id']
+
+def _stream_to_url(url: str, path: str, length: int) -> None:
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=call_timeout(30))
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    try:
+        connection.putrequest('POST', target)
+        connection.putheader('Content-Type', 'application/octet-stream')
+        connection.putheader('Content-Length', str(length))
+        connection.endheaders()
+        with open(path, 'rb') as f:
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                connection.send(chunk)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"File upload failed with status {response.status}")
+    finally:
+        connection.close()
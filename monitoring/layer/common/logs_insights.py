@@ -0,0 +1,182 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .tracing import span
+from .resilience import aws_client, bounded_timeout
+
+# https://docs.aws.amazon.com/AmazonCloudWatch/latest/logs/CWL_QuerySyntax.html
+MAX_LOG_GROUPS_PER_QUERY = 50
+TERMINAL_STATUSES = {"Complete", "Failed", "Cancelled", "Timeout", "Unknown"}
+
+@dataclass
+class InsightsQuery:
+    query_id: str
+    cache_key: Optional[Tuple[Any, ...]]
+    started_at: float
+    rows: Optional[List[Dict[str, str]]] = None  # 캐시 적중 시 시작할 때 받은 결과 (wait 사이에 캐시가 만료되어도 유지)
+
+def escape_regex(value: str) -> str:
+    """Insights 쿼리의 /regex/ 리터럴에 넣을 문자열 이스케이프"""
+    return re.escape(value).replace('/', '\\/')
+
+class LogsInsightsEngine:
+    """CloudWatch Logs Insights 쿼리 실행 (비동기 시작 / 폴링, 결과 캐시)"""
+
+    def __init__(self, logs_client=None, poll_interval: float = 0.5, max_poll_interval: float = 4.0,
+                 timeout: float = 30.0, cache_ttl: float = 300.0, time_bucket: int = 300,
+                 cache_size: int = 128):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logs = logs_client or aws_client('logs')
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.time_bucket = time_bucket  # 캐시 적중률을 위해 조회 구간을 이 단위(초)로 정렬
+        self.cache_size = cache_size  # 캐시에 유지하는 최대 쿼리 결과 수 (오래 사용하지 않은 결과부터 삭제)
+        self._cache: 'OrderedDict[Tuple[Any, ...], Tuple[float, List[Dict[str, str]]]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def align_range(self, start_time: int, end_time: int) -> Tuple[int, int]:
+        """조회 구간(초)을 time_bucket 단위로 정렬"""
+        return (start_time // self.time_bucket * self.time_bucket,
+                end_time // self.time_bucket * self.time_bucket)
+
+    def start(self, query: str, log_groups: Sequence[str], start_time: int, end_time: int,
+              limit: int = 1000) -> List[InsightsQuery]:
+        """쿼리 시작 (로그 그룹 50개 단위로 나눠서 시작, 캐시 적중 시 결과를 담은 빈 id 핸들)"""
+        cache_key = (query, tuple(sorted(log_groups)), start_time, end_time, limit)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return [InsightsQuery(query_id="", cache_key=cache_key, started_at=time.monotonic(), rows=cached)]
+
+        handles = []
+        groups = list(log_groups)
+        for i in range(0, len(groups), MAX_LOG_GROUPS_PER_QUERY):
+            with span('logs.start_query'):
+                response = self.logs.start_query(
+                    logGroupNames=groups[i:i + MAX_LOG_GROUPS_PER_QUERY],
+                    startTime=start_time,
+                    endTime=end_time,
+                    queryString=query,
+                    limit=limit
+                )
+            handles.append(InsightsQuery(query_id=response['queryId'], cache_key=None,
+                                         started_at=time.monotonic()))
+        if len(handles) == 1:
+            handles[0].cache_key = cache_key
+        return handles
+
+    def wait(self, handles: List[InsightsQuery], timeout: Optional[float] = None) -> List[Dict[str, str]]:
+        """시작한 쿼리들을 함께 폴링해서 결과 병합 (시간 초과 시 중지 후 받은 결과만 반환)"""
+        rows: List[Dict[str, str]] = []
+        pending = []
+        for handle in handles:
+            if handle.rows is not None:
+                rows.extend(handle.rows)
+            elif handle.query_id:
+                pending.append(handle)
+
+        deadline = time.monotonic() + bounded_timeout(timeout or self.timeout)
+        interval = self.poll_interval
+        with span('logs.get_query_results'):
+            while pending:
+                time.sleep(interval)
+                still_pending = []
+                for handle in pending:
+                    response = self.logs.get_query_results(queryId=handle.query_id)
+                    if response['status'] not in TERMINAL_STATUSES:
+                        still_pending.append(handle)
+                        continue
+                    if response['status'] != "Complete":
+                        self.logger.error(f"Insights query {handle.query_id} ended with {response['status']}")
+                        continue
+                    result = [self._to_row(item) for item in response.get('results', [])]
+                    if handle.cache_key:
+                        self._put_cached(handle.cache_key, result)
+                    rows.extend(result)
+                pending = still_pending
+                if pending and time.monotonic() >= deadline:
+                    for handle in pending:
+                        self._stop_query(handle.query_id)
+                    self.logger.warning(f"{len(pending)} Insights queries timed out")
+                    break
+                interval = min(interval * 1.5, self.max_poll_interval)
+        return rows
+
+    def run(self, query: str, log_groups: Sequence[str], start_time: int, end_time: int,
+            limit: int = 1000, timeout: Optional[float] = None) -> List[Dict[str, str]]:
+        return self.wait(self.start(query, log_groups, start_time, end_time, limit), timeout)
+
+    def run_per_group(self, query: str, log_groups: Sequence[str], start_time: int, end_time: int,
+                      limit: int = 1000, timeout: Optional[float] = None) -> Dict[str, List[Dict[str, str]]]:
+        """로그 그룹별 쿼리를 동시에 시작한 뒤 함께 폴링"""
+        handles = {group: self.start(query, [group], start_time, end_time, limit) for group in log_groups}
+        deadline = time.monotonic() + (timeout or self.timeout)
+        return {group: self.wait(group_handles, max(deadline - time.monotonic(), 0.1))
+                for group, group_handles in handles.items()}
+
+    def start_hourly_counts(self, log_groups: Sequence[str], pattern: str, hours: int = 24,
+                            bin_size: str = "1h") -> List[InsightsQuery]:
+        """패턴이 포함된 로그 수를 구간별로 집계하는 쿼리 시작 (집계는 서버에서 수행)"""
+        query = (f"filter @message like /{escape_regex(pattern)}/ "
+                 f"| stats count(*) as count by bin({bin_size}) as bucket "
+                 f"| sort bucket asc")
+        end_time = int(time.time())
+        start_time, end_time = self.align_range(end_time - hours * 3600, end_time)
+        return self.start(query, log_groups, start_time, end_time, limit=10000)
+
+    def wait_counts(self, handles: List[InsightsQuery],
+                    timeout: Optional[float] = None) -> List[Tuple[str, int]]:
+        """집계 쿼리 결과를 (구간, 건수) 목록으로 병합"""
+        counts: Dict[str, int] = {}
+        for row in self.wait(handles, timeout):
+            counts[row['bucket']] = counts.get(row['bucket'], 0) + int(row.get('count', 0))
+        return sorted(counts.items())
+
+    def _stop_query(self, query_id: str) -> None:
+        try:
+            self.logs.stop_query(queryId=query_id)
+        except Exception as e:
+            self.logger.error(f"Failed to stop Insights query {query_id}: {str(e)}")
+
+    def _get_cached(self, key: Optional[Tuple[Any, ...]]) -> Optional[List[Dict[str, str]]]:
+        if key is None:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                return entry[1]
+            self._cache.pop(key, None)
+            return None
+
+    def _put_cached(self, key: Tuple[Any, ...], rows: List[Dict[str, str]]) -> None:
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), rows)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _to_row(fields: List[Dict[str, str]]) -> Dict[str, str]:
+        return {item['field']: item['value'] for item in fields if not item['field'].startswith('@ptr')}
+
+_default_engine: Optional[LogsInsightsEngine] = None
+_default_engine_lock = threading.Lock()
+
+def get_insights_engine() -> LogsInsightsEngine:
+    """컨테이너 공용 엔진 (호출 간 쿼리 결과 캐시 유지)"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = LogsInsightsEngine(
+                timeout=float(os.environ.get('LOGS_INSIGHTS_TIMEOUT', '30')),
+                cache_ttl=float(os.environ.get('LOGS_INSIGHTS_CACHE_TTL', '300')),
+                cache_size=int(os.environ.get('LOGS_INSIGHTS_CACHE_SIZE', '128'))
+            )
+        return _default_engine
@@ -1,6 +1,54 @@
-from typing import Dict, Any, List
-from datetime import datetime
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import quote
 from .constant import ServiceType
+from .targets import DEFAULT_REGION
+from .flood import FloodSummary
+from .run_history import PHASES, PHASE_NAMES, PhaseComparison
+from .fleet_sweep import ServiceChange
+from .thresholds import ThresholdBreach
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+BATCH_STATUS_EMOJI = {
+    "SUBMITTED": "📥",
+    "PENDING": "⏳",
+    "RUNNABLE": "⏳",
+    "STARTING": "🚀",
+    "RUNNING": "🔄",
+    "SUCCEEDED": "✅",
+    "FAILED": "❌"
+}
+# 섹션 블록 텍스트 최대 길이
+SECTION_TEXT_LIMIT = 3000
+INCIDENT_CONTEXT_ACTION = "view_incident_context"
+FLOOD_PHASE_TITLE = {
+    "started": "🌊 에러 폭주 모드 시작",
+    "ongoing": "🌊 에러 폭주 요약",
+    "ended": "✅ 에러 폭주 종료"
+}
+# 폭주 요약에 표시할 패턴 / 로그 그룹 수와 상세 로그 버튼 수
+FLOOD_TOP_COUNTS = 10
+FLOOD_SAMPLE_BUTTONS = 5
+
+def sparkline(values: List[float]) -> str:
+    """값 목록을 막대 문자열로 변환 (0은 공백)"""
+    peak = max(values, default=0)
+    return "".join(
+        SPARK_CHARS[min(int(value * len(SPARK_CHARS) // (peak + 1)), len(SPARK_CHARS) - 1)]
+        if value else " " for value in values
+    )
+
+def _encode_ids(ids: Dict[str, str]) -> str:
+    """문자열 ID 맵을 json.dumps(separators=(',', ':')) 와 같은 JSON 으로 인코딩 (호출마다 인코더를 만들지 않음)"""
+    return "{" + ",".join([f"{encode_basestring_ascii(key)}:{encode_basestring_ascii(value)}"
+                           for key, value in ids.items()]) + "}"
+
+@lru_cache(maxsize=64)
+def _console_log_group(log_group: str) -> str:
+    """콘솔 URL 의 로그 그룹 경로는 '/' 를 $252F 로 인코딩"""
+    return quote(log_group, safe='').replace('%', '$25')
 
 class MessageTemplate:
     """메시지 템플릿 관리 클래스"""
@@ -63,13 +111,26 @@ class MessageTemplate:
 
     @staticmethod
     def batch_block(job_name: str, status: str, job_id: str, 
-                   batch_url: str) -> List[Dict[str, Any]]:
-        status_emoji = {
-            "SUCCEEDED": "✅",
-            "FAILED": "❌"
-        }.get(status, "🔄")
+                   batch_url: str, queued_time: Optional[str] = None,
+                   run_time: Optional[str] = None,
+                   status_reason: Optional[str] = None) -> List[Dict[str, Any]]:
+        status_emoji = BATCH_STATUS_EMOJI.get(status, "🔄")
+        fields = [
+            {
+                "type": "mrkdwn",
+                "text": f"*작업명:*\n{job_name}"
+            },
+            {
+                "type": "mrkdwn",
+                "text": f"*상태:*\n{status}"
+            }
+        ]
+        if queued_time:
+            fields.append({"type": "mrkdwn", "text": f"*대기 시간:*\n{queued_time}"})
+        if run_time:
+            fields.append({"type": "mrkdwn", "text": f"*실행 시간:*\n{run_time}"})
         
-        return [
+        blocks = [
             {
                 "type": "header",
                 "text": {
@@ -79,16 +140,7 @@ class MessageTemplate:
             },
             {
                 "type": "section",
-                "fields": [
-                    {
-                        "type": "mrkdwn",
-                        "text": f"*작업명:*\n{job_name}"
-                    },
-                    {
-                        "type": "mrkdwn",
-                        "text": f"*상태:*\n{status}"
-                    }
-                ]
+                "fields": fields
             },
             {
                 "type": "actions",
@@ -114,6 +166,12 @@ class MessageTemplate:
                 ]
             }
         ]
+        if status_reason and status == "FAILED":
+            blocks.insert(2, {
+                "type": "context",
+                "elements": [{"type": "mrkdwn", "text": f"사유: {status_reason[:200]}"}]
+            })
+        return blocks
 
     @staticmethod
     def rag_block(accuracy: float, threshold: float, 
@@ -156,46 +214,431 @@ class MessageTemplate:
             }
         ]
 
+    @staticmethod
+    def threshold_breach_block(text: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": text[:SECTION_TEXT_LIMIT]
+                }
+            }
+        ]
+
+    @staticmethod
+    def run_history_block(warning: Optional[str], history: str) -> List[Dict[str, Any]]:
+        blocks: List[Dict[str, Any]] = []
+        if warning:
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": warning
+                }
+            })
+        blocks.append({
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": history}]
+        })
+        return blocks
+
+    @staticmethod
+    def fleet_status_block(title: str, service_nm: str, transition: str, details: str,
+                           period_end: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": title
+                }
+            },
+            {
+                "type": "section",
+                "fields": [
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*서비스:*\n{service_nm}"
+                    },
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*상태:*\n{transition}"
+                    }
+                ]
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": details
+                }
+            },
+            {
+                "type": "context",
+                "elements": [{"type": "mrkdwn", "text": f"{period_end} 까지의 지표 기준 (상태가 바뀔 때만 전송)"}]
+            }
+        ]
+
+    @staticmethod
+    def error_trend_block(hourly_counts: List[int], daily_counts: List[Tuple[str, int]],
+                          peak_time: str, peak_count: int) -> List[Dict[str, Any]]:
+        daily = "\n".join(f"{day}  {count:>6,}" for day, count in daily_counts)
+        return [
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"📈 *에러 발생 추이* (총 {sum(count for _, count in daily_counts):,}건)"
+                }
+            },
+            {
+                "type": "section",
+                "fields": [
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*최근 24시간:*\n`{sparkline(hourly_counts)}` {sum(hourly_counts):,}건"
+                    },
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*최다 발생 시간:*\n{peak_time} ({peak_count:,}건)"
+                    }
+                ]
+            },
+            {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"```{daily}```"
+                }
+            }
+        ]
+
+    @staticmethod
+    def incident_button(ids: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "type": "button",
+            "text": {
+                "type": "plain_text",
+                "text": "인시던트 컨텍스트"
+            },
+            "action_id": INCIDENT_CONTEXT_ACTION,
+            "value": _encode_ids(ids)
+        }
+
+    @staticmethod
+    def incident_context_block(sections: List[Tuple[str, str]], footer: str) -> List[Dict[str, Any]]:
+        blocks: List[Dict[str, Any]] = [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": "🧭 인시던트 컨텍스트"
+                }
+            }
+        ]
+        for title, text in sections:
+            body = f"*{title}*\n{text}"
+            if len(body) > SECTION_TEXT_LIMIT:
+                body = body[:SECTION_TEXT_LIMIT - 4] + "\n…"
+            blocks.append({"type": "divider"})
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": body
+                }
+            })
+        blocks.append({
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": footer}]
+        })
+        return blocks
+
+    @staticmethod
+    def flood_summary_block(title: str, fields: List[Tuple[str, str]], sections: List[Tuple[str, str]],
+                            sample_ids: List[str], footer: str) -> List[Dict[str, Any]]:
+        blocks: List[Dict[str, Any]] = [
+            {
+                "type": "header",
+                "text": {
+                    "type": "plain_text",
+                    "text": title
+                }
+            },
+            {
+                "type": "section",
+                "fields": [
+                    {
+                        "type": "mrkdwn",
+                        "text": f"*{name}:*\n{value}"
+                    } for name, value in fields
+                ]
+            }
+        ]
+        for name, text in sections:
+            body = f"*{name}*\n{text}"
+            if len(body) > SECTION_TEXT_LIMIT:
+                body = body[:SECTION_TEXT_LIMIT - 4] + "```…"
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": body
+                }
+            })
+        if sample_ids:
+            blocks.append({
+                "type": "actions",
+                "elements": [
+                    {
+                        "type": "button",
+                        "text": {
+                            "type": "plain_text",
+                            "text": f"표본 {i} 상세 로그"
+                        },
+                        "action_id": f"view_error_detail_{i}",
+                        "value": error_id
+                    } for i, error_id in enumerate(sample_ids, 1)
+                ]
+            })
+        blocks.append({
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": footer}]
+        })
+        return blocks
+
 class MessageBlockBuilder:
     """메시지 블록 생성 클래스"""
     
     @classmethod
     def create_error_blocks(cls, service_type: ServiceType, error_msg: str, 
-                          error_id: str) -> List[Dict[str, Any]]:
-        return MessageTemplate.error_block(
+                          error_id: str, region: Optional[str] = None,
+                          related: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """related 는 인시던트 컨텍스트에서 함께 조회할 job_id / pipeline_id"""
+        blocks = MessageTemplate.error_block(
             service_nm=service_type.value.description,
             error_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             error_msg=error_msg,
             error_id=error_id,
-            cloudwatch_url=cls._get_cloudwatch_url(service_type, error_id)
+            cloudwatch_url=cls._get_cloudwatch_url(service_type, error_id, region)
         )
+        return cls._add_incident_button(blocks, {"error_id": error_id, **(related or {})})
 
     @classmethod
     def create_batch_blocks(cls, service_type: ServiceType, job_name: str,
-                          status: str, job_id: str) -> List[Dict[str, Any]]:
-        return MessageTemplate.batch_block(
+                          status: str, job_id: str, region: Optional[str] = None,
+                          created_at: Optional[int] = None, started_at: Optional[int] = None,
+                          stopped_at: Optional[int] = None,
+                          status_reason: Optional[str] = None,
+                          comparisons: Optional[List[PhaseComparison]] = None,
+                          breaches: Optional[List[ThresholdBreach]] = None) -> List[Dict[str, Any]]:
+        """created_at / started_at / stopped_at 은 Batch 이벤트의 epoch 밀리초, comparisons 는 이전 실행 분위수 비교,
+        breaches 는 processedStats 임계값 위반"""
+        now = int(datetime.now().timestamp() * 1000) if created_at or started_at else 0
+        queued_time = run_time = None
+        if created_at:
+            queued_time = cls._format_duration((started_at or now) - created_at)
+        if started_at:
+            run_time = cls._format_duration((stopped_at or now) - started_at)
+        blocks = MessageTemplate.batch_block(
             job_name=job_name,
             status=status,
             job_id=job_id,
-            batch_url=cls._get_batch_url(job_id)
+            batch_url=cls._get_batch_url(job_id, region),
+            queued_time=queued_time,
+            run_time=run_time,
+            status_reason=status_reason
         )
+        if comparisons:
+            # 상태 필드 바로 아래에 회귀 경고와 분위수 비교 추가
+            blocks[2:2] = MessageTemplate.run_history_block(*cls.format_run_comparisons(comparisons))
+        if breaches:
+            blocks[2:2] = MessageTemplate.threshold_breach_block(cls.format_threshold_breaches(breaches))
+        return cls._add_incident_button(blocks, {"job_id": job_id})
+
+    @classmethod
+    def format_run_comparisons(cls, comparisons: List[PhaseComparison]) -> Tuple[Optional[str], str]:
+        """(회귀 경고, 구간별 이번 실행 / p50 / p95 비교) 텍스트"""
+        ordered = sorted(comparisons, key=lambda c: PHASES.index(c.phase) if c.phase in PHASES else len(PHASES))
+        regressions = [c for c in ordered if c.regression]
+        warning = None
+        if regressions:
+            warning = "⚠️ *실행 시간 회귀:* " + ", ".join(
+                f"{PHASE_NAMES.get(c.phase, c.phase)} {c.ratio:.1f}배 (p50 {cls._format_seconds(c.p50)})"
+                for c in regressions
+            )
+        parts = []
+        for c in ordered:
+            text = f"{PHASE_NAMES.get(c.phase, c.phase)} {cls._format_seconds(c.value)}"
+            if c.p50 is not None:
+                text += f" (p50 {cls._format_seconds(c.p50)} · p95 {cls._format_seconds(c.p95)})"
+            parts.append(text)
+        runs = max(c.runs for c in ordered)
+        history = " / ".join(parts) + (f" · 이전 {runs}회 기준" if runs else " · 첫 실행")
+        return warning, history
+
+    @classmethod
+    def format_threshold_breaches(cls, breaches: List[ThresholdBreach]) -> str:
+        """임계값을 위반한 지표별 값 / 임계값과 개선 제안"""
+        lines = ["⚠️ *임계값 위반:*"]
+        for breach in breaches:
+            text = (f"• {breach.metric} {cls._format_metric(breach.value)} "
+                    f"{'>' if breach.higher_is_bad else '<'} {cls._format_metric(breach.threshold)}")
+            lines.append(f"{text} · {breach.suggestion}" if breach.suggestion else text)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_metric(value: float) -> str:
+        return f"{value:,.0f}" if float(value).is_integer() else f"{value:.2f}"
 
     @classmethod
     def create_rag_blocks(cls, service_type: ServiceType, accuracy: float,
-                         threshold: float, pipeline_id: str) -> List[Dict[str, Any]]:
-        return MessageTemplate.rag_block(
+                         threshold: float, pipeline_id: str,
+                         breaches: Optional[List[ThresholdBreach]] = None) -> List[Dict[str, Any]]:
+        """breaches 는 임계값 규칙을 위반한 지표 (정확도 외 지표 포함)"""
+        blocks = MessageTemplate.rag_block(
             accuracy=accuracy,
             threshold=threshold,
             pipeline_id=pipeline_id
         )
+        if breaches:
+            blocks[2:2] = MessageTemplate.threshold_breach_block(cls.format_threshold_breaches(breaches))
+        return cls._add_incident_button(blocks, {"pipeline_id": pipeline_id})
+
+    @classmethod
+    def create_error_trend_blocks(cls, counts: List[Tuple[str, int]],
+                                  now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Insights 시간대별 집계 결과 (bin 시작 시각, 건수) 를 추이 블록으로 변환"""
+        if not counts:
+            return []
+        hourly: Dict[datetime, int] = {}
+        for bucket, count in counts:
+            hour = datetime.strptime(bucket[:19], '%Y-%m-%d %H:%M:%S')
+            hourly[hour] = hourly.get(hour, 0) + count
+
+        # 집계 결과에는 건수가 0인 구간이 없으므로 최근 24시간을 0으로 채움
+        last_hour = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        hourly_counts = [hourly.get(last_hour - timedelta(hours=i), 0) for i in range(23, -1, -1)]
+
+        daily: Dict[str, int] = {}
+        for hour, count in sorted(hourly.items()):
+            day = hour.strftime('%m-%d')
+            daily[day] = daily.get(day, 0) + count
+        peak_hour, peak_count = max(hourly.items(), key=lambda item: item[1])
+
+        return MessageTemplate.error_trend_block(
+            hourly_counts=hourly_counts,
+            daily_counts=list(daily.items()),
+            peak_time=peak_hour.strftime('%m-%d %H:00 UTC'),
+            peak_count=peak_count
+        )
+
+    @classmethod
+    def create_incident_context_blocks(cls, sections: List[Tuple[str, str]],
+                                       timings: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """원본별 (제목, 내용) 섹션과 (원본, 소요시간 / 상태) 를 한 메시지로 구성"""
+        footer = " · ".join(f"{name} {timing}" for name, timing in timings)
+        return MessageTemplate.incident_context_block(sections, footer)
+
+    @classmethod
+    def create_flood_summary_blocks(cls, service_type: ServiceType,
+                                    summary: FloodSummary) -> List[Dict[str, Any]]:
+        """폭주 모드 요약 (구간 건수, 패턴 / 로그 그룹별 건수, 대표 표본)"""
+        period = cls._format_duration(int((summary.period_end - summary.period_start) * 1000))
+        fields = [
+            ("서비스", service_type.value.description),
+            ("최근 발생률", f"{summary.rate:,.0f}건 / {summary.window:.0f}초"),
+            ("이번 구간", f"{summary.count:,}건 ({period})"),
+            ("폭주 시작 이후", f"{summary.total:,}건")
+        ]
+        sections = []
+        if summary.signatures:
+            lines = [f"{count:>7,}  {signature[:120]}"
+                     for signature, count in summary.signatures[:FLOOD_TOP_COUNTS]]
+            sections.append(("메시지 패턴별 건수", "```" + "\n".join(lines) + "```"))
+        if len(summary.log_groups) > 1:
+            lines = [f"{count:>7,}  {log_group}" for log_group, count in summary.log_groups[:FLOOD_TOP_COUNTS]]
+            sections.append(("로그 그룹별 건수", "```" + "\n".join(lines) + "```"))
+        if summary.samples:
+            lines = [f"{i}. [{datetime.fromtimestamp(sample.at).strftime('%H:%M:%S')}] "
+                     f"{sample.message.strip().split(chr(10), 1)[0][:200]}"
+                     for i, sample in enumerate(summary.samples, 1)]
+            sections.append((f"대표 표본 {len(summary.samples)}건", "```" + "\n".join(lines) + "```"))
+
+        if summary.phase == "ended":
+            footer = (f"폭주 시작 {datetime.fromtimestamp(summary.started_at).strftime('%Y-%m-%d %H:%M:%S')}"
+                      f" · 지금부터 에러를 개별 알림으로 전송합니다.")
+        else:
+            footer = "폭주가 끝날 때까지 개별 알림 대신 주기적으로 요약을 전송합니다."
+        return MessageTemplate.flood_summary_block(
+            title=f"{FLOOD_PHASE_TITLE.get(summary.phase, FLOOD_PHASE_TITLE['ongoing'])}",
+            fields=fields,
+            sections=sections,
+            sample_ids=[sample.error_id for sample in summary.samples if sample.error_id][:FLOOD_SAMPLE_BUTTONS],
+            footer=footer
+        )
+
+    @classmethod
+    def create_fleet_status_blocks(cls, service_type: ServiceType,
+                                   change: ServiceChange) -> List[Dict[str, Any]]:
+        """상태가 바뀐 서비스의 스윕 결과 (초과한 규칙과 값)"""
+        lines = []
+        for breach in change.breaches:
+            operator = ">" if breach.higher_is_bad else "<"
+            target = f" ({breach.log_group})" if breach.log_group else ""
+            lines.append(f"• {breach.label}{target}: {breach.value:,.0f} {operator} {breach.threshold:,.0f}")
+        return MessageTemplate.fleet_status_block(
+            title="🔴 서비스 상태 이상" if change.state == "ALERT" else "🟢 서비스 상태 정상",
+            service_nm=service_type.value.description,
+            transition=f"{change.previous} → {change.state}",
+            details="\n".join(lines) or "모든 지표가 임계값 이내입니다.",
+            period_end=datetime.fromtimestamp(change.period_end).strftime('%Y-%m-%d %H:%M')
+        )
+
+    @staticmethod
+    def format_recent_metrics(metrics: Dict[str, Any]) -> str:
+        """최근 메트릭을 막대 그래프 텍스트로 변환"""
+        lines = [
+            f"{series['label']}: `{sparkline(series['values'])}` {series['summary']:,.0f}"
+            for series in metrics.get("series", [])
+        ]
+        if not lines:
+            return "메트릭 데이터를 찾을 수 없습니다."
+        lines.append(f"최근 {metrics['hours']}시간, {metrics['period'] // 60}분 단위")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _add_incident_button(blocks: List[Dict[str, Any]], ids: Dict[str, str]) -> List[Dict[str, Any]]:
+        for block in blocks:
+            if block["type"] == "actions":
+                block["elements"].append(MessageTemplate.incident_button(ids))
+        return blocks
+
+    @staticmethod
+    def _format_duration(milliseconds: int) -> str:
+        seconds = max(int(milliseconds // 1000), 0)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        if hours:
+            return f"{hours}시간 {minutes}분"
+        if minutes:
+            return f"{minutes}분 {seconds}초"
+        return f"{seconds}초"
+
+    @classmethod
+    def _format_seconds(cls, seconds: Optional[float]) -> str:
+        return "-" if seconds is None else cls._format_duration(int(seconds * 1000))
 
     @staticmethod
-    def _get_cloudwatch_url(service_type: ServiceType, error_id: str) -> str:
-        log_group = service_type.value.log_group
-        return (f"https://ap-northeast-2.console.aws.amazon.com/cloudwatch/home?"
-                f"region=ap-northeast-2#logsV2:log-groups/log-group/{log_group}")
+    def _get_cloudwatch_url(service_type: ServiceType, error_id: str, region: Optional[str] = None) -> str:
+        region = region or DEFAULT_REGION
+        log_group = _console_log_group(service_type.value.log_group)
+        return (f"https://{region}.console.aws.amazon.com/cloudwatch/home?"
+                f"region={region}#logsV2:log-groups/log-group/{log_group}")
 
     @staticmethod
-    def _get_batch_url(job_id: str) -> str:
-        return (f"https://ap-northeast-2.console.aws.amazon.com/batch/home?"
-                f"region=ap-northeast-2#jobs/detail/{job_id}") 
\ No newline at end of file
+    def _get_batch_url(job_id: str, region: Optional[str] = None) -> str:
+        region = region or DEFAULT_REGION
+        return (f"https://{region}.console.aws.amazon.com/batch/home?"
+                f"region={region}#jobs/detail/{job_id}") 
\ No newline at end of file
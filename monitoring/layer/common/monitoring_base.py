@@ -2,14 +2,14 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 import logging
 from datetime import datetime
-import boto3
 from .constant import ServiceType, MonitoringType
+from .resilience import aws_client, get_circuit_breaker
 
 class BaseMonitor(ABC):
     def __init__(self, service_type: ServiceType):
         self.service_type = service_type
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.cloudwatch = boto3.client('cloudwatch')
+        self.cloudwatch = aws_client('cloudwatch')
         
     @abstractmethod
     def get_metrics(self) -> Dict[str, Any]:
@@ -21,26 +21,27 @@ class BaseMonitor(ABC):
         
     def log_error(self, error_msg: str, error_id: Optional[str] = None) -> None:
         try:
-            logs_client = boto3.client('logs')
+            logs_client = aws_client('logs')
             timestamp = int(datetime.now().timestamp() * 1000)
             
             log_stream = f"error-{error_id or self.service_type.name}-{timestamp}"
             
-            try:
-                logs_client.create_log_stream(
+            with get_circuit_breaker("logs").guard():
+                try:
+                    logs_client.create_log_stream(
+                        logGroupName=self.service_type.value.log_group,
+                        logStreamName=log_stream
+                    )
+                except logs_client.exceptions.ResourceAlreadyExistsException:
+                    pass
+
+                logs_client.put_log_events(
                     logGroupName=self.service_type.value.log_group,
-                    logStreamName=log_stream
+                    logStreamName=log_stream,
+                    logEvents=[{
+                        'timestamp': timestamp,
+                        'message': f"ERROR {error_msg}"
+                    }]
                 )
-            except logs_client.exceptions.ResourceAlreadyExistsException:
-                pass
-                
-            logs_client.put_log_events(
-                logGroupName=self.service_type.value.log_group,
-                logStreamName=log_stream,
-                logEvents=[{
-                    'timestamp': timestamp,
-                    'message': f"ERROR {error_msg}"
-                }]
-            )
         except Exception as e:
             self.logger.error(f"Failed to log error: {str(e)}") 
\ No newline at end of file
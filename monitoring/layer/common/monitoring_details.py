@@ -1,18 +1,35 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import time
+from datetime import datetime, timedelta, timezone
 import boto3
 from botocore.exceptions import ClientError
 from kubernetes import client, config
-from .constant import ServiceType
+from .constant import MonitoringType, ServiceType
+from .logs_insights import InsightsQuery, get_insights_engine
+from .log_offload import LogPreview, LogSpool, collect_events, iter_log_events
+from .targets import AWSTarget, get_target_clients, get_target_executor, load_targets
+from .resilience import get_circuit_breaker, k8s_request_timeout
+from .thresholds import get_threshold_rules
+
+# 인시던트 컨텍스트에 표시하는 최근 메트릭 (id, 표시 이름, 네임스페이스, 메트릭, 고정 차원, 통계)
+RECENT_METRICS = [
+    ("errors", "에러 건수", "Monitoring/Errors", "ErrorCount", {"ErrorType": "Application"}, "Sum"),
+    ("rag_alerts", "RAG 성능 알림", "Monitoring/RAG", "PerformanceAlert", {"MetricType": "Accuracy"}, "Sum"),
+    ("delivery", "알림 전송 지연 p90(ms)", "Monitoring/Delivery", "DeliveryLatency", {"AlertType": "ERROR"}, "p90")
+]
 
 class MonitoringDetails:
-    def __init__(self, service_type: ServiceType):
+    def __init__(self, service_type: ServiceType, targets: Optional[List[AWSTarget]] = None):
         self.service_type = service_type
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.cloudwatch = boto3.client('logs')
-        self.batch = boto3.client('batch')
-        self.metrics = boto3.client('cloudwatch')
+        self.targets = targets or load_targets()
+        self.clients = get_target_clients()
+        self.executor = get_target_executor()
+        # 기본 클라이언트는 첫 번째 대상 기준
+        self.cloudwatch = self.clients.client(self.targets[0], 'logs')
+        self.batch = self.clients.client(self.targets[0], 'batch')
+        self.metrics = self.clients.client(self.targets[0], 'cloudwatch')
         self.k8s_client = self._init_k8s_client()
 
     def _init_k8s_client(self) -> Optional[client.CustomObjectsApi]:
@@ -23,57 +40,101 @@ class MonitoringDetails:
             self.logger.error(f"Failed to initialize K8s client: {str(e)}")
             return None
 
-    def get_error_details(self, error_id: str) -> Dict[str, str]:
+    def get_error_details(self, error_id: str, spool: Optional[LogSpool] = None) -> Dict[str, Any]:
+        """에러 로그 조회 (모든 대상을 동시에 조회, spool 을 주면 전체 로그를 임시 파일에 기록)"""
         try:
             start_time = int(time.time() * 1000) - (24 * 60 * 60 * 1000)
             end_time = int(time.time() * 1000)
-            
-            response = self.cloudwatch.filter_log_events(
-                logGroupName=self.service_type.value.log_group,
-                filterPattern=f"ERROR {error_id}",
-                startTime=start_time,
-                endTime=end_time
-            )
-
-            if not response.get('events'):
+            multi_target = len(self.targets) > 1
+
+            def collect(target: AWSTarget) -> LogPreview:
+                with get_circuit_breaker(f"logs:{target.label}").guard():
+                    events = iter_log_events(
+                        self.clients.client(target, 'logs'),
+                        log_group=self.service_type.value.log_group,
+                        filter_pattern=f"ERROR {error_id}",
+                        start_time=start_time,
+                        end_time=end_time
+                    )
+                    prefix = f"[{target.label}] " if multi_target else ""
+                    return collect_events(events, LogPreview(), spool, prefix)
+
+            previews = self.executor.map(collect, self.targets)
+            if spool is not None:
+                spool.finish()
+            previews = {target.label: preview for target, preview in previews.items() if preview.event_count}
+
+            if not previews:
                 return self._get_empty_error_details()
 
-            return self._format_error_details(response['events'])
+            details = self._format_error_preview(LogPreview.merge(previews))
+            if multi_target:
+                counts = ", ".join(f"{label}: {preview.event_count}" for label, preview in previews.items())
+                details["error_history"] += f" ({counts})"
+            return details
 
         except Exception as e:
             self.logger.error(f"Error fetching error details: {str(e)}")
             return self._get_empty_error_details()
 
-    def _format_error_details(self, events: list) -> Dict[str, str]:
-        stack_trace = []
-        related_logs = []
-        
-        for event in events:
-            if 'Traceback' in event['message']:
-                stack_trace.append(event['message'])
-            else:
-                related_logs.append(event['message'])
+    def start_error_trend(self, pattern: str, log_groups: Optional[List[str]] = None,
+                          hours: int = 24) -> List[InsightsQuery]:
+        """에러 발생 추이 집계 쿼리 시작 (결과는 get_error_trend 로 조회)"""
+        try:
+            return get_insights_engine().start_hourly_counts(
+                log_groups or [self.service_type.value.log_group], pattern, hours=hours)
+        except Exception as e:
+            self.logger.error(f"Error starting error trend query: {str(e)}")
+            return []
+
+    def get_error_trend(self, handles: List[InsightsQuery],
+                        timeout: Optional[float] = None) -> List[Tuple[str, int]]:
+        """시간대별 에러 건수 조회"""
+        if not handles:
+            return []
+        try:
+            return get_insights_engine().wait_counts(handles, timeout)
+        except Exception as e:
+            self.logger.error(f"Error fetching error trend: {str(e)}")
+            return []
+
+    def _format_error_details(self, events: list) -> Dict[str, Any]:
+        return self._format_error_preview(collect_events(events, LogPreview()))
 
+    def _format_error_preview(self, preview: LogPreview) -> Dict[str, Any]:
         return {
-            "stack_trace": "\n".join(stack_trace) or "스택 트레이스를 찾을 수 없습니다.",
-            "related_logs": "\n".join(related_logs) or "관련 로그를 찾을 수 없습니다.",
-            "error_history": f"최근 {len(events)}개의 관련 에러가 발견되었습니다."
+            "stack_trace": preview.stack_trace or "스택 트레이스를 찾을 수 없습니다.",
+            "related_logs": preview.related_logs_text() or "관련 로그를 찾을 수 없습니다.",
+            "error_history": f"최근 {preview.event_count}개의 관련 에러가 발견되었습니다.",
+            "event_count": preview.event_count,
+            "truncated": preview.truncated
         }
 
-    def _get_empty_error_details(self) -> Dict[str, str]:
+    def _get_empty_error_details(self) -> Dict[str, Any]:
         return {
             "stack_trace": "에러 로그를 찾을 수 없습니다",
             "related_logs": "관련 로그가 없습니다",
-            "error_history": "이력이 없습니다"
+            "error_history": "이력이 없습니다",
+            "event_count": 0,
+            "truncated": False
         }
 
     def get_batch_details(self, job_id: str) -> Dict[str, Any]:
         try:
-            response = self.batch.describe_jobs(jobs=[job_id])
-            if not response['jobs']:
+            # 작업 ARN 이면 해당 리전만, 아니면 모든 대상에서 동시에 조회
+            targets = self.targets
+            if job_id.startswith('arn:'):
+                targets = [t for t in self.targets if t.region == job_id.split(':')[3]] or targets
+
+            def describe(target: AWSTarget) -> List[Dict[str, Any]]:
+                with get_circuit_breaker(f"batch:{target.label}").guard():
+                    return self.clients.client(target, 'batch').describe_jobs(jobs=[job_id])['jobs']
+
+            jobs = [job for found in self.executor.map(describe, targets).values() for job in found]
+            if not jobs:
                 return self._get_empty_batch_details()
 
-            job = response['jobs'][0]
+            job = jobs[0]
             return self._format_batch_details(job)
 
         except Exception as e:
@@ -82,6 +143,7 @@ class MonitoringDetails:
 
     def _format_batch_details(self, job: Dict[str, Any]) -> Dict[str, Any]:
         return {
+            "job_name": job.get('jobName'),
             "total_processed": job.get('attempts', [{}])[-1].get('container', {}).get('logStreamName', '0'),
             "success_count": len([x for x in job.get('attempts', []) if x.get('exitCode') == 0]),
             "fail_count": len([x for x in job.get('attempts', []) if x.get('exitCode', 0) != 0]),
@@ -100,18 +162,83 @@ class MonitoringDetails:
             "load_time": 0
         }
 
+    def get_recent_metrics(self, hours: int = 3, period: int = 300) -> Dict[str, Any]:
+        """서비스의 최근 모니터링 메트릭 조회 (모든 대상을 동시에 조회, period 초 단위 구간, 값이 없는 구간은 0)
+
+        대상이 여러 개이면 대상별 계열을 [대상] 이름으로 구분해서 반환
+        """
+        try:
+            end_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+            start_time = end_time - timedelta(hours=hours)
+            queries = [{
+                'Id': metric_id,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': namespace,
+                        'MetricName': metric_name,
+                        'Dimensions': [{'Name': 'Service', 'Value': self.service_type.name}] +
+                                      [{'Name': name, 'Value': value} for name, value in dimensions.items()]
+                    },
+                    'Period': period,
+                    'Stat': stat
+                },
+                'ReturnData': True
+            } for metric_id, _, namespace, metric_name, dimensions, stat in RECENT_METRICS]
+
+            def fetch(target: AWSTarget) -> Dict[str, Dict[datetime, float]]:
+                values: Dict[str, Dict[datetime, float]] = {metric_id: {} for metric_id, *_ in RECENT_METRICS}
+                kwargs = {'MetricDataQueries': queries, 'StartTime': start_time, 'EndTime': end_time,
+                          'ScanBy': 'TimestampAscending'}
+                while True:
+                    with get_circuit_breaker(f"cloudwatch:{target.label}").guard():
+                        response = self.clients.client(target, 'cloudwatch').get_metric_data(**kwargs)
+                    for result in response.get('MetricDataResults', []):
+                        values[result['Id']].update(zip(result.get('Timestamps', []), result.get('Values', [])))
+                    if not response.get('NextToken'):
+                        return values
+                    kwargs['NextToken'] = response['NextToken']
+
+            multi_target = len(self.targets) > 1
+            buckets = int(hours * 3600 // period)
+            series = []
+            for target, values in self.executor.map(fetch, self.targets).items():
+                prefix = f"[{target.label}] " if multi_target else ""
+                for metric_id, label, _, _, _, stat in RECENT_METRICS:
+                    points = [0.0] * buckets
+                    for timestamp, value in values[metric_id].items():
+                        index = int((timestamp - start_time).total_seconds() // period)
+                        if 0 <= index < buckets:
+                            points[index] = value
+                    series.append({
+                        "id": metric_id,
+                        "label": f"{prefix}{label}",
+                        "target": target.label,
+                        "values": points,
+                        "summary": sum(points) if stat == "Sum" else max(points)
+                    })
+            return {"hours": hours, "period": period, "series": series}
+
+        except Exception as e:
+            self.logger.error(f"Error fetching recent metrics: {str(e)}")
+            return self._get_empty_recent_metrics(hours, period)
+
+    def _get_empty_recent_metrics(self, hours: int = 3, period: int = 300) -> Dict[str, Any]:
+        return {"hours": hours, "period": period, "series": []}
+
     def get_rag_details(self, pipeline_id: str) -> Dict[str, Any]:
         try:
             if not self.k8s_client:
                 return self._get_empty_rag_details()
 
-            pipeline_run = self.k8s_client.get_namespaced_custom_object(
-                group="pipelines.kubeflow.org",
-                version="v1beta1",
-                namespace="kubeflow",
-                plural="pipelineruns",
-                name=pipeline_id
-            )
+            with get_circuit_breaker("kubernetes").guard():
+                pipeline_run = self.k8s_client.get_namespaced_custom_object(
+                    group="pipelines.kubeflow.org",
+                    version="v1beta1",
+                    namespace="kubeflow",
+                    plural="pipelineruns",
+                    name=pipeline_id,
+                    _request_timeout=k8s_request_timeout()
+                )
 
             return self._format_rag_details(pipeline_run)
 
@@ -122,7 +249,7 @@ class MonitoringDetails:
     def _format_rag_details(self, pipeline_run: Dict[str, Any]) -> Dict[str, Any]:
         metrics = pipeline_run.get('status', {}).get('metrics', {})
         failed_steps = self._get_failed_steps(pipeline_run)
-        suggestions = self._get_performance_suggestions(metrics)
+        suggestions = self._get_performance_suggestions(metrics, pipeline_run.get('metadata', {}).get('name'))
 
         return {
             "precision": f"{float(metrics.get('precision', 0)):.2f}",
@@ -152,17 +279,6 @@ class MonitoringDetails:
                 )
         return failed_steps[:3]  # 최대 3개까지만 반환
 
-    def _get_performance_suggestions(self, metrics: Dict[str, float]) -> list:
-        suggestions = []
-        threshold = self.service_type.value.threshold
-
-        if float(metrics.get('precision', 0)) < threshold:
-            suggestions.append("• Precision이 낮습니다. 검색 결과의 정확도 향상이 필요합니다.")
-        if float(metrics.get('recall', 0)) < threshold:
-            suggestions.append("• Recall이 낮습니다. 관련 문서 검색 범위를 넓히는 것을 고려하세요.")
-        if float(metrics.get('f1', 0)) < threshold:
-            suggestions.append("• F1 Score가 낮습니다. Precision과 Recall의 균형을 맞추세요.")
-        if float(metrics.get('mrr', 0)) < threshold + 0.2:
-            suggestions.append("• MRR이 낮습니다. 가장 관련성 높은 결과가 상위에 랭크되도록 개선이 필요합니다.")
-
-        return suggestions
\ No newline at end of file
+    def _get_performance_suggestions(self, metrics: Dict[str, float], pipeline_id: Optional[str] = None) -> list:
+        result = get_threshold_rules().evaluate(MonitoringType.RAG, self.service_type, metrics, pipeline_id)
+        return [f"• {suggestion}" for suggestion in result.suggestions]
\ No newline at end of file
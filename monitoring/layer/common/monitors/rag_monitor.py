@@ -1,6 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..monitoring_base import BaseMonitor
-from ..constant import ServiceType
+from ..constant import MonitoringType, ServiceType
+from ..resilience import get_circuit_breaker, k8s_request_timeout
+from ..thresholds import get_threshold_rules
 
 class RAGMonitor(BaseMonitor):
     def __init__(self, service_type: ServiceType):
@@ -9,13 +11,15 @@ class RAGMonitor(BaseMonitor):
         
     def get_metrics(self, pipeline_id: str) -> Dict[str, Any]:
         try:
-            pipeline_run = self.k8s_client.get_namespaced_custom_object(
-                group="pipelines.kubeflow.org",
-                version="v1beta1",
-                namespace="kubeflow",
-                plural="pipelineruns",
-                name=pipeline_id
-            )
+            with get_circuit_breaker("kubernetes").guard():
+                pipeline_run = self.k8s_client.get_namespaced_custom_object(
+                    group="pipelines.kubeflow.org",
+                    version="v1beta1",
+                    namespace="kubeflow",
+                    plural="pipelineruns",
+                    name=pipeline_id,
+                    _request_timeout=k8s_request_timeout()
+                )
             
             metrics = pipeline_run.get('status', {}).get('metrics', {})
             return {
@@ -29,5 +33,6 @@ class RAGMonitor(BaseMonitor):
             self.logger.error(f"Failed to get RAG metrics: {str(e)}")
             return {}
             
-    def check_threshold(self, metrics: Dict[str, Any]) -> bool:
-        return metrics.get('accuracy', 0) >= self.service_type.value.threshold 
\ No newline at end of file
+    def check_threshold(self, metrics: Dict[str, Any], pipeline_id: Optional[str] = None) -> bool:
+        """알림 대상 임계값 규칙을 모두 만족하면 True"""
+        return not get_threshold_rules().evaluate(MonitoringType.RAG, self.service_type, metrics, pipeline_id).alert 
\ No newline at end of file
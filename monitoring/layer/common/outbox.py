@@ -0,0 +1,685 @@
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError, SlackClientError
+from .local_store import SQLiteStore
+from .reply_coalescer import SLACK_MAX_BLOCKS, PendingReply, ReplyPack, pack_replies
+from .slack_transport import get_slack_client
+from .latency import LatencyRecorder, get_latency_recorder
+from .alert_history import AlertHistory, get_alert_history, record_from_message
+from .tracing import InvocationTrace, current_trace, span, use_trace
+from .utils import init_alarm
+
+# 재시도 없이 바로 폐기하는 슬랙 오류
+NON_RETRYABLE_ERRORS = {
+    "channel_not_found", "not_in_channel", "is_archived", "invalid_blocks",
+    "invalid_auth", "account_inactive", "msg_too_long", "no_text",
+    "message_not_found", "cant_update_message", "edit_window_closed"
+}
+METADATA_EVENT_TYPE = "monitoring_alert"
+
+# 전송 우선순위 (서비스 + 알림 종류 점수, 클수록 먼저 전송)
+SERVICE_PRIORITY = {"PROD": 200, "DEV": 100, "TEST": 0}
+ALERT_TYPE_PRIORITY = {"ERROR": 30, "BATCH": 20, "RAG": 10}
+DEFAULT_PRIORITY = SERVICE_PRIORITY["DEV"]
+# 전송 제한 중 이 점수 미만 (TEST) 알림은 채널별 요약 메시지 하나로 묶음
+DIGEST_BELOW_PRIORITY = SERVICE_PRIORITY["DEV"]
+DIGEST_MAX_ITEMS = 40
+
+def dispatch_priority(labels: Optional[Dict[str, str]]) -> int:
+    """알림 라벨 (service, alert_type) 로 전송 우선순위 계산 (라벨이 없으면 기본값)"""
+    if not labels or 'service' not in labels:
+        return DEFAULT_PRIORITY
+    return (SERVICE_PRIORITY.get(labels['service'], SERVICE_PRIORITY["DEV"])
+            + ALERT_TYPE_PRIORITY.get(labels.get('alert_type', ''), 0))
+
+@dataclass
+class OutboxMessage:
+    key: str
+    channel: str
+    blocks: List[Dict[str, Any]]
+    text: Optional[str] = None
+    thread_ts: Optional[str] = None
+    thread_key: Optional[str] = None
+    status: str = "pending"
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    next_attempt_at: float = 0.0
+    ts: Optional[str] = None
+    last_error: Optional[str] = None
+    op: str = "post"  # post: 새 메시지 (thread_* 가 있으면 답글), update: thread_* 가 가리키는 메시지 수정
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    source_time: Optional[float] = None  # 원인 이벤트 발생 시각 (전송 지연 측정용)
+    labels: Dict[str, str] = field(default_factory=dict)  # 지연 히스토그램 구분 (service, alert_type)
+    priority: int = DEFAULT_PRIORITY
+
+class OutboxStore(ABC):
+    """아웃박스 저장소 인터페이스"""
+
+    @abstractmethod
+    def append(self, message: OutboxMessage) -> bool:
+        """메시지 추가 (같은 키가 이미 있으면 False)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[OutboxMessage]:
+        pass
+
+    @abstractmethod
+    def fetch_ready(self, now: float, limit: int, aging: float = 0.0) -> List[OutboxMessage]:
+        """전송 가능한 메시지를 우선순위 순서로 조회 (aging 초마다 대기 메시지의 우선순위 1 증가)"""
+
+    @abstractmethod
+    def fetch_ready_below(self, now: float, priority: int, limit: int) -> List[OutboxMessage]:
+        """우선순위가 priority 미만인 전송 가능한 새 메시지 (답글, 수정 제외) 조회"""
+
+    @abstractmethod
+    def replace_with_digest(self, digest: OutboxMessage, keys: List[str]) -> None:
+        """메시지들을 요약 메시지 하나로 대체 (원본은 shed 상태로 변경)"""
+
+    @abstractmethod
+    def mark_delivered(self, key: str, ts: str) -> None:
+        pass
+
+    @abstractmethod
+    def mark_retry(self, key: str, error: str, next_attempt_at: float, dead: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def count_ready(self, now: float) -> int:
+        pass
+
+    @abstractmethod
+    def next_due(self) -> Optional[float]:
+        """대기 중인 메시지의 가장 이른 전송 시각"""
+
+    @abstractmethod
+    def fetch_thread_pending(self, channel: str, thread_key: Optional[str],
+                             thread_ts: Optional[str]) -> List[OutboxMessage]:
+        """같은 스레드의 대기 중인 답글 조회"""
+
+    @abstractmethod
+    def expedite_thread(self, channel: str, thread_key: Optional[str],
+                        thread_ts: Optional[str], now: float) -> None:
+        """같은 스레드의 대기 중인 답글을 즉시 전송 대상으로 변경"""
+
+    @abstractmethod
+    def supersede_updates(self, channel: str, thread_key: Optional[str],
+                          thread_ts: Optional[str], keep_key: str) -> int:
+        """같은 메시지에 대한 대기 중인 이전 수정 요청 폐기 (마지막 수정만 전송)"""
+
+class SQLiteOutboxStore(SQLiteStore, OutboxStore):
+    """SQLite 기반 아웃박스 저장소"""
+
+    FILENAME = "slack_outbox.sqlite3"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            key TEXT PRIMARY KEY,
+            channel TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            thread_ts TEXT,
+            thread_key TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            next_attempt_at REAL NOT NULL,
+            ts TEXT,
+            last_error TEXT,
+            op TEXT NOT NULL DEFAULT 'post',
+            priority INTEGER NOT NULL DEFAULT 100
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_ready ON outbox (status, next_attempt_at);
+        CREATE INDEX IF NOT EXISTS idx_outbox_thread ON outbox (channel, thread_key, thread_ts, status);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or os.environ.get('SLACK_OUTBOX_PATH'))
+        columns = {row['name'] for row in self._execute("PRAGMA table_info(outbox)").fetchall()}
+        if 'op' not in columns:
+            self._execute("ALTER TABLE outbox ADD COLUMN op TEXT NOT NULL DEFAULT 'post'")
+        if 'priority' not in columns:
+            self._execute(f"ALTER TABLE outbox ADD COLUMN priority INTEGER NOT NULL DEFAULT {DEFAULT_PRIORITY}")
+
+    def append(self, message: OutboxMessage) -> bool:
+        with self._lock:
+            return self._insert(self._conn, message)
+
+    @staticmethod
+    def _insert(conn: Any, message: OutboxMessage) -> bool:
+        payload = json.dumps({'blocks': message.blocks, 'text': message.text,
+                              'metadata': message.metadata, 'source_time': message.source_time,
+                              'labels': message.labels}, ensure_ascii=False)
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO outbox (key, channel, payload, thread_ts, thread_key, status, "
+            "attempts, created_at, next_attempt_at, op, priority) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?, ?, ?)",
+            (message.key, message.channel, payload, message.thread_ts, message.thread_key,
+             message.created_at, message.next_attempt_at or message.created_at, message.op,
+             message.priority)
+        )
+        return cursor.rowcount == 1
+
+    def get(self, key: str) -> Optional[OutboxMessage]:
+        row = self._execute("SELECT * FROM outbox WHERE key = ?", (key,)).fetchone()
+        return self._to_message(row) if row else None
+
+    def fetch_ready(self, now: float, limit: int, aging: float = 0.0) -> List[OutboxMessage]:
+        if aging > 0:
+            rows = self._execute(
+                "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY priority + (? - created_at) / ? DESC, created_at LIMIT ?",
+                (now, now, aging, limit)
+            ).fetchall()
+        else:
+            rows = self._execute(
+                "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY priority DESC, created_at LIMIT ?", (now, limit)
+            ).fetchall()
+        return [self._to_message(row) for row in rows]
+
+    def fetch_ready_below(self, now: float, priority: int, limit: int) -> List[OutboxMessage]:
+        rows = self._execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? AND priority < ? "
+            "AND op = 'post' AND thread_key IS NULL AND thread_ts IS NULL ORDER BY created_at LIMIT ?",
+            (now, priority, limit)
+        ).fetchall()
+        return [self._to_message(row) for row in rows]
+
+    def replace_with_digest(self, digest: OutboxMessage, keys: List[str]) -> None:
+        with self._transaction() as conn:
+            self._insert(conn, digest)
+            conn.executemany(
+                "UPDATE outbox SET status = 'shed', last_error = ? WHERE key = ? AND status = 'pending'",
+                [(f"digested into {digest.key}", key) for key in keys]
+            )
+
+    def mark_delivered(self, key: str, ts: str) -> None:
+        self._execute("UPDATE outbox SET status = 'delivered', ts = ?, last_error = NULL WHERE key = ?",
+                      (ts, key))
+
+    def mark_retry(self, key: str, error: str, next_attempt_at: float, dead: bool = False) -> None:
+        self._execute(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, "
+            "next_attempt_at = ? WHERE key = ?",
+            ('dead' if dead else 'pending', error, next_attempt_at, key)
+        )
+
+    def count_ready(self, now: float) -> int:
+        return self._execute(
+            "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND next_attempt_at <= ?", (now,)
+        ).fetchone()[0]
+
+    def next_due(self) -> Optional[float]:
+        return self._execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+        ).fetchone()[0]
+
+    def fetch_thread_pending(self, channel: str, thread_key: Optional[str],
+                             thread_ts: Optional[str]) -> List[OutboxMessage]:
+        rows = self._execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND channel = ? "
+            "AND thread_key IS ? AND thread_ts IS ? AND op = 'post' ORDER BY created_at",
+            (channel, thread_key, thread_ts)
+        ).fetchall()
+        return [self._to_message(row) for row in rows]
+
+    def expedite_thread(self, channel: str, thread_key: Optional[str],
+                        thread_ts: Optional[str], now: float) -> None:
+        self._execute(
+            "UPDATE outbox SET next_attempt_at = ? WHERE status = 'pending' AND channel = ? "
+            "AND thread_key IS ? AND thread_ts IS ? AND op = 'post' AND next_attempt_at > ?",
+            (now, channel, thread_key, thread_ts, now)
+        )
+
+    def supersede_updates(self, channel: str, thread_key: Optional[str],
+                          thread_ts: Optional[str], keep_key: str) -> int:
+        return self._execute(
+            "UPDATE outbox SET status = 'superseded' WHERE status = 'pending' AND channel = ? "
+            "AND thread_key IS ? AND thread_ts IS ? AND op = 'update' AND key != ?",
+            (channel, thread_key, thread_ts, keep_key)
+        ).rowcount
+
+    def purge_delivered(self, older_than: float) -> int:
+        """전송 완료된 오래된 메시지 정리"""
+        return self._execute(
+            "DELETE FROM outbox WHERE status = 'delivered' AND created_at < ?", (older_than,)
+        ).rowcount
+
+    @staticmethod
+    def _to_message(row: Any) -> OutboxMessage:
+        payload = json.loads(row['payload'])
+        return OutboxMessage(
+            key=row['key'],
+            channel=row['channel'],
+            blocks=payload['blocks'],
+            text=payload.get('text'),
+            thread_ts=row['thread_ts'],
+            thread_key=row['thread_key'],
+            status=row['status'],
+            attempts=row['attempts'],
+            created_at=row['created_at'],
+            next_attempt_at=row['next_attempt_at'],
+            ts=row['ts'],
+            last_error=row['last_error'],
+            op=row['op'],
+            metadata=payload.get('metadata') or {},
+            source_time=payload.get('source_time'),
+            labels=payload.get('labels') or {},
+            priority=row['priority']
+        )
+
+class SlackOutbox:
+    """슬랙 메시지 아웃박스 (로컬 저장 후 백그라운드 전송)
+
+    저장소는 컨테이너 로컬 파일 (SLACK_OUTBOX_PATH, 기본 /tmp) 이라 같은 컨테이너의 다음 호출까지만
+    재시도하고, 컨테이너가 회수되면 전송하지 못한 메시지는 유실됨 (호출 종료 전 flush 로 최소화).
+    """
+
+    def __init__(self, store: OutboxStore, client: Optional[WebClient] = None,
+                 max_attempts: int = 8, base_backoff: float = 2.0,
+                 max_backoff: float = 300.0, poll_interval: float = 5.0,
+                 coalesce_window: Optional[float] = None,
+                 latency_recorder: Optional[LatencyRecorder] = None,
+                 priority_aging: Optional[float] = None, digest_window: Optional[float] = None,
+                 alert_history: Optional[AlertHistory] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.store = store
+        self.client = client
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.coalesce_window = coalesce_window if coalesce_window is not None else float(
+            os.environ.get('SLACK_REPLY_COALESCE_WINDOW', '0')
+        )
+        self.latency_recorder = latency_recorder or get_latency_recorder()
+        self.alert_history = alert_history or get_alert_history()
+        # 대기 시간 priority_aging 초마다 우선순위 1 증가 (낮은 우선순위 기아 방지)
+        self.priority_aging = priority_aging if priority_aging is not None else float(
+            os.environ.get('SLACK_PRIORITY_AGING', '5')
+        )
+        # 마지막 전송 제한(429) 이후 이 시간 동안은 낮은 우선순위 알림을 요약으로 묶음
+        self.digest_window = digest_window if digest_window is not None else float(
+            os.environ.get('SLACK_DIGEST_WINDOW', '300')
+        )
+        self._throttled_until = 0.0
+        self._rate_limited_at: Optional[float] = None
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._trace: Optional[InvocationTrace] = None
+        self._delivery_listeners: List[Callable[[OutboxMessage, str], None]] = []
+
+    def add_delivery_listener(self, listener: Callable[[OutboxMessage, str], None]) -> None:
+        """새 메시지 전송 후 (메시지, ts) 로 호출할 함수 등록 (같은 함수는 한 번만 등록)"""
+        if listener not in self._delivery_listeners:
+            self._delivery_listeners.append(listener)
+
+    def enqueue(self, key: str, channel: str, blocks: List[Dict[str, Any]],
+                text: Optional[str] = None, thread_ts: Optional[str] = None,
+                thread_key: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None,
+                source_time: Optional[float] = None,
+                labels: Optional[Dict[str, str]] = None) -> bool:
+        """메시지 저장 후 전송 스레드 호출 (중복 키는 무시, source_time 이 있으면 전송 지연 기록)"""
+        with span('outbox.append'):
+            appended = self.store.append(OutboxMessage(
+                key=key, channel=channel, blocks=blocks, text=text,
+                thread_ts=thread_ts, thread_key=thread_key, metadata=metadata or {},
+                source_time=source_time, labels=labels or {}, priority=dispatch_priority(labels)
+            ))
+        if not appended:
+            self.logger.info(f"Duplicate outbox message ignored: {key}")
+        self._wake_drainer()
+        return appended
+
+    def enqueue_reply(self, key: str, channel: str, blocks: List[Dict[str, Any]],
+                      text: Optional[str] = None, thread_ts: Optional[str] = None,
+                      thread_key: Optional[str] = None) -> bool:
+        """스레드 답글 저장 (coalesce_window 동안 모아서 전송, 블록 제한에 도달하면 즉시 전송)"""
+        now = time.time()
+        # 답글은 부모 메시지의 우선순위를 따름
+        parent = self.store.get(thread_key) if thread_key else None
+        with span('outbox.append'):
+            appended = self.store.append(OutboxMessage(
+                key=key, channel=channel, blocks=blocks, text=text, thread_ts=thread_ts,
+                thread_key=thread_key, created_at=now, next_attempt_at=now + self.coalesce_window,
+                priority=parent.priority if parent else DEFAULT_PRIORITY
+            ))
+            if appended and self.coalesce_window:
+                pending = self.store.fetch_thread_pending(channel, thread_key, thread_ts)
+                if sum(len(m.blocks) + 1 for m in pending) > SLACK_MAX_BLOCKS:
+                    self.store.expedite_thread(channel, thread_key, thread_ts, now)
+        self._wake_drainer()
+        return appended
+
+    def enqueue_update(self, key: str, channel: str, blocks: List[Dict[str, Any]],
+                       text: Optional[str] = None, ts: Optional[str] = None,
+                       message_key: Optional[str] = None,
+                       metadata: Optional[Dict[str, Any]] = None,
+                       source_time: Optional[float] = None,
+                       labels: Optional[Dict[str, str]] = None) -> bool:
+        """기존 메시지 수정 저장 (ts 또는 원본 메시지의 아웃박스 키로 지정, 원본 전송 후 수정)"""
+        with span('outbox.append'):
+            appended = self.store.append(OutboxMessage(
+                key=key, channel=channel, blocks=blocks, text=text, thread_ts=ts,
+                thread_key=None if ts else message_key, op="update", metadata=metadata or {},
+                source_time=source_time, labels=labels or {}, priority=dispatch_priority(labels)
+            ))
+            if appended:
+                self.store.supersede_updates(channel, None if ts else message_key, ts, key)
+        self._wake_drainer()
+        return appended
+
+    def _wake_drainer(self) -> None:
+        """호출한 핸들러의 트레이스에 전송 구간이 기록되도록 트레이스를 넘기고 전송 스레드 호출"""
+        self._trace = current_trace()
+        self.start()
+        self._wake.set()
+
+    def start(self) -> None:
+        """백그라운드 전송 스레드 시작"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slack-outbox-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def flush(self, timeout: float) -> bool:
+        """보낼 메시지가 없을 때까지 최대 timeout초 대기 (그 안에 전송 시점이 오는 답글 포함)"""
+        self._trace = current_trace()
+        self.start()
+        deadline = time.monotonic() + timeout
+        with span('outbox.flush'):
+            while True:
+                self._idle.clear()
+                self._wake.set()
+                if not self._idle.wait(max(deadline - time.monotonic(), 0)):
+                    self.logger.warning("Outbox flush timed out, remaining messages will be retried later")
+                    return False
+                next_due = self.store.next_due()
+                if next_due is None or next_due <= time.time():
+                    return self.store.count_ready(time.time()) == 0
+                wait = next_due - time.time()
+                if time.monotonic() + wait > deadline:
+                    return False
+                self._stop.wait(wait)
+
+    def drain(self, limit: int = 50) -> int:
+        """전송 가능한 메시지를 우선순위 순서로 전송 (같은 스레드 답글은 묶어서 전송, 전송 건수 반환)"""
+        with self._drain_lock:
+            now = time.time()
+            if now < self._throttled_until:
+                return 0
+            if self._rate_limited_at is not None and now - self._rate_limited_at < self.digest_window:
+                self._digest_low_priority(now)
+
+            delivered = 0
+            handled = set()
+            for message in self.store.fetch_ready(now, limit, self.priority_aging):
+                if time.time() < self._throttled_until:
+                    break  # 전송 제한 중에는 남은 메시지를 다음 차례에 우선순위 순서로 다시 조회
+                if message.key in handled:
+                    continue
+                group = [message]
+                if message.op == "post" and (message.thread_key or message.thread_ts):
+                    group = self.store.fetch_thread_pending(
+                        message.channel, message.thread_key, message.thread_ts
+                    ) or group
+                handled.update(item.key for item in group)
+                delivered += self._deliver(group)
+            return delivered
+
+    def _digest_low_priority(self, now: float) -> int:
+        """전송 제한 중 대기 중인 낮은 우선순위 알림을 채널별 요약 메시지 하나로 대체"""
+        by_channel: Dict[str, List[OutboxMessage]] = {}
+        for message in self.store.fetch_ready_below(now, DIGEST_BELOW_PRIORITY, 500):
+            by_channel.setdefault(message.channel, []).append(message)
+
+        digested = 0
+        for channel, messages in by_channel.items():
+            if len(messages) < 2:
+                continue
+            keys = [m.key for m in messages]
+            digest = OutboxMessage(
+                key=f"digest:{channel}:{keys[0]}",
+                channel=channel,
+                blocks=self._digest_blocks(messages),
+                text=f"낮은 우선순위 알림 {len(messages)}건 요약",
+                metadata={'digested_count': len(messages)},
+                priority=max(m.priority for m in messages),
+                created_at=min(m.created_at for m in messages),
+                next_attempt_at=now
+            )
+            self.store.replace_with_digest(digest, keys)
+            self.logger.warning(f"Rate limited, digested {len(messages)} low priority messages in {channel}")
+            digested += len(messages)
+        return digested
+
+    @staticmethod
+    def _digest_blocks(messages: List[OutboxMessage]) -> List[Dict[str, Any]]:
+        blocks = [{
+            "type": "section",
+            "text": {"type": "mrkdwn",
+                     "text": f"*슬랙 전송 제한으로 낮은 우선순위 알림 {len(messages)}건을 묶어서 전송합니다*"}
+        }]
+        for message in messages[:DIGEST_MAX_ITEMS]:
+            summary = message.text or next(
+                (b['text']['text'] for b in message.blocks if isinstance(b.get('text'), dict)), ""
+            )
+            blocks.append({"type": "context", "elements": [
+                {"type": "mrkdwn", "text": summary.split("\n", 1)[0][:200] or message.key}
+            ]})
+        if len(messages) > DIGEST_MAX_ITEMS:
+            blocks.append({"type": "context", "elements": [
+                {"type": "mrkdwn", "text": f"외 {len(messages) - DIGEST_MAX_ITEMS}건 생략"}
+            ]})
+        return blocks
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with use_trace(self._trace):
+                    while self.drain() and not self._stop.is_set():
+                        pass
+            except Exception as e:
+                self.logger.error(f"Outbox drain failed: {str(e)}")
+            finally:
+                self._idle.set()
+            self.latency_recorder.maybe_export()
+            self.alert_history.maybe_flush()
+
+    def get_client(self) -> WebClient:
+        if self.client is None:
+            init_alarm()
+            self.client = get_slack_client()
+        return self.client
+
+    def _resolve_thread_ts(self, message: OutboxMessage) -> Optional[str]:
+        """부모 메시지 키로 스레드 ts 조회 (부모 미전송 시 빈 문자열)"""
+        if message.thread_ts or not message.thread_key:
+            return message.thread_ts
+        parent = self.store.get(message.thread_key)
+        if parent is None or parent.status == 'dead':
+            return None
+        return parent.ts or ""
+
+    def _parent_shed(self, message: OutboxMessage) -> bool:
+        parent = self.store.get(message.thread_key) if message.thread_key else None
+        return parent is not None and parent.status == 'shed'
+
+    def _find_delivered_ts(self, channel: str, keys: List[str], thread_ts: Optional[str],
+                           since: float) -> Optional[str]:
+        """재시도 전 이미 전송된 메시지인지 멱등성 키로 확인"""
+        client = self.get_client()
+        if thread_ts:
+            response = client.conversations_replies(channel=channel, ts=thread_ts,
+                                                    include_all_metadata=True, limit=200)
+        else:
+            response = client.conversations_history(channel=channel, include_all_metadata=True,
+                                                    limit=100, oldest=str(since - 1))
+        for item in response.get('messages', []):
+            payload = item.get('metadata', {}).get('event_payload', {})
+            sent_keys = payload.get('coalesced_keys') or [payload.get('idempotency_key')]
+            if any(key in keys for key in sent_keys):
+                return item['ts']
+        return None
+
+    def _deliver(self, messages: List[OutboxMessage]) -> int:
+        """메시지(같은 스레드 답글 묶음) 전송"""
+        first = messages[0]
+        thread_ts = self._resolve_thread_ts(first)
+        if thread_ts == "" and self._parent_shed(first):
+            # 요약 메시지로 대체된 알림의 답글 / 수정은 함께 폐기
+            for message in messages:
+                self.store.mark_retry(message.key, "parent message digested", time.time(), dead=True)
+            return 0
+        if thread_ts == "":
+            return 0  # 부모 메시지 전송 대기
+        if first.op == "update":
+            return int(self._update(first, thread_ts))
+
+        delivered = 0
+        replies = [PendingReply(key=m.key, blocks=m.blocks, text=m.text) for m in messages]
+        by_key = {m.key: m for m in messages}
+        for pack in pack_replies(replies):
+            pack_messages = [by_key[key] for key in pack.keys]
+            if self._post(first.channel, pack, pack_messages, thread_ts):
+                delivered += len(pack.keys)
+        return delivered
+
+    def _update(self, message: OutboxMessage, ts: Optional[str]) -> bool:
+        """chat_update 로 원본 메시지 수정 (원본이 폐기되었으면 수정도 폐기)"""
+        if not ts:
+            self.store.mark_retry(message.key, "original message not delivered", time.time(), dead=True)
+            return False
+        try:
+            with span('slack.chat_update'):
+                self.get_client().chat_update(
+                    channel=message.channel,
+                    ts=ts,
+                    blocks=message.blocks,
+                    text=message.text,
+                    metadata={'event_type': METADATA_EVENT_TYPE,
+                              'event_payload': {**message.metadata, 'idempotency_key': message.key}}
+                )
+            self.store.mark_delivered(message.key, ts)
+            self._observe_latency([message], time.time())
+            return True
+        except SlackApiError as e:
+            self._handle_api_error([message], e)
+        except (SlackClientError, OSError) as e:
+            self._schedule_retry(message, str(e))
+        return False
+
+    def _post(self, channel: str, pack: ReplyPack, messages: List[OutboxMessage],
+              thread_ts: Optional[str]) -> bool:
+        metadata = {**messages[0].metadata, 'idempotency_key': pack.keys[0]}
+        if len(pack.keys) > 1:
+            metadata['coalesced_keys'] = pack.keys
+
+        try:
+            ts = None
+            if any(m.attempts for m in messages):
+                ts = self._find_delivered_ts(channel, pack.keys, thread_ts,
+                                             min(m.created_at for m in messages))
+            if ts is None:
+                with span('slack.chat_postMessage'):
+                    response = self.get_client().chat_postMessage(
+                        channel=channel,
+                        blocks=pack.blocks,
+                        text=pack.text,
+                        thread_ts=thread_ts,
+                        metadata={'event_type': METADATA_EVENT_TYPE, 'event_payload': metadata}
+                    )
+                ts = response['ts']
+            for key in pack.keys:
+                self.store.mark_delivered(key, ts)
+            self._notify_delivered(messages, ts)
+            self._observe_latency(messages, float(ts))
+            self._record_history(messages, float(ts))
+            return True
+
+        except SlackApiError as e:
+            self._handle_api_error(messages, e)
+        except (SlackClientError, OSError) as e:
+            for message in messages:
+                self._schedule_retry(message, str(e))
+        return False
+
+    def _notify_delivered(self, messages: List[OutboxMessage], ts: str) -> None:
+        for listener in self._delivery_listeners:
+            for message in messages:
+                try:
+                    listener(message, ts)
+                except Exception as e:
+                    self.logger.error(f"Delivery listener failed for {message.key}: {str(e)}")
+
+    def _observe_latency(self, messages: List[OutboxMessage], delivered_at: float) -> None:
+        """원인 이벤트부터 슬랙 메시지 생성(수정은 수정 완료)까지의 지연 기록"""
+        for message in messages:
+            if message.source_time is not None:
+                self.latency_recorder.observe(message.labels.get('service', 'unknown'),
+                                              message.labels.get('alert_type', 'unknown'),
+                                              message.source_time, delivered_at)
+
+    def _record_history(self, messages: List[OutboxMessage], sent_at: float) -> None:
+        """새로 보낸 알림 (답글 제외) 을 이력에 기록"""
+        for message in messages:
+            if message.thread_ts or message.thread_key or 'service' not in message.labels:
+                continue
+            self.alert_history.append(record_from_message(
+                message.labels['service'], message.labels.get('alert_type', 'unknown'), message.channel,
+                message.key, sent_at, message.blocks, message.text, message.source_time
+            ))
+
+    def _handle_api_error(self, messages: List[OutboxMessage], e: SlackApiError) -> None:
+        error = e.response.get('error', str(e))
+        retry_after = e.response.headers.get('Retry-After') if e.response.status_code == 429 else None
+        if e.response.status_code == 429:
+            # 전송 제한 해제까지 전송을 멈추고, 이후에는 높은 우선순위부터 전송
+            self._rate_limited_at = time.time()
+            self._throttled_until = self._rate_limited_at + float(retry_after or self.base_backoff)
+        for message in messages:
+            self._schedule_retry(message, error,
+                                 retry_after=float(retry_after) if retry_after else None,
+                                 dead=error in NON_RETRYABLE_ERRORS)
+
+    def _schedule_retry(self, message: OutboxMessage, error: str,
+                        retry_after: Optional[float] = None, dead: bool = False) -> None:
+        attempts = message.attempts + 1
+        dead = dead or attempts >= self.max_attempts
+        delay = retry_after if retry_after is not None else min(
+            self.base_backoff * (2 ** message.attempts), self.max_backoff
+        )
+        if dead:
+            self.logger.error(f"Outbox message {message.key} dropped after {attempts} attempts: {error}")
+        else:
+            self.logger.warning(f"Outbox message {message.key} failed ({error}), retry in {delay:.1f}s")
+        self.store.mark_retry(message.key, error, time.time() + delay, dead=dead)
+
+_default_outbox: Optional[SlackOutbox] = None
+_default_outbox_lock = threading.Lock()
+
+def get_default_outbox() -> SlackOutbox:
+    """컨테이너 단위로 재사용되는 기본 아웃박스"""
+    global _default_outbox
+    with _default_outbox_lock:
+        if _default_outbox is None:
+            _default_outbox = SlackOutbox(SQLiteOutboxStore())
+        return _default_outbox
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# https://api.slack.com/reference/block-kit/blocks
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_TEXT_LENGTH = 40000
+REPLY_SEPARATOR = {"type": "divider"}
+TRUNCATION_MARKER = "… (메시지 길이 제한으로 잘림)"
+
+@dataclass
+class PendingReply:
+    key: str
+    blocks: List[Dict[str, Any]]
+    text: Optional[str] = None
+
+@dataclass
+class ReplyPack:
+    keys: List[str] = field(default_factory=list)
+    blocks: List[Dict[str, Any]] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    text_length: int = 0
+
+    @property
+    def text(self) -> Optional[str]:
+        return "\n".join(self.texts) if self.texts else None
+
+def block_text_length(block: Dict[str, Any]) -> int:
+    """블록에 포함된 텍스트 길이 합계"""
+    length = len(block.get('text', {}).get('text', '')) if isinstance(block.get('text'), dict) else 0
+    for item in block.get('fields', []) + block.get('elements', []):
+        text = item.get('text')
+        if isinstance(text, dict):
+            length += len(text.get('text', ''))
+        elif isinstance(text, str):
+            length += len(text)
+    return length
+
+def blocks_text_length(blocks: Sequence[Dict[str, Any]]) -> int:
+    return sum(block_text_length(block) for block in blocks)
+
+def _omission_block(omitted: int) -> Dict[str, Any]:
+    return {"type": "context", "elements": [
+        {"type": "mrkdwn", "text": f"⚠️ 메시지 제한으로 이 답글의 일부를 생략했습니다 (블록 {omitted}개 생략)"}
+    ]}
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:max(limit - len(TRUNCATION_MARKER), 0)] + TRUNCATION_MARKER
+
+def fit_reply(reply: PendingReply, max_blocks: int = SLACK_MAX_BLOCKS,
+              max_text_length: int = SLACK_MAX_TEXT_LENGTH) -> PendingReply:
+    """한 답글이 메시지 제한을 넘으면 블록 / 텍스트를 잘라 생략 표시 블록을 붙이기 (조용히 버리지 않음)"""
+    text = reply.text or ''
+    if len(reply.blocks) <= max_blocks and blocks_text_length(reply.blocks) + len(text) <= max_text_length:
+        return reply
+
+    # 대체 텍스트 (알림 미리보기) 는 제한의 1/4 까지만 쓰고 나머지를 블록과 생략 표시에 배정
+    text = _truncate(text, max_text_length // 4)
+    budget = max_text_length - len(text) - block_text_length(_omission_block(len(reply.blocks)))
+    blocks: List[Dict[str, Any]] = []
+    for block in reply.blocks:
+        if len(blocks) == max_blocks - 1:
+            break
+        length = block_text_length(block)
+        if length > budget:
+            # 본문만 있는 블록 (section, header 등) 은 남은 길이만큼 잘라서 포함
+            inner = block.get('text')
+            if isinstance(inner, dict) and not block.get('fields') and budget > len(TRUNCATION_MARKER):
+                blocks.append({**block, 'text': {**inner, 'text': _truncate(inner.get('text', ''), budget)}})
+            break
+        blocks.append(block)
+        budget -= length
+    blocks.append(_omission_block(len(reply.blocks) - len(blocks)))
+    return PendingReply(key=reply.key, blocks=blocks, text=text or None)
+
+def pack_replies(replies: Sequence[PendingReply], max_blocks: int = SLACK_MAX_BLOCKS,
+                 max_text_length: int = SLACK_MAX_TEXT_LENGTH) -> List[ReplyPack]:
+    """스레드 답글을 블록/텍스트 제한 안에서 최소 개수의 메시지로 묶기 (순서 유지, 제한을 넘는 답글은 fit_reply 로 자름)"""
+    packs: List[ReplyPack] = []
+    current = ReplyPack()
+
+    for reply in replies:
+        reply = fit_reply(reply, max_blocks, max_text_length)
+        blocks = reply.blocks
+        text_length = blocks_text_length(blocks) + len(reply.text or '')
+        separator = 1 if current.keys else 0
+
+        if current.keys and (len(current.blocks) + separator + len(blocks) > max_blocks or
+                             current.text_length + text_length > max_text_length):
+            packs.append(current)
+            current = ReplyPack()
+            separator = 0
+
+        if separator:
+            current.blocks.append(REPLY_SEPARATOR)
+        current.keys.append(reply.key)
+        current.blocks.extend(blocks)
+        current.text_length += text_length
+        if reply.text:
+            current.texts.append(reply.text)
+
+    if current.keys:
+        packs.append(current)
+    return packs
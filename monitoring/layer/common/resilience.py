@@ -0,0 +1,263 @@
+import os
+import ssl
+import time
+import socket
+import logging
+import contextvars
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from http.client import HTTPException
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+logger = logging.getLogger(__name__)
+
+# 응답 생성 / 로그 기록을 위해 Lambda 제한 시간 전에 남겨두는 시간(초)
+DEADLINE_RESERVE = float(os.environ.get('DEADLINE_RESERVE', '3'))
+BOTO_CONNECT_TIMEOUT = float(os.environ.get('BOTO_CONNECT_TIMEOUT', '3'))
+BOTO_READ_TIMEOUT = float(os.environ.get('BOTO_READ_TIMEOUT', '10'))
+BOTO_MAX_ATTEMPTS = int(os.environ.get('BOTO_MAX_ATTEMPTS', '3'))
+K8S_REQUEST_TIMEOUT = float(os.environ.get('K8S_REQUEST_TIMEOUT', '10'))
+# 이 시간(초)보다 적게 남으면 호출하지 않고 바로 실패
+MIN_CALL_TIMEOUT = 0.5
+# 4xx 중에서도 의존성 장애로 보는 스로틀링 오류 코드
+THROTTLING_ERROR_CODES = {"Throttling", "ThrottlingException", "TooManyRequestsException",
+                          "RequestLimitExceeded", "LimitExceededException"}
+# 응답을 받지 못한 의존성 장애 (연결 실패 / 시간 초과 / TLS 오류, 그 외 예외는 코드 오류로 보고 차단기에 반영하지 않음)
+TRANSPORT_ERRORS = (BotoConnectionError, HTTPClientError, Urllib3HTTPError, HTTPException,
+                    ConnectionError, TimeoutError, socket.gaierror, ssl.SSLError)
+# 마감이 가까울 때 boto3 호출 제한 시간을 줄이는 단계(초) (남은 시간 이하의 가장 큰 값 사용)
+CALL_BUDGETS = (0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """호출 제한 시간 안에 끝낼 수 없는 조회"""
+
+class CircuitOpenError(Exception):
+    """장애로 차단된 의존성 호출"""
+
+def current_deadline() -> Optional[float]:
+    """현재 호출의 마감 시각 (time.monotonic 기준, 없으면 None)"""
+    return _deadline.get()
+
+def remaining_time() -> Optional[float]:
+    """마감까지 남은 시간(초)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def bounded_timeout(timeout: float) -> float:
+    """남은 시간을 넘지 않는 대기 시간 (마감이 지났으면 0)"""
+    remaining = remaining_time()
+    return timeout if remaining is None else max(min(timeout, remaining), 0.0)
+
+def deadline_reached(margin: float = MIN_CALL_TIMEOUT) -> bool:
+    """마감까지 margin 초도 남지 않았는지"""
+    remaining = remaining_time()
+    return remaining is not None and remaining < margin
+
+def call_timeout(timeout: float) -> float:
+    """하위 호출 제한 시간 (남은 시간이 MIN_CALL_TIMEOUT 보다 적으면 DeadlineExceeded)"""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining < MIN_CALL_TIMEOUT:
+        raise DeadlineExceeded(f"{max(remaining, 0):.2f}s left")
+    return min(timeout, remaining)
+
+def k8s_request_timeout() -> Tuple[float, float]:
+    """kubernetes 클라이언트 _request_timeout (연결, 읽기)"""
+    timeout = call_timeout(K8S_REQUEST_TIMEOUT)
+    return min(BOTO_CONNECT_TIMEOUT, timeout), timeout
+
+@contextmanager
+def deadline_scope(context: Any, reserve: float = DEADLINE_RESERVE) -> Iterator[Optional[float]]:
+    """Lambda context 의 남은 시간으로 마감 시각 설정 (바깥 마감이 더 이르면 유지)"""
+    deadline = _deadline.get()
+    get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(get_remaining):
+        scoped = time.monotonic() + max(get_remaining() / 1000 - reserve, 0.0)
+        deadline = scoped if deadline is None else min(deadline, scoped)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+def deadline_handler(func: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """핸들러 호출의 남은 시간을 하위 호출 마감으로 전파"""
+
+    @wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        with deadline_scope(context):
+            return func(event, context)
+
+    return wrapper
+
+def call_budget() -> Optional[float]:
+    """현재 호출에 쓸 boto3 제한 시간 단계 (마감이 없거나 기본 설정의 재시도까지 끝낼 시간이 남았으면 None)"""
+    remaining = remaining_time()
+    if remaining is None or remaining >= (BOTO_CONNECT_TIMEOUT + BOTO_READ_TIMEOUT) * (BOTO_MAX_ATTEMPTS + 1):
+        return None
+    # 최소 단계보다 적게 남았으면 전송 직전 확인 (_check_deadline) 에서 DeadlineExceeded
+    return max((budget for budget in CALL_BUDGETS if budget <= remaining), default=CALL_BUDGETS[0])
+
+def boto_config(budget: Optional[float] = None) -> Config:
+    """boto3 클라이언트 공통 설정 (budget 을 주면 재시도까지 budget 초 안에 끝나도록 제한 시간 / 시도 횟수 축소)"""
+    if budget is None:
+        return Config(
+            connect_timeout=BOTO_CONNECT_TIMEOUT,
+            read_timeout=BOTO_READ_TIMEOUT,
+            retries={'max_attempts': BOTO_MAX_ATTEMPTS, 'mode': 'standard'}
+        )
+    attempts = max(1, min(BOTO_MAX_ATTEMPTS + 1, int(budget // (BOTO_CONNECT_TIMEOUT + BOTO_READ_TIMEOUT))))
+    per_attempt = budget / attempts
+    connect_timeout = min(BOTO_CONNECT_TIMEOUT, per_attempt / 2)
+    return Config(
+        connect_timeout=connect_timeout,
+        read_timeout=min(BOTO_READ_TIMEOUT, per_attempt - connect_timeout),
+        retries={'total_max_attempts': attempts, 'mode': 'standard'}
+    )
+
+def _check_deadline(**kwargs) -> None:
+    """재시도를 포함해 요청을 보낼 때마다 남은 시간 확인 (botocore before-send 이벤트)"""
+    call_timeout(MIN_CALL_TIMEOUT)
+
+class DeadlineBoundClient:
+    """호출 시점의 남은 시간에 맞춘 설정의 boto3 클라이언트로 위임
+
+    클라이언트는 웜 컨테이너에서 재사용되므로 생성 시점이 아니라 API 를 호출할 때 마감을 반영.
+    단계별 클라이언트는 처음 필요할 때 한 번만 생성.
+    """
+
+    def __init__(self, factory: Callable[[Config], Any]):
+        self._factory = factory
+        self._clients: Dict[Optional[float], Any] = {}
+        self._lock = threading.Lock()
+
+    def bounded(self, budget: Optional[float] = None) -> Any:
+        """budget 단계 설정의 클라이언트"""
+        client = self._clients.get(budget)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(budget)
+                if client is None:
+                    client = self._factory(boto_config(budget))
+                    client.meta.events.register('before-send', _check_deadline)
+                    self._clients[budget] = client
+        return client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.bounded(call_budget()), name)
+
+def aws_client(service: str, session: Optional[boto3.session.Session] = None, **kwargs) -> DeadlineBoundClient:
+    """호출마다 핸들러 마감을 넘지 않도록 제한 시간이 설정되는 boto3 클라이언트"""
+    return DeadlineBoundClient(lambda config: (session or boto3).client(service, config=config, **kwargs))
+
+def _response_status(error: Exception) -> Optional[int]:
+    """오류에 담긴 HTTP 응답 상태 (응답을 받지 못했으면 None)"""
+    if isinstance(error, ClientError):
+        return error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 500)
+    # kubernetes ApiException 등 HTTP 상태가 있는 오류
+    status = getattr(error, 'status', None)
+    return status if isinstance(status, int) else None
+
+def is_dependency_failure(error: Exception) -> bool:
+    """의존성 장애로 볼 오류인지 (연결 실패 / 시간 초과, 5xx, 스로틀링. 그 외 4xx 와 코드 오류는 제외)"""
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        return code in THROTTLING_ERROR_CODES or _response_status(error) >= 500
+    status = _response_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, TRANSPORT_ERRORS)
+
+class CircuitBreaker:
+    """의존성별 회로 차단기 (연속 실패 시 reset_timeout 동안 호출 차단, 이후 한 건만 시험 호출)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """차단 중이거나 남은 시간이 없으면 호출 전에 실패"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            call_timeout(MIN_CALL_TIMEOUT)
+        except DeadlineExceeded:
+            self._release_probe()
+            raise
+        try:
+            yield
+        except Exception as e:
+            if is_dependency_failure(e):
+                self.record_failure()
+            elif _response_status(e) is not None:
+                # 4xx 응답은 의존성이 정상 응답한 것으로 간주
+                self.record_success()
+            else:
+                # 마감 초과 / 차단 / 코드 오류는 의존성 상태와 무관
+                self._release_probe()
+            raise
+        self.record_success()
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """컨테이너 공용 회로 차단기 (warm 호출 간 상태 유지)"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5')),
+                reset_timeout=float(os.environ.get('CIRCUIT_RESET_TIMEOUT', '30'))
+            )
+        return breaker
@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import product
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from .constant import MonitoringType, ServiceType, Severity, SlackConfig
+
+logger = logging.getLogger(__name__)
+
+RouteKey = Tuple[ServiceType, MonitoringType, Severity]
+
+# 라우팅 설정 파일이 없을 때 사용하는 기본 규칙 (기존 ERROR / ALARM 채널 분리와 동일)
+DEFAULT_ROUTING_RULES = [
+    {"monitoring_type": "ERROR", "channels": ["ERROR"]},
+    {"monitoring_type": "BATCH", "channels": ["ALARM"]},
+    {"monitoring_type": "RAG", "channels": ["ALARM"]}
+]
+
+@dataclass(frozen=True)
+class RoutingRule:
+    channels: Tuple[str, ...]
+    service: Optional[ServiceType] = None
+    monitoring_type: Optional[MonitoringType] = None
+    severity: Optional[Severity] = None
+    labels: Tuple[Tuple[str, str], ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RoutingRule":
+        """설정 값 검증 후 규칙 생성 (채널은 SlackConfig.CHANNELS 키 또는 채널 ID)"""
+        try:
+            channels = tuple(SlackConfig.CHANNELS[c][0] if c in SlackConfig.CHANNELS else c
+                             for c in data['channels'])
+            return cls(
+                channels=channels,
+                service=ServiceType[data['service']] if data.get('service') else None,
+                monitoring_type=MonitoringType[data['monitoring_type']] if data.get('monitoring_type') else None,
+                severity=Severity[data['severity']] if data.get('severity') else None,
+                labels=tuple(sorted((str(k), str(v)) for k, v in data.get('labels', {}).items()))
+            )
+        except KeyError as e:
+            raise ValueError(f"Invalid routing rule {data}: unknown value {e}") from e
+
+class RoutingTable:
+    """알림 라우팅 테이블 (로드 시점에 (서비스, 모니터링 유형, 심각도) 인덱스로 컴파일)"""
+
+    def __init__(self, rules: List[RoutingRule], default_channel: Optional[str] = None):
+        self.rules = rules
+        self.default_channel = default_channel or SlackConfig.CHANNELS['ALARM'][0]
+        self._compile()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RoutingTable":
+        rules = [RoutingRule.from_dict(rule) for rule in config.get('rules', [])]
+        default_channel = config.get('default_channel')
+        if default_channel in SlackConfig.CHANNELS:
+            default_channel = SlackConfig.CHANNELS[default_channel][0]
+        return cls(rules, default_channel)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "RoutingTable":
+        """ROUTING_CONFIG_PATH 의 JSON 설정 로드 (없으면 기본 규칙 사용)"""
+        path = path or os.environ.get('ROUTING_CONFIG_PATH')
+        if not path:
+            return cls.from_config({'rules': DEFAULT_ROUTING_RULES})
+        with open(path, encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def _compile(self) -> None:
+        """모든 (서비스, 유형, 심각도) 조합에 대해 라벨 없는 채널과 라벨 인덱스를 미리 계산"""
+        self._static: Dict[RouteKey, Tuple[str, ...]] = {}
+        self._by_label: Dict[RouteKey, Dict[Tuple[str, str], List[Tuple[int, int, Tuple[str, ...]]]]] = {}
+
+        for key in product(ServiceType, MonitoringType, Severity):
+            static: List[str] = []
+            label_index: Dict[Tuple[str, str], List[Tuple[int, int, Tuple[str, ...]]]] = {}
+            for rule_id, rule in enumerate(self.rules):
+                if not self._matches_key(rule, key):
+                    continue
+                if not rule.labels:
+                    static.extend(c for c in rule.channels if c not in static)
+                    continue
+                for label in rule.labels:
+                    label_index.setdefault(label, []).append((rule_id, len(rule.labels), rule.channels))
+            self._static[key] = tuple(static)
+            self._by_label[key] = label_index
+
+        self._resolve_cached = lru_cache(maxsize=1024)(self._resolve)
+
+    @staticmethod
+    def _matches_key(rule: RoutingRule, key: RouteKey) -> bool:
+        service, monitoring_type, severity = key
+        return ((rule.service is None or rule.service == service) and
+                (rule.monitoring_type is None or rule.monitoring_type == monitoring_type) and
+                (rule.severity is None or rule.severity == severity))
+
+    def resolve(self, service_type: ServiceType, monitoring_type: MonitoringType,
+                severity: Severity = Severity.ERROR,
+                labels: Optional[Dict[str, str]] = None) -> List[str]:
+        """알림을 보낼 채널 목록 조회 (규칙 수와 무관하게 인덱스 조회만 수행)"""
+        label_set = frozenset((str(k), str(v)) for k, v in (labels or {}).items())
+        return list(self._resolve_cached((service_type, monitoring_type, severity), label_set))
+
+    def _resolve(self, key: RouteKey, labels: FrozenSet[Tuple[str, str]]) -> Tuple[str, ...]:
+        channels = list(self._static[key])
+        label_index = self._by_label[key]
+        if label_index:
+            hits: Dict[int, int] = {}
+            for label in labels:
+                for rule_id, required, rule_channels in label_index.get(label, ()):
+                    hits[rule_id] = hits.get(rule_id, 0) + 1
+                    if hits[rule_id] == required:
+                        channels.extend(c for c in rule_channels if c not in channels)
+        return tuple(channels) or (self.default_channel,)
+
+_routing_table: Optional[RoutingTable] = None
+
+def get_routing_table() -> RoutingTable:
+    """컨테이너 단위로 재사용되는 라우팅 테이블"""
+    global _routing_table
+    if _routing_table is None:
+        _routing_table = RoutingTable.load()
+        logger.info(f"Routing table compiled with {len(_routing_table.rules)} rules")
+    return _routing_table
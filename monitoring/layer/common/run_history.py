@@ -0,0 +1,364 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from .local_store import SQLiteStore
+from .resilience import aws_client
+
+logger = logging.getLogger(__name__)
+
+# 작업명별로 분위수를 유지하는 구간 (작업이 보고한 processedStats 가 없으면 Batch 이벤트 시각 기준:
+# 대기 = 추출, 실행 = 변환, 생성~종료 = 전체)
+PHASES = ("extract", "transform", "load", "total")
+PHASE_NAMES = {"extract": "추출", "transform": "변환", "load": "적재", "total": "전체"}
+
+class TDigest:
+    """병합형 t-digest (중심점 수가 compression 의 2배 이하로 제한되어 실행 횟수와 관계없이 크기 일정)"""
+
+    def __init__(self, compression: float = 100.0, centroids: Optional[List[List[float]]] = None,
+                 count: float = 0.0, min_value: Optional[float] = None, max_value: Optional[float] = None):
+        self.compression = compression
+        self.centroids: List[List[float]] = centroids or []  # [평균, 건수] 를 평균 순으로 유지
+        self.count = count
+        self.min = min_value
+        self.max = max_value
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.centroids.append([value, weight])
+        self.count += weight
+        self.centroids.sort(key=lambda centroid: centroid[0])
+        if len(self.centroids) > 2 * self.compression:
+            self._compress()
+
+    def _scale(self, q: float) -> float:
+        # k1 척도 함수 (양 끝 분위일수록 중심점을 작게 유지, 전체 중심점 수는 compression / 2 이하)
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self) -> None:
+        # 합친 중심점이 k 척도에서 1 이하의 폭을 차지할 때만 인접 중심점을 합침
+        merged = [list(self.centroids[0])]
+        cumulative = 0.0
+        k_left = self._scale(0.0)
+        for mean, weight in self.centroids[1:]:
+            current = merged[-1]
+            if self._scale((cumulative + current[1] + weight) / self.count) - k_left <= 1.0:
+                current[0] += (mean - current[0]) * weight / (current[1] + weight)
+                current[1] += weight
+            else:
+                cumulative += current[1]
+                k_left = self._scale(cumulative / self.count)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q (0~1) 분위 값 (인접 중심점 평균 사이를 선형 보간)"""
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        rank = q * self.count
+        cumulative = 0.0
+        previous_mean, previous_mid = self.min, 0.0
+        for mean, weight in self.centroids:
+            mid = cumulative + weight / 2
+            if rank < mid:
+                if mid == previous_mid:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (rank - previous_mid) / (mid - previous_mid)
+            previous_mean, previous_mid = mean, mid
+            cumulative += weight
+        return self.max if rank >= self.count else previous_mean
+
+    def to_json(self) -> str:
+        return json.dumps({"compression": self.compression, "centroids": self.centroids,
+                           "count": self.count, "min": self.min, "max": self.max})
+
+    @classmethod
+    def from_json(cls, text: str) -> 'TDigest':
+        data = json.loads(text)
+        return cls(data["compression"], data["centroids"], data["count"], data["min"], data["max"])
+
+@dataclass
+class PhaseComparison:
+    phase: str
+    value: float  # 이번 실행 소요 시간(초)
+    runs: int  # 비교에 쓴 이전 실행 횟수
+    p50: Optional[float]
+    p95: Optional[float]
+    regression: bool = False
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.value / self.p50 if self.p50 else None
+
+@dataclass
+class RunSketch:
+    digest: str  # TDigest JSON
+    runs: int
+    p50: Optional[float]
+    p95: Optional[float]
+    updated_at: float = 0.0  # 갱신 충돌 확인용 (읽은 뒤 다른 컨테이너가 갱신했는지)
+
+class RunHistoryStore(ABC):
+    """작업명 / 구간별 소요 시간 분위수 스케치와 작업별 비교 결과 저장소 인터페이스"""
+
+    @abstractmethod
+    def get_run(self, job_id: str) -> Optional[List[PhaseComparison]]:
+        """이미 반영한 작업의 비교 결과"""
+
+    @abstractmethod
+    def get_sketches(self, job_name: str) -> Dict[str, RunSketch]:
+        """작업명의 구간별 스케치"""
+
+    @abstractmethod
+    def record_run(self, job_id: str, job_name: str, comparisons: List[PhaseComparison],
+                   sketches: Dict[str, RunSketch], read_at: Dict[str, float]) -> bool:
+        """비교 결과와 갱신한 스케치를 한 번에 저장
+
+        같은 job_id 가 이미 있거나 읽은 뒤 (read_at, 없던 스케치는 0) 다른 쪽이 스케치를 갱신했으면 저장하지 않고 False.
+        """
+
+class SQLiteRunHistoryStore(SQLiteStore, RunHistoryStore):
+    """컨테이너 로컬 SQLite 저장소 (단일 컨테이너 / 테스트용)"""
+
+    FILENAME = "run_history.sqlite3"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS run_sketches (
+            job_name TEXT NOT NULL,
+            phase TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            runs INTEGER NOT NULL,
+            p50 REAL,
+            p95 REAL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (job_name, phase)
+        );
+        CREATE TABLE IF NOT EXISTS batch_runs (
+            job_id TEXT PRIMARY KEY,
+            job_name TEXT NOT NULL,
+            comparisons TEXT NOT NULL,
+            recorded_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_batch_runs_recorded ON batch_runs (recorded_at);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or os.environ.get('BATCH_HISTORY_PATH'))
+
+    def get_run(self, job_id: str) -> Optional[List[PhaseComparison]]:
+        row = self._execute("SELECT comparisons FROM batch_runs WHERE job_id = ?", (job_id,)).fetchone()
+        return [PhaseComparison(**data) for data in json.loads(row['comparisons'])] if row else None
+
+    def get_sketches(self, job_name: str) -> Dict[str, RunSketch]:
+        rows = self._execute("SELECT phase, digest, runs, p50, p95, updated_at FROM run_sketches "
+                             "WHERE job_name = ?", (job_name,)).fetchall()
+        return {row['phase']: RunSketch(row['digest'], row['runs'], row['p50'], row['p95'], row['updated_at'])
+                for row in rows}
+
+    def record_run(self, job_id: str, job_name: str, comparisons: List[PhaseComparison],
+                   sketches: Dict[str, RunSketch], read_at: Dict[str, float]) -> bool:
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM batch_runs WHERE job_id = ?", (job_id,)).fetchone():
+                return False
+            for phase, sketch in sketches.items():
+                current = conn.execute("SELECT updated_at FROM run_sketches WHERE job_name = ? AND phase = ?",
+                                       (job_name, phase)).fetchone()
+                if (current['updated_at'] if current else 0.0) != read_at.get(phase, 0.0):
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO run_sketches (job_name, phase, digest, runs, p50, p95, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_name, phase, sketch.digest, sketch.runs, sketch.p50, sketch.p95, sketch.updated_at)
+                )
+            conn.execute(
+                "INSERT INTO batch_runs (job_id, job_name, comparisons, recorded_at) VALUES (?, ?, ?, ?)",
+                (job_id, job_name, json.dumps([asdict(c) for c in comparisons]), time.time())
+            )
+        return True
+
+    def purge(self, older_than: float) -> int:
+        return self._execute("DELETE FROM batch_runs WHERE recorded_at < ?", (older_than,)).rowcount
+
+class DynamoRunHistoryStore(RunHistoryStore):
+    """여러 컨테이너가 공유하는 DynamoDB 저장소 (스케치와 실행 결과를 한 트랜잭션으로 저장)
+
+    테이블: 파티션 키 pk (S), 정렬 키 sk (S), TTL 속성 expires_at
+    스케치는 pk=sketch#<작업명>, sk=<구간>, 실행 결과는 pk=run#<job_id>, sk=run (BATCH_RUN_TTL 후 삭제)
+    """
+
+    def __init__(self, table: str, run_ttl: Optional[float] = None):
+        self.table = table
+        self.run_ttl = run_ttl if run_ttl is not None else float(os.environ.get('BATCH_RUN_TTL', '2592000'))
+        self._client = aws_client('dynamodb')
+
+    def get_run(self, job_id: str) -> Optional[List[PhaseComparison]]:
+        item = self._client.get_item(
+            TableName=self.table, Key={'pk': {'S': f"run#{job_id}"}, 'sk': {'S': "run"}}, ConsistentRead=True
+        ).get('Item')
+        return [PhaseComparison(**data) for data in json.loads(item['comparisons']['S'])] if item else None
+
+    def get_sketches(self, job_name: str) -> Dict[str, RunSketch]:
+        items = self._client.query(
+            TableName=self.table, KeyConditionExpression="pk = :pk",
+            ExpressionAttributeValues={':pk': {'S': f"sketch#{job_name}"}}, ConsistentRead=True
+        ).get('Items', [])
+        return {item['sk']['S']: RunSketch(
+            digest=item['digest']['S'],
+            runs=int(item['runs']['N']),
+            p50=float(item['p50']['N']) if 'p50' in item else None,
+            p95=float(item['p95']['N']) if 'p95' in item else None,
+            updated_at=float(item['updated_at']['N'])
+        ) for item in items}
+
+    def record_run(self, job_id: str, job_name: str, comparisons: List[PhaseComparison],
+                   sketches: Dict[str, RunSketch], read_at: Dict[str, float]) -> bool:
+        now = time.time()
+        writes = [{'Put': {
+            'TableName': self.table,
+            'Item': {'pk': {'S': f"run#{job_id}"}, 'sk': {'S': "run"}, 'job_name': {'S': job_name},
+                     'comparisons': {'S': json.dumps([asdict(c) for c in comparisons])},
+                     'recorded_at': {'N': str(now)}, 'expires_at': {'N': str(int(now + self.run_ttl))}},
+            'ConditionExpression': "attribute_not_exists(pk)"
+        }}]
+        for phase, sketch in sketches.items():
+            item = {'pk': {'S': f"sketch#{job_name}"}, 'sk': {'S': phase}, 'digest': {'S': sketch.digest},
+                    'runs': {'N': str(sketch.runs)}, 'updated_at': {'N': repr(sketch.updated_at)}}
+            for name in ('p50', 'p95'):
+                if getattr(sketch, name) is not None:
+                    item[name] = {'N': repr(getattr(sketch, name))}
+            if phase in read_at:
+                condition = {'ConditionExpression': "updated_at = :read_at",
+                             'ExpressionAttributeValues': {':read_at': {'N': repr(read_at[phase])}}}
+            else:
+                condition = {'ConditionExpression': "attribute_not_exists(pk)"}
+            writes.append({'Put': {'TableName': self.table, 'Item': item, **condition}})
+        try:
+            self._client.transact_write_items(TransactItems=writes)
+            return True
+        except self._client.exceptions.TransactionCanceledException:
+            return False
+
+def create_run_history_store() -> RunHistoryStore:
+    """BATCH_HISTORY_TABLE 이 있으면 DynamoDB 공유 저장소, 없으면 로컬 SQLite 저장소"""
+    table = os.environ.get('BATCH_HISTORY_TABLE')
+    return DynamoRunHistoryStore(table) if table else SQLiteRunHistoryStore()
+
+class RunHistory:
+    """작업명별 실행 이력 인덱스 (새 실행을 저장된 p50 / p95 와 비교한 뒤 성공한 실행만 스케치에 반영)
+
+    분위수는 스케치를 갱신할 때 함께 저장하므로 비교는 작업명당 한 번의 스케치 조회로 끝남.
+    """
+
+    # 다른 컨테이너와 갱신이 충돌했을 때 다시 읽어 비교하는 횟수
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, store: Optional[RunHistoryStore] = None, min_runs: int = 5,
+                 regression_ratio: float = 2.0, min_seconds: float = 60.0, compression: float = 100.0):
+        self.store = store or create_run_history_store()
+        self.min_runs = min_runs
+        self.regression_ratio = regression_ratio
+        self.min_seconds = min_seconds
+        self.compression = compression
+
+    def observe(self, job_id: str, job_name: str, durations: Dict[str, float],
+                succeeded: bool = True) -> List[PhaseComparison]:
+        """실행 1건 비교 후 기록 (같은 job_id 는 채널 / 재시도 / 컨테이너와 관계없이 한 번만 반영하고 같은 결과 반환)"""
+        for _ in range(self.MAX_ATTEMPTS):
+            recorded = self.store.get_run(job_id)
+            if recorded is not None:
+                return recorded
+            current = self.store.get_sketches(job_name)
+            comparisons, updated = self._compare(durations, current, succeeded)
+            if self.store.record_run(job_id, job_name, comparisons, updated,
+                                     {phase: current[phase].updated_at for phase in updated if phase in current}):
+                break
+            logger.info(f"Run history for {job_name} changed concurrently, retrying {job_id}")
+        else:
+            raise RuntimeError(f"Run history for {job_name} kept changing while recording {job_id}")
+
+        regressions = [c for c in comparisons if c.regression]
+        if regressions:
+            logger.warning(f"Batch run regression for {job_name} ({job_id}): " + ", ".join(
+                f"{c.phase} {c.value:.0f}s vs p50 {c.p50:.0f}s / p95 {c.p95:.0f}s" for c in regressions))
+        return comparisons
+
+    def _compare(self, durations: Dict[str, float], sketches: Dict[str, RunSketch],
+                 succeeded: bool) -> Tuple[List[PhaseComparison], Dict[str, RunSketch]]:
+        """구간별로 저장된 분위수와 비교하고 성공한 실행이면 갱신할 스케치 생성"""
+        now = time.time()
+        comparisons = []
+        updated = {}
+        for phase, value in durations.items():
+            sketch = sketches.get(phase)
+            comparison = PhaseComparison(phase=phase, value=value, runs=sketch.runs if sketch else 0,
+                                         p50=sketch.p50 if sketch else None,
+                                         p95=sketch.p95 if sketch else None)
+            comparison.regression = self._is_regression(comparison)
+            comparisons.append(comparison)
+            if not succeeded:
+                # 실패한 실행은 중간에 끝나 소요 시간이 짧으므로 기준 분포에 넣지 않음
+                continue
+            digest = TDigest.from_json(sketch.digest) if sketch else TDigest(self.compression)
+            digest.add(value)
+            updated[phase] = RunSketch(digest.to_json(), comparison.runs + 1,
+                                       digest.quantile(0.5), digest.quantile(0.95), now)
+        return comparisons, updated
+
+    def context(self, job_name: Optional[str]) -> Dict[str, Tuple[int, float, float]]:
+        """작업명의 구간별 (실행 횟수, p50, p95)"""
+        if not job_name:
+            return {}
+        return {phase: (sketch.runs, sketch.p50, sketch.p95)
+                for phase, sketch in self.store.get_sketches(job_name).items()}
+
+    def _is_regression(self, comparison: PhaseComparison) -> bool:
+        """p95 를 넘고 p50 의 regression_ratio 배 이상이며 차이가 min_seconds 이상인 실행"""
+        if comparison.runs < self.min_runs or not comparison.p50 or comparison.p95 is None:
+            return False
+        return (comparison.value > comparison.p95
+                and comparison.value >= comparison.p50 * self.regression_ratio
+                and comparison.value - comparison.p50 >= self.min_seconds)
+
+def run_durations(detail: Dict[str, Any]) -> Dict[str, float]:
+    """Batch 이벤트 detail 로 구간별 소요 시간(초) 계산 (끝나지 않은 구간 제외)
+
+    마지막 시도의 container.processedStats 에 작업이 보고한 extract / transform / load_time(초) 이 있으면 사용.
+    """
+    created_at, started_at, stopped_at = (detail.get(key) for key in ('createdAt', 'startedAt', 'stoppedAt'))
+    attempts = detail.get('attempts') or [{}]
+    stats = (attempts[-1].get('container') or {}).get('processedStats') or {}
+    durations = {}
+    if any(f"{phase}_time" in stats for phase in ("extract", "transform", "load")):
+        for phase in ("extract", "transform", "load"):
+            if stats.get(f"{phase}_time") is not None:
+                durations[phase] = float(stats[f"{phase}_time"])
+    else:
+        if created_at and started_at:
+            durations["extract"] = (started_at - created_at) / 1000
+        if started_at and stopped_at:
+            durations["transform"] = (stopped_at - started_at) / 1000
+    if created_at and stopped_at:
+        durations["total"] = (stopped_at - created_at) / 1000
+    return {phase: max(value, 0.0) for phase, value in durations.items()}
+
+_run_history: Optional[RunHistory] = None
+_run_history_lock = threading.Lock()
+
+def get_run_history() -> RunHistory:
+    """컨테이너 공용 실행 이력 인덱스"""
+    global _run_history
+    with _run_history_lock:
+        if _run_history is None:
+            _run_history = RunHistory(
+                min_runs=int(os.environ.get('BATCH_HISTORY_MIN_RUNS', '5')),
+                regression_ratio=float(os.environ.get('BATCH_REGRESSION_RATIO', '2')),
+                min_seconds=float(os.environ.get('BATCH_REGRESSION_MIN_SECONDS', '60'))
+            )
+        return _run_history
@@ -0,0 +1,119 @@
+import os
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from .constant import SlackConfig
+from .resilience import aws_client
+
+# SSM get_parameters 한 번에 조회할 수 있는 최대 파라미터 수
+SSM_MAX_PARAMETERS = 10
+
+class SecretsProvider:
+    """SSM 파라미터 일괄 조회 및 TTL 캐시 (백그라운드 갱신)"""
+
+    def __init__(self, paths: Dict[str, str], ttl: float = 900.0,
+                 refresh_ratio: float = 0.8, ssm_client=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.paths = paths  # 환경변수 이름 -> SSM 파라미터 경로
+        self.ttl = ttl
+        self.refresh_ratio = refresh_ratio
+        self._ssm = ssm_client
+        self._values: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._values)
+
+    def get_all(self) -> Dict[str, str]:
+        """캐시된 값 반환 (만료 시 재조회, 갱신 시점이 지나면 백그라운드 갱신)"""
+        age = time.monotonic() - self._fetched_at
+        if not self._values or age >= self.ttl:
+            with self._lock:
+                if not self._values or time.monotonic() - self._fetched_at >= self.ttl:
+                    try:
+                        self._refresh()
+                    except Exception as e:
+                        # 이전 값이 있으면 만료된 값이라도 사용 (다음 호출에서 재시도)
+                        if not self._values:
+                            raise
+                        self.logger.error(f"Failed to refresh secrets, using cached values: {str(e)}")
+        elif age >= self.ttl * self.refresh_ratio:
+            self._start_refresh_thread()
+        return dict(self._values)
+
+    def get(self, name: str) -> Optional[str]:
+        return self.get_all().get(name)
+
+    def export_to_environ(self) -> None:
+        """조회한 값을 환경변수에 반영"""
+        os.environ.update(self.get_all())
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _get_ssm_client(self):
+        if self._ssm is None:
+            self._ssm = aws_client('ssm')
+        return self._ssm
+
+    def _refresh(self) -> None:
+        """모든 경로를 get_parameters 로 일괄 조회"""
+        names = {path: name for name, path in self.paths.items()}
+        path_list = list(names)
+        values = {}
+        for i in range(0, len(path_list), SSM_MAX_PARAMETERS):
+            response = self._get_ssm_client().get_parameters(
+                Names=path_list[i:i + SSM_MAX_PARAMETERS],
+                WithDecryption=True
+            )
+            for parameter in response.get('Parameters', []):
+                values[names[parameter['Name']]] = parameter['Value']
+            if response.get('InvalidParameters'):
+                self.logger.error(f"Invalid SSM parameters: {response['InvalidParameters']}")
+
+        rotated = [name for name, value in values.items()
+                   if name in self._values and self._values[name] != value]
+        if rotated:
+            self.logger.info(f"Secrets rotated: {rotated}")
+        self._values = {**self._values, **values}
+        self._fetched_at = time.monotonic()
+        os.environ.update(values)
+
+    def _start_refresh_thread(self) -> None:
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_loop,
+                                                name="secrets-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        """TTL 의 refresh_ratio 지점마다 갱신 (실패 시 기존 값을 유지하고 재시도)"""
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    self._refresh()
+                delay = self.ttl * self.refresh_ratio
+            except Exception as e:
+                self.logger.error(f"Failed to refresh secrets: {str(e)}")
+                delay = min(30.0, self.ttl * (1 - self.refresh_ratio))
+            if self._stop.wait(delay):
+                return
+
+_slack_secrets: Optional[SecretsProvider] = None
+_slack_secrets_lock = threading.Lock()
+
+def get_slack_secrets() -> SecretsProvider:
+    """슬랙 토큰 공용 provider (SLACK_BOT_TOKEN 등 환경변수 이름으로 조회)"""
+    global _slack_secrets
+    with _slack_secrets_lock:
+        if _slack_secrets is None:
+            _slack_secrets = SecretsProvider(
+                paths={f"SLACK_{name}": path for name, path in SlackConfig.TOKENS.items()},
+                ttl=float(os.environ.get('SLACK_TOKEN_TTL', '900'))
+            )
+        return _slack_secrets
@@ -0,0 +1,384 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .local_store import SQLiteStore
+from .resilience import aws_client
+
+logger = logging.getLogger(__name__)
+
+# /silence 명령으로 만들 수 있는 최대 기간(초)
+MAX_SILENCE_SECONDS = 30 * 86400
+DURATION_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+@dataclass(frozen=True)
+class Silence:
+    """라벨 조건과 시간 구간으로 정의한 알림 무음 규칙 (ends_at 은 포함하지 않음)"""
+    id: str
+    matchers: Tuple[Tuple[str, str], ...]
+    starts_at: float
+    ends_at: float
+    comment: str = ""
+    created_by: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Silence":
+        """설정 값 검증 후 규칙 생성 (matchers 값에는 '*' 패턴 사용 가능)"""
+        try:
+            silence = cls(
+                id=str(data.get('id') or uuid.uuid4()),
+                matchers=tuple(sorted((str(k), str(v)) for k, v in data['matchers'].items())),
+                starts_at=float(data['starts_at']),
+                ends_at=float(data['ends_at']),
+                comment=data.get('comment', ''),
+                created_by=data.get('created_by', '')
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid silence {data}: {e}") from e
+        if silence.ends_at <= silence.starts_at:
+            raise ValueError(f"Invalid silence {data}: ends_at must be after starts_at")
+        return silence
+
+    @classmethod
+    def parse(cls, text: str, now: float, created_by: str = "") -> "Silence":
+        """'2h service=PROD monitoring_type=ERROR 배포 중' 형식의 명령 파싱 (기간, 라벨 조건, 나머지는 설명)"""
+        seconds = None
+        matchers: Dict[str, str] = {}
+        comment = []
+        for token in (text or "").split():
+            duration = re.fullmatch(r'(\d+)([mhd])', token)
+            if duration and seconds is None and not comment:
+                seconds = int(duration.group(1)) * DURATION_UNITS[duration.group(2)]
+            elif '=' in token and not comment:
+                name, _, pattern = token.partition('=')
+                if not name or not pattern:
+                    raise ValueError(f"잘못된 조건: {token}")
+                matchers[name] = pattern
+            else:
+                comment.append(token)
+        if not seconds:
+            raise ValueError("기간 (예: 30m, 2h, 1d) 을 입력하세요")
+        if not matchers:
+            raise ValueError("라벨 조건 (예: service=PROD) 을 하나 이상 입력하세요")
+        return cls.from_dict({'matchers': matchers, 'starts_at': now,
+                              'ends_at': now + min(seconds, MAX_SILENCE_SECONDS),
+                              'comment': " ".join(comment), 'created_by': created_by})
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        return all(name in labels and fnmatchcase(labels[name], pattern)
+                   for name, pattern in self.matchers)
+
+class IntervalIndex:
+    """시간 구간 인덱스 (경계 시각으로 나눈 구간마다 겹치는 규칙을 미리 계산해 이진 탐색으로 조회)"""
+
+    def __init__(self, silences: Sequence[Silence]):
+        events: Dict[float, List[Tuple[int, Silence]]] = {}
+        for silence in silences:
+            events.setdefault(silence.starts_at, []).append((1, silence))
+            events.setdefault(silence.ends_at, []).append((-1, silence))
+
+        self._boundaries: List[float] = sorted(events)
+        self._segments: List[Tuple[Silence, ...]] = []
+        active: Dict[str, Silence] = {}
+        for boundary in self._boundaries:
+            for delta, silence in events[boundary]:
+                if delta > 0:
+                    active[silence.id] = silence
+                else:
+                    active.pop(silence.id, None)
+            # 활성 규칙이 바뀌지 않은 구간은 같은 튜플을 공유
+            current = tuple(active.values())
+            if self._segments and self._segments[-1] == current:
+                current = self._segments[-1]
+            self._segments.append(current)
+
+    def __len__(self) -> int:
+        return len(self._boundaries)
+
+    def at(self, timestamp: float) -> Tuple[Silence, ...]:
+        position = bisect_right(self._boundaries, timestamp)
+        return self._segments[position - 1] if position else ()
+
+class SilenceStore(ABC):
+    """무음 규칙 저장소 인터페이스"""
+
+    @abstractmethod
+    def list_silences(self, now: float) -> List[Silence]:
+        """끝나지 않은 규칙 조회"""
+
+    @abstractmethod
+    def add(self, silence: Silence) -> None:
+        pass
+
+    @abstractmethod
+    def expire(self, silence_id: str, now: float) -> None:
+        """규칙을 지금 시각으로 종료"""
+
+    @abstractmethod
+    def version(self) -> int:
+        """규칙이 바뀔 때마다 증가하는 값 (인덱스 재생성 판단용)"""
+
+    @abstractmethod
+    def record_suppressed(self, silence_id: str, labels: Dict[str, str], at: float) -> None:
+        """무음 처리된 알림 기록"""
+
+    @abstractmethod
+    def suppressed_counts(self, since: float = 0.0) -> Dict[str, int]:
+        """규칙별 무음 처리된 알림 수"""
+
+class SQLiteSilenceStore(SQLiteStore, SilenceStore):
+    """SQLite 기반 무음 규칙 저장소"""
+
+    FILENAME = "silences.sqlite3"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS silences (
+            id TEXT PRIMARY KEY,
+            matchers TEXT NOT NULL,
+            starts_at REAL NOT NULL,
+            ends_at REAL NOT NULL,
+            comment TEXT NOT NULL DEFAULT '',
+            created_by TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_silences_ends ON silences (ends_at);
+        CREATE TABLE IF NOT EXISTS suppressed_alerts (
+            silence_id TEXT NOT NULL,
+            labels TEXT NOT NULL,
+            suppressed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_suppressed_silence ON suppressed_alerts (silence_id, suppressed_at);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or os.environ.get('SILENCE_DB_PATH'))
+
+    def list_silences(self, now: float) -> List[Silence]:
+        rows = self._execute("SELECT * FROM silences WHERE ends_at > ?", (now,)).fetchall()
+        return [Silence(id=row['id'], matchers=tuple(tuple(m) for m in json.loads(row['matchers'])),
+                        starts_at=row['starts_at'], ends_at=row['ends_at'],
+                        comment=row['comment'], created_by=row['created_by']) for row in rows]
+
+    def add(self, silence: Silence) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO silences (id, matchers, starts_at, ends_at, comment, created_by) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (silence.id, json.dumps(silence.matchers), silence.starts_at, silence.ends_at,
+             silence.comment, silence.created_by)
+        )
+
+    def expire(self, silence_id: str, now: float) -> None:
+        self._execute("UPDATE silences SET ends_at = MIN(ends_at, ?) WHERE id = ?", (now, silence_id))
+
+    def version(self) -> int:
+        # 추가 (rowid), 종료 (ends_at 합계), 삭제 (건수) 를 모두 반영하는 값
+        row = self._execute("SELECT COUNT(*), MAX(rowid), TOTAL(ends_at) FROM silences").fetchone()
+        return hash(tuple(row))
+
+    def record_suppressed(self, silence_id: str, labels: Dict[str, str], at: float) -> None:
+        self._execute("INSERT INTO suppressed_alerts (silence_id, labels, suppressed_at) VALUES (?, ?, ?)",
+                      (silence_id, json.dumps(labels, ensure_ascii=False), at))
+
+    def suppressed_counts(self, since: float = 0.0) -> Dict[str, int]:
+        rows = self._execute(
+            "SELECT silence_id, COUNT(*) AS count FROM suppressed_alerts "
+            "WHERE suppressed_at >= ? GROUP BY silence_id", (since,)
+        ).fetchall()
+        return {row['silence_id']: row['count'] for row in rows}
+
+class DynamoSilenceStore(SilenceStore):
+    """여러 컨테이너가 공유하는 DynamoDB 저장소 (한 컨테이너에서 추가 / 종료한 규칙이 모든 컨테이너에 반영)
+
+    테이블: 파티션 키 pk (S), 정렬 키 sk (S), TTL 속성 expires_at
+    규칙은 pk=silence, sk=<id>, 변경 번호는 pk=version, sk=version (규칙 변경과 한 트랜잭션으로 증가),
+    무음 처리 건수는 pk=suppressed, sk=<id>#<시간대> 카운터 (시간 단위로 집계)
+    """
+
+    def __init__(self, table: str, retention: Optional[float] = None):
+        self.table = table
+        # 끝난 규칙과 무음 처리 건수 보관 시간(초, 테이블 TTL)
+        self.retention = retention if retention is not None else float(os.environ.get('SILENCE_RETENTION', '604800'))
+        self._client = aws_client('dynamodb')
+
+    def list_silences(self, now: float) -> List[Silence]:
+        silences = []
+        for item in self._query("silence", FilterExpression="ends_at > :now",
+                                ExpressionAttributeValues={':pk': {'S': "silence"}, ':now': {'N': repr(now)}}):
+            silences.append(Silence(
+                id=item['sk']['S'], matchers=tuple(tuple(m) for m in json.loads(item['matchers']['S'])),
+                starts_at=float(item['starts_at']['N']), ends_at=float(item['ends_at']['N']),
+                comment=item.get('comment', {}).get('S', ''), created_by=item.get('created_by', {}).get('S', '')
+            ))
+        return silences
+
+    def add(self, silence: Silence) -> None:
+        self._client.transact_write_items(TransactItems=[
+            {'Put': {'TableName': self.table, 'Item': {
+                'pk': {'S': "silence"}, 'sk': {'S': silence.id},
+                'matchers': {'S': json.dumps(silence.matchers)},
+                'starts_at': {'N': repr(silence.starts_at)}, 'ends_at': {'N': repr(silence.ends_at)},
+                'comment': {'S': silence.comment}, 'created_by': {'S': silence.created_by},
+                'expires_at': {'N': str(int(silence.ends_at + self.retention))}
+            }}},
+            self._bump_version()
+        ])
+
+    def expire(self, silence_id: str, now: float) -> None:
+        try:
+            self._client.transact_write_items(TransactItems=[
+                {'Update': {
+                    'TableName': self.table, 'Key': {'pk': {'S': "silence"}, 'sk': {'S': silence_id}},
+                    'UpdateExpression': "SET ends_at = :now, expires_at = :expires_at",
+                    'ConditionExpression': "ends_at > :now",
+                    'ExpressionAttributeValues': {':now': {'N': repr(now)},
+                                                  ':expires_at': {'N': str(int(now + self.retention))}}
+                }},
+                self._bump_version()
+            ])
+        except self._client.exceptions.TransactionCanceledException:
+            pass  # 없거나 이미 끝난 규칙
+
+    def version(self) -> int:
+        item = self._client.get_item(
+            TableName=self.table, Key={'pk': {'S': "version"}, 'sk': {'S': "version"}}, ConsistentRead=True
+        ).get('Item')
+        return int(item['version']['N']) if item else 0
+
+    def record_suppressed(self, silence_id: str, labels: Dict[str, str], at: float) -> None:
+        bucket = int(at // 3600 * 3600)
+        self._client.update_item(
+            TableName=self.table, Key={'pk': {'S': "suppressed"}, 'sk': {'S': f"{silence_id}#{bucket}"}},
+            UpdateExpression="ADD #count :one SET silence_id = :id, #bucket = :bucket, expires_at = :expires_at",
+            ExpressionAttributeNames={'#count': 'count', '#bucket': 'bucket'},
+            ExpressionAttributeValues={':one': {'N': "1"}, ':id': {'S': silence_id}, ':bucket': {'N': str(bucket)},
+                                       ':expires_at': {'N': str(int(at + self.retention))}}
+        )
+
+    def suppressed_counts(self, since: float = 0.0) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for item in self._query("suppressed", FilterExpression="#bucket >= :since",
+                                ExpressionAttributeNames={'#bucket': 'bucket'},
+                                ExpressionAttributeValues={':pk': {'S': "suppressed"},
+                                                           ':since': {'N': str(int(since // 3600 * 3600))}}):
+            silence_id = item['silence_id']['S']
+            counts[silence_id] = counts.get(silence_id, 0) + int(item['count']['N'])
+        return counts
+
+    def _bump_version(self) -> Dict[str, Any]:
+        return {'Update': {
+            'TableName': self.table, 'Key': {'pk': {'S': "version"}, 'sk': {'S': "version"}},
+            'UpdateExpression': "ADD #version :one", 'ExpressionAttributeNames': {'#version': 'version'},
+            'ExpressionAttributeValues': {':one': {'N': "1"}}
+        }}
+
+    def _query(self, pk: str, **kwargs: Any) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        request = {'TableName': self.table, 'KeyConditionExpression': "pk = :pk", 'ConsistentRead': True, **kwargs}
+        while True:
+            response = self._client.query(**request)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def create_silence_store() -> SilenceStore:
+    """SILENCE_TABLE 이 있으면 DynamoDB 공유 저장소, 없으면 로컬 SQLite 저장소 (컨테이너마다 따로 기록)"""
+    table = os.environ.get('SILENCE_TABLE')
+    return DynamoSilenceStore(table) if table else SQLiteSilenceStore()
+
+class SilenceEngine:
+    """무음 규칙 조회 (설정 파일 규칙과 저장소 규칙을 구간 인덱스로 컴파일, 저장소가 바뀌면 재생성)
+
+    공유 저장소에서 다른 컨테이너가 바꾼 규칙은 refresh_interval 안에 반영됨
+    """
+
+    def __init__(self, store: SilenceStore, static_silences: Optional[List[Silence]] = None,
+                 refresh_interval: float = 30.0):
+        self.store = store
+        self.static_silences = static_silences or []
+        self.refresh_interval = refresh_interval
+        self._index = IntervalIndex([])
+        self._version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, store: Optional[SilenceStore] = None, path: Optional[str] = None) -> "SilenceEngine":
+        """SILENCE_CONFIG_PATH 의 JSON 설정 ({"silences": [...]}) 과 저장소 (create_silence_store) 규칙 사용"""
+        path = path or os.environ.get('SILENCE_CONFIG_PATH')
+        static_silences = []
+        if path:
+            with open(path, encoding='utf-8') as f:
+                static_silences = [Silence.from_dict(item) for item in json.load(f).get('silences', [])]
+        return cls(store or create_silence_store(), static_silences,
+                   refresh_interval=float(os.environ.get('SILENCE_REFRESH_INTERVAL', '30')))
+
+    def match(self, labels: Dict[str, str], at: Optional[float] = None) -> Optional[Silence]:
+        """알림 시각에 적용되는 규칙 중 라벨이 일치하는 첫 규칙"""
+        at = time.time() if at is None else at
+        for silence in self._get_index(at).at(at):
+            if silence.matches(labels):
+                return silence
+        return None
+
+    def suppress(self, labels: Dict[str, str], at: Optional[float] = None) -> Optional[Silence]:
+        """일치하는 규칙이 있으면 무음 처리 기록 후 규칙 반환"""
+        at = time.time() if at is None else at
+        silence = self.match(labels, at)
+        if silence:
+            try:
+                self.store.record_suppressed(silence.id, labels, at)
+            except Exception as e:
+                logger.error(f"Failed to record suppressed alert: {str(e)}")
+            logger.info(json.dumps({"type": "alert_suppressed", "silence_id": silence.id,
+                                    "labels": labels}, ensure_ascii=False))
+        return silence
+
+    def add(self, silence: Silence) -> None:
+        self.store.add(silence)
+        self._checked_at = None
+
+    def expire(self, silence_id: str) -> bool:
+        """저장소 규칙을 지금 시각으로 종료 (설정 파일 규칙은 종료할 수 없음)"""
+        now = time.time()
+        if not any(silence.id == silence_id for silence in self.store.list_silences(now)):
+            return False
+        self.store.expire(silence_id, now)
+        self._checked_at = None
+        return True
+
+    def active(self) -> List[Silence]:
+        """지금 적용 중이거나 예약된 규칙 (설정 파일 규칙 포함, 끝나는 순서)"""
+        now = time.time()
+        silences = [s for s in self.static_silences if s.ends_at > now] + self.store.list_silences(now)
+        return sorted(silences, key=lambda silence: silence.ends_at)
+
+    def _get_index(self, now: float) -> IntervalIndex:
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return self._index
+        with self._lock:
+            self._checked_at = time.monotonic()
+            version = self.store.version()
+            if version != self._version:
+                silences = self.static_silences + self.store.list_silences(now)
+                self._index = IntervalIndex(silences)
+                self._version = version
+                logger.info(f"Silence index compiled with {len(silences)} silences")
+        return self._index
+
+_silence_engine: Optional[SilenceEngine] = None
+_silence_engine_lock = threading.Lock()
+
+def get_silence_engine() -> SilenceEngine:
+    """컨테이너 단위로 재사용되는 무음 규칙 엔진"""
+    global _silence_engine
+    with _silence_engine_lock:
+        if _silence_engine is None:
+            _silence_engine = SilenceEngine.load()
+        return _silence_engine
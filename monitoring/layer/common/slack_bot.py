@@ -1,12 +1,27 @@
 import logging
 import os
-from typing import Optional, Dict, Any
+import re
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from slack_bolt import App
 from slack_bolt.adapter.aws_lambda import SlackRequestHandler
 from .utils import init_event
 from .monitoring_details import MonitoringDetails
 from .constant import ServiceType, SlackConfig
 from .message_blocks import MessageBlockBuilder
+from .log_offload import LogSpool, upload_file
+from .slack_transport import get_slack_client
+from .interactions import get_interaction_deduplicator, interaction_key, is_slack_retry
+from .incident_context import SourceResult, get_incident_collector, incident_ids
+from .alert_history import AlertQuery, AlertQueryResult, get_alert_history
+from .run_history import PHASES, PHASE_NAMES, get_run_history
+from .silences import Silence, get_silence_engine
+
+# 첨부 파일로 올리는 전체 로그의 최대 크기
+LOG_OFFLOAD_MAX_BYTES = int(os.environ.get('LOG_OFFLOAD_MAX_BYTES', str(50 * 1024 * 1024)))
+# /silence 로 규칙을 추가 / 종료할 수 있는 슬랙 사용자 ID (비어 있으면 모든 사용자)
+SILENCE_ADMINS = {user for user in os.environ.get('SILENCE_ADMINS', '').split(',') if user}
 
 class MonitoringBot:
     """슬랙 모니터링 봇 클래스"""
@@ -14,6 +29,7 @@ class MonitoringBot:
     def __init__(self, service_type: ServiceType):
         self.service_type = service_type
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.dedup = get_interaction_deduplicator()
         self._init_slack_app()
         self.monitoring_details = MonitoringDetails(service_type)
         
@@ -22,7 +38,7 @@ class MonitoringBot:
         try:
             init_event()
             self.app = App(
-                token=os.environ.get("SLACK_BOT_TOKEN"),
+                client=get_slack_client(os.environ.get("SLACK_BOT_TOKEN")),
                 signing_secret=os.environ.get("SLACK_SIGNING_SECRET")
             )
             self.handler = SlackRequestHandler(app=self.app)
@@ -41,100 +57,328 @@ class MonitoringBot:
             self._log_action("handle_hello", "Received hello message")
             say(f"안녕하세요 <@{message['user']}>! 모니터링 봇입니다.")
 
-        @self.app.action("view_error_detail")
-        def handle_error_detail(ack, body, say):
+        # 폭주 요약의 표본 버튼은 메시지 안에서 구분되도록 view_error_detail_1 형식 사용
+        @self.app.action(re.compile(r"^view_error_detail(_\d+)?$"))
+        def handle_error_detail(ack, body, say, client, request):
             ack()
             error_id = body["actions"][0]["value"]
-            summary = self.get_error_summary(error_id)
-            say(text=summary, thread_ts=body.get("message_ts"))
+            thread_ts = self._thread_ts(body)
+
+            def reply() -> str:
+                # 전체 로그는 임시 파일로 흘려보내고 메시지에는 미리보기만 포함
+                with LogSpool(max_bytes=LOG_OFFLOAD_MAX_BYTES) as spool:
+                    error_details = self.monitoring_details.get_error_details(error_id, spool=spool)
+                    summary = self.format_error_summary(error_details)
+                    say(text=summary, thread_ts=thread_ts)
+                    if error_details.get("truncated"):
+                        self.upload_error_logs(client, body["channel"]["id"], thread_ts, error_id, spool)
+                return summary
+
+            self._respond_once(body, request, client, reply)
 
         @self.app.action("view_batch_detail")
-        def handle_batch_detail(ack, body, say):
+        def handle_batch_detail(ack, body, say, client, request):
             ack()
             job_id = body["actions"][0]["value"]
-            summary = self.get_batch_summary(job_id)
-            say(text=summary, thread_ts=body.get("message_ts"))
+
+            def reply() -> str:
+                summary = self.get_batch_summary(job_id)
+                say(text=summary, thread_ts=self._thread_ts(body))
+                return summary
+
+            self._respond_once(body, request, client, reply)
 
         @self.app.action("view_rag_detail")
-        def handle_rag_detail(ack, body, say):
+        def handle_rag_detail(ack, body, say, client, request):
             ack()
             pipeline_id = body["actions"][0]["value"]
-            summary = self.get_rag_performance_summary(pipeline_id)
-            say(text=summary, thread_ts=body.get("message_ts"))
+
+            def reply() -> str:
+                summary = self.get_rag_performance_summary(pipeline_id)
+                say(text=summary, thread_ts=self._thread_ts(body))
+                return summary
+
+            self._respond_once(body, request, client, reply)
+
+        @self.app.action("view_incident_context")
+        def handle_incident_context(ack, body, say, client, request):
+            ack()
+            ids = incident_ids(body["actions"][0]["value"])
+
+            def reply() -> str:
+                blocks, summary = self.get_incident_context(ids)
+                say(blocks=blocks, text=summary, thread_ts=self._thread_ts(body))
+                return summary
+
+            self._respond_once(body, request, client, reply)
+
+        @self.app.command("/alerts")
+        def handle_alerts_command(ack, command, respond):
+            ack()
+            respond(text=self.get_alert_stats(command.get("text", "")), response_type="ephemeral")
+
+        @self.app.command("/silence")
+        def handle_silence_command(ack, command, respond):
+            ack()
+            respond(text=self.handle_silence(command.get("text", ""), command.get("user_id", "")),
+                    response_type="ephemeral")
+
+    def _respond_once(self, body: Dict[str, Any], request: Any, client: Any,
+                      reply: Callable[[], str]) -> None:
+        """같은 버튼 상호작용은 한 번만 조회 / 응답 (반복 클릭에는 첫 응답을 본인에게만 표시)"""
+        if is_slack_retry(request):
+            self._log_action("respond_once", "Skipping Slack retry", level="info")
+            return
+        key = interaction_key(body)
+        if key is None:
+            reply()
+            return
+
+        record = self.dedup.begin(key)
+        if record is None:
+            try:
+                result = reply()
+            except Exception:
+                self.dedup.release(key)
+                raise
+            self.dedup.complete(key, result)
+            return
+
+        self._log_action("respond_once", f"Duplicate interaction {key} ({record.status})", level="info")
+        text = record.result if record.status == "done" else "⏳ 같은 요청을 처리하고 있습니다. 잠시 후 스레드를 확인하세요."
+        try:
+            client.chat_postEphemeral(channel=body["channel"]["id"], user=body["user"]["id"],
+                                      text=text, thread_ts=self._thread_ts(body))
+        except Exception as e:
+            self.logger.error(f"Error sending cached response: {str(e)}")
+
+    @staticmethod
+    def _thread_ts(body: Dict[str, Any]) -> Optional[str]:
+        return body.get("message_ts") or body.get("container", {}).get("message_ts")
 
     def get_error_summary(self, error_id: str) -> str:
         """에러 상세 정보 조회"""
         try:
             error_details = self.monitoring_details.get_error_details(error_id)
-            
-            summary = [
-                "🔍 에러 상세 정보",
-                "",
-                "스택 트레이스:",
-                error_details["stack_trace"][:500] + "...",
-                "",
-                "관련 로그:",
-                error_details["related_logs"],
-                "",
-                error_details["error_history"]
-            ]
-            
-            return "\n".join(summary)
+            return self.format_error_summary(error_details)
             
         except Exception as e:
             self.logger.error(f"Error fetching error summary: {str(e)}")
             return f"에러 상세 정보 조회 실패: {str(e)}"
 
+    def format_error_summary(self, error_details: Dict[str, Any]) -> str:
+        """에러 상세 정보 미리보기 (전체 로그는 스레드에 파일로 첨부)"""
+        summary = [
+            "🔍 에러 상세 정보",
+            "",
+            "스택 트레이스:",
+            error_details["stack_trace"],
+            "",
+            "관련 로그:",
+            error_details["related_logs"],
+            "",
+            error_details["error_history"]
+        ]
+        if error_details.get("truncated"):
+            summary.extend(["", "📎 전체 로그는 첨부 파일을 확인하세요."])
+
+        return "\n".join(summary)
+
+    def upload_error_logs(self, client, channel: str, thread_ts: Optional[str],
+                          error_id: str, spool: LogSpool) -> None:
+        """임시 파일에 기록한 전체 로그를 스레드에 업로드"""
+        try:
+            upload_file(
+                client,
+                path=spool.path,
+                filename=f"{error_id}.log",
+                channel=channel,
+                thread_ts=thread_ts,
+                title=f"{error_id} 전체 로그 ({spool.size:,} bytes)"
+            )
+        except Exception as e:
+            self.logger.error(f"Error uploading error logs: {str(e)}")
+
+    def get_incident_context(self, ids: Dict[str, str]) -> Tuple[List[Dict[str, Any]], str]:
+        """로그, 배치 작업, Kubeflow 실행, 최근 메트릭을 동시에 조회해 한 메시지로 구성"""
+        details = self.monitoring_details
+        log_id = ids.get("error_id") or ids.get("job_id") or ids.get("pipeline_id")
+        job_id = ids.get("job_id")
+        pipeline_id = ids.get("pipeline_id")
+        results = get_incident_collector().collect({
+            "logs": (lambda: details.get_error_details(log_id)) if log_id else None,
+            "batch": (lambda: details.get_batch_details(job_id)) if job_id else None,
+            "kubeflow": (lambda: details.get_rag_details(pipeline_id)) if pipeline_id else None,
+            "metrics": details.get_recent_metrics
+        })
+
+        # 제한 시간 초과 / 실패한 원본은 빈 결과로 표시
+        sources = [
+            ("logs", "📜 에러 로그", details._get_empty_error_details, self.format_error_summary),
+            ("batch", "📊 배치 작업", details._get_empty_batch_details, self.format_batch_summary),
+            ("kubeflow", "📈 Kubeflow 실행", details._get_empty_rag_details, self.format_rag_performance_summary),
+            ("metrics", "📉 최근 메트릭", details._get_empty_recent_metrics, MessageBlockBuilder.format_recent_metrics)
+        ]
+        sections, timings = [], []
+        for name, title, empty, render in sources:
+            result = results[name]
+            if result.status == "skipped":
+                continue
+            text = render(result.value if result.status == "ok" else empty())
+            if result.status != "ok":
+                text = f"⚠️ {self._source_status_text(result)}\n{text}"
+            sections.append((title, text))
+            timings.append((name, self._source_status_text(result)))
+
+        blocks = MessageBlockBuilder.create_incident_context_blocks(sections, timings)
+        summary = "\n\n".join(f"{title}\n{text}" for title, text in sections)
+        return blocks, summary
+
+    @staticmethod
+    def _source_status_text(result: SourceResult) -> str:
+        if result.status == "timeout":
+            return f"제한 시간 초과 ({result.elapsed:.1f}s)"
+        if result.status == "error":
+            return "조회 실패"
+        return f"{result.elapsed:.1f}s"
+
+    def get_alert_stats(self, text: str) -> str:
+        """/alerts 명령 (예: '7d service=PROD type=ERROR by date,service') 의 알림 이력 집계"""
+        try:
+            query = AlertQuery.parse(text)
+        except ValueError as e:
+            return (f"⚠️ {str(e)}\n사용법: /alerts [24h|7d] [service=PROD,DEV] [type=ERROR] "
+                    f"[channel=C123] [by date,service,alert_type,channel]")
+        try:
+            return self.format_alert_stats(query, get_alert_history().query(query))
+        except Exception as e:
+            self.logger.error(f"Error querying alert history: {str(e)}")
+            return f"알림 이력 조회 실패: {str(e)}"
+
+    def handle_silence(self, text: str, user_id: str) -> str:
+        """/silence 명령 (목록 'list', 종료 'expire <id>', 추가 '2h service=PROD 배포 중')
+
+        규칙은 공유 저장소 (SILENCE_TABLE) 에 기록되어 모든 컨테이너에 SILENCE_REFRESH_INTERVAL 안에 반영됨
+        """
+        usage = "사용법: /silence [list] | expire <id> | <30m|2h|1d> label=pattern ... [설명]"
+        tokens = (text or "").split()
+        try:
+            engine = get_silence_engine()
+            if not tokens or tokens[0] == 'list':
+                return self.format_silences(engine.active())
+            if SILENCE_ADMINS and user_id not in SILENCE_ADMINS:
+                return "⚠️ 무음 규칙을 바꿀 권한이 없습니다."
+            if tokens[0] == 'expire':
+                if len(tokens) != 2:
+                    return f"⚠️ 종료할 규칙 ID 를 하나 입력하세요\n{usage}"
+                if not engine.expire(tokens[1]):
+                    return f"⚠️ 종료할 수 있는 규칙이 없습니다: {tokens[1]}"
+                self.logger.info(f"Silence {tokens[1]} expired by {user_id}")
+                return f"🔔 무음 규칙 {tokens[1]} 종료"
+            silence = Silence.parse(text, time.time(), created_by=user_id)
+            engine.add(silence)
+            self.logger.info(f"Silence {silence.id} added by {user_id}: {dict(silence.matchers)}")
+            return f"🔕 무음 규칙 추가\n{self.format_silence(silence)}"
+        except ValueError as e:
+            return f"⚠️ {str(e)}\n{usage}"
+        except Exception as e:
+            self.logger.error(f"Error handling silence command: {str(e)}")
+            return f"무음 규칙 처리 실패: {str(e)}"
+
+    def format_silences(self, silences: List[Silence]) -> str:
+        if not silences:
+            return "🔔 적용 중인 무음 규칙이 없습니다."
+        return "\n".join([f"🔕 무음 규칙 {len(silences)}건", *(self.format_silence(s) for s in silences)])
+
+    @staticmethod
+    def format_silence(silence: Silence) -> str:
+        matchers = " ".join(f"{name}={pattern}" for name, pattern in silence.matchers)
+        period = (f"{datetime.fromtimestamp(silence.starts_at).strftime('%m-%d %H:%M')} ~ "
+                  f"{datetime.fromtimestamp(silence.ends_at).strftime('%m-%d %H:%M')}")
+        details = ", ".join(filter(None, [silence.comment, f"<@{silence.created_by}>" if silence.created_by else ""]))
+        return f"• `{silence.id}` {matchers} ({period}){f' - {details}' if details else ''}"
+
+    def format_alert_stats(self, query: AlertQuery, result: AlertQueryResult) -> str:
+        """집계 결과를 표 형식 텍스트로 변환"""
+        filters = " ".join(f"{column}={','.join(values)}" for column, values in query.filters.items())
+        header = f"📊 최근 {query.hours}시간 알림 {result.total:,}건 {filters}".rstrip()
+        if not result.total:
+            return f"{header}\n조건에 맞는 알림이 없습니다."
+        columns = [*query.group_by, "count"]
+        widths = {column: max(len(column), *(len(f"{row[column]:,}" if column == "count" else str(row[column]))
+                                            for row in result.rows)) for column in columns}
+        lines = ["  ".join(column.ljust(widths[column]) for column in columns)]
+        for row in result.rows:
+            lines.append("  ".join(f"{row[column]:,}".rjust(widths[column]) if column == "count"
+                                   else str(row[column]).ljust(widths[column]) for column in columns))
+        footer = f"파일 {result.files}개 조회, {result.elapsed * 1000:.0f}ms"
+        return f"{header}\n```{chr(10).join(lines)}```\n{footer}"
+
     def get_batch_summary(self, job_id: str) -> str:
         """배치 작업 상세 정보 조회"""
         try:
             batch_details = self.monitoring_details.get_batch_details(job_id)
-            
-            summary = [
-                "📊 배치 작업 상세 정보",
-                "",
-                f"• 총 처리 건수: {batch_details['total_processed']}",
-                f"• 성공: {batch_details['success_count']}",
-                f"• 실패: {batch_details['fail_count']}",
-                "",
-                "소요 시간:",
-                f"• 추출: {batch_details['extract_time']}초",
-                f"• 변환: {batch_details['transform_time']}초",
-                f"• 적재: {batch_details['load_time']}초"
-            ]
-            
-            return "\n".join(summary)
+            job_name = batch_details.get('job_name')
+            # 작업명이 없으면 이전 실행 이력 저장소를 열지 않음
+            history = get_run_history().context(job_name) if job_name else None
+            return self.format_batch_summary(batch_details, history)
             
         except Exception as e:
             self.logger.error(f"Error fetching batch summary: {str(e)}")
             return f"배치 작업 상세 정보 조회 실패: {str(e)}"
 
+    def format_batch_summary(self, batch_details: Dict[str, Any],
+                             history: Optional[Dict[str, Tuple[int, float, float]]] = None) -> str:
+        """배치 작업 상세 정보 요약 (history 는 같은 작업명의 구간별 실행 횟수, p50, p95)"""
+        summary = [
+            "📊 배치 작업 상세 정보",
+            "",
+            f"• 총 처리 건수: {batch_details['total_processed']}",
+            f"• 성공: {batch_details['success_count']}",
+            f"• 실패: {batch_details['fail_count']}",
+            "",
+            "소요 시간:",
+            f"• 추출: {batch_details['extract_time']}초",
+            f"• 변환: {batch_details['transform_time']}초",
+            f"• 적재: {batch_details['load_time']}초"
+        ]
+        if history:
+            summary += ["", "이전 실행 소요 시간 (p50 / p95):"]
+            summary += [
+                f"• {PHASE_NAMES[phase]}: {history[phase][1]:,.0f}초 / {history[phase][2]:,.0f}초 ({history[phase][0]}회)"
+                for phase in PHASES if phase in history
+            ]
+
+        return "\n".join(summary)
+
     def get_rag_performance_summary(self, pipeline_id: str) -> str:
         """RAG 성능 상세 정보 조회"""
         try:
-            rag_details = self.monitoring_details.get_rag_details(pipeline_id)
-            
-            summary = [
-                "📈 RAG 성능 상세 정보",
-                "",
-                f"• Precision: {rag_details['precision']}",
-                f"• Recall: {rag_details['recall']}",
-                f"• F1 Score: {rag_details['f1_score']}",
-                f"• MRR: {rag_details['mrr']}",
-                "",
-                "실패한 쿼리:",
-                rag_details['failed_queries'],
-                "",
-                "개선 제안사항:",
-                rag_details['improvement_suggestions']
-            ]
-            
-            return "\n".join(summary)
+            return self.format_rag_performance_summary(self.monitoring_details.get_rag_details(pipeline_id))
             
         except Exception as e:
             self.logger.error(f"Error fetching RAG performance summary: {str(e)}")
             return f"RAG 성능 상세 정보 조회 실패: {str(e)}"
 
+    def format_rag_performance_summary(self, rag_details: Dict[str, Any]) -> str:
+        """RAG 성능 상세 정보 요약"""
+        summary = [
+            "📈 RAG 성능 상세 정보",
+            "",
+            f"• Precision: {rag_details['precision']}",
+            f"• Recall: {rag_details['recall']}",
+            f"• F1 Score: {rag_details['f1_score']}",
+            f"• MRR: {rag_details['mrr']}",
+            "",
+            "실패한 쿼리:",
+            rag_details['failed_queries'],
+            "",
+            "개선 제안사항:",
+            rag_details['improvement_suggestions']
+        ]
+
+        return "\n".join(summary)
+
     def _log_action(self, func_name: str, message: str, level: str = "debug") -> None:
         """로깅 유틸리티"""
         log_func = getattr(self.logger, level.lower())
@@ -0,0 +1,198 @@
+import io
+import os
+import inspect
+import ssl
+import time
+import logging
+import threading
+import http.client
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request
+from slack_sdk import WebClient
+from .tracing import span
+from .resilience import call_timeout
+
+logger = logging.getLogger(__name__)
+
+SLACK_API_HOST = "slack.com"
+# 서버가 먼저 끊기 전에 버리도록 유휴 연결 유지 시간을 짧게 설정
+DEFAULT_IDLE_TIMEOUT = 50.0
+# 재사용한 연결이 이미 끊겨 있을 때 발생하는 오류 (새 연결로 한 번만 재시도)
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# PooledWebClient 가 대체하는 slack_sdk 내부 메서드 (requirements.txt 에 고정한 slack_sdk 버전 기준)
+TRANSPORT_HOOK = "_perform_urllib_http_request_internal"
+
+def pooled_transport_supported() -> bool:
+    """설치된 slack_sdk 의 내부 메서드가 고정한 버전과 같은 형식인지 (다르면 기본 WebClient 사용)"""
+    hook = getattr(WebClient, TRANSPORT_HOOK, None)
+    return hook is not None and list(inspect.signature(hook).parameters) == ["self", "url", "req"]
+
+class SlackConnectionPool:
+    """호스트별 keep-alive HTTPS 연결 풀 (스레드 간 공유, 최근 반납한 연결부터 재사용)"""
+
+    def __init__(self, max_idle: int = 8, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self._idle: Dict[str, Deque[Tuple[http.client.HTTPSConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def acquire(self, host: str, timeout: float) -> Tuple[http.client.HTTPSConnection, bool]:
+        """유휴 연결이 있으면 재사용, 없으면 새 연결 (연결 자체는 첫 요청 시 생성)"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(host)
+            while idle:
+                connection, released_at = idle.pop()
+                if now - released_at < self.idle_timeout:
+                    self.stats["reused"] += 1
+                    connection.timeout = timeout
+                    if connection.sock is not None:
+                        connection.sock.settimeout(timeout)
+                    return connection, True
+                self.stats["discarded"] += 1
+                connection.close()
+        return self._new_connection(host, timeout), False
+
+    def release(self, host: str, connection: http.client.HTTPSConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(host, deque())
+            if connection.sock is not None and len(idle) < self.max_idle:
+                idle.append((connection, time.monotonic()))
+                return
+            self.stats["discarded"] += 1
+        connection.close()
+
+    def prime(self, host: str = SLACK_API_HOST, count: int = 1, timeout: float = 5.0) -> int:
+        """DNS 조회와 TLS 핸드셰이크를 미리 수행한 연결을 풀에 추가 (Lambda init 단계용)"""
+        primed = 0
+        for _ in range(count):
+            connection = self._new_connection(host, timeout)
+            try:
+                with span('slack.prime_connection', host=host):
+                    connection.connect()
+                primed += 1
+            except OSError as e:
+                logger.warning(f"Failed to prime connection to {host}: {str(e)}")
+                connection.close()
+                continue
+            self.release(host, connection)
+        return primed
+
+    def request(self, url: str, method: str, body: Optional[bytes], headers: Dict[str, str],
+                timeout: float) -> Tuple[http.client.HTTPResponse, bytes]:
+        """연결을 빌려 요청 후 응답 본문을 모두 읽고 반납 (재사용 연결이 끊겨 있으면 새 연결로 재시도)"""
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        connection, reused = self.acquire(parts.netloc, timeout)
+        try:
+            response, data = self._send(connection, method, target, body, headers)
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            connection = self._new_connection(parts.netloc, timeout)
+            try:
+                response, data = self._send(connection, method, target, body, headers)
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.release(parts.netloc, connection)
+        return response, data
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
+
+    def _new_connection(self, host: str, timeout: float) -> http.client.HTTPSConnection:
+        with self._lock:
+            self.stats["created"] += 1
+        return http.client.HTTPSConnection(host, timeout=timeout, context=self.ssl_context)
+
+    @staticmethod
+    def _send(connection: http.client.HTTPSConnection, method: str, target: str,
+              body: Optional[bytes], headers: Dict[str, str]) -> Tuple[http.client.HTTPResponse, bytes]:
+        connection.request(method, target, body=body, headers=headers)
+        response = connection.getresponse()
+        return response, response.read()
+
+class PooledWebClient(WebClient):
+    """연결 풀을 사용하는 WebClient (응답 / 오류 형식은 urllib 구현과 동일하게 유지해 재시도 처리 재사용)
+
+    ssl 을 지정하지 않으면 풀의 SSL 설정을 클라이언트 설정으로 사용하고, 프록시나 풀과 다른 SSL 설정이 있으면
+    slack_sdk 기본 urllib 구현으로 보내 클라이언트 설정을 그대로 적용.
+    """
+
+    def __init__(self, token: Optional[str] = None, pool: Optional[SlackConnectionPool] = None, **kwargs):
+        pool = pool or get_slack_pool()
+        kwargs.setdefault('ssl', pool.ssl_context)
+        super().__init__(token=token, **kwargs)
+        self.pool = pool
+
+    def _perform_urllib_http_request_internal(self, url: str, req: Request) -> Dict[str, Any]:
+        if self.proxy is not None or self.ssl is not self.pool.ssl_context or not url.lower().startswith("https://"):
+            return super()._perform_urllib_http_request_internal(url, req)
+
+        headers = dict(req.header_items())
+        # 호출 마감이 있으면 남은 시간 안에서만 대기
+        response, data = self.pool.request(url, req.get_method(), req.data, headers, call_timeout(self.timeout))
+        if response.status >= 400:
+            # urlopen 과 같은 HTTPError 로 전달해야 429 Retry-After 등 기본 재시도 처리가 동작
+            raise HTTPError(url, response.status, response.reason, response.msg, io.BytesIO(data))
+        if response.msg.get_content_type() == "application/gzip":
+            return {"status": response.status, "headers": response.msg, "body": data}
+        charset = response.msg.get_content_charset() or "utf-8"
+        return {"status": response.status, "headers": response.msg, "body": data.decode(charset)}
+
+_slack_pool: Optional[SlackConnectionPool] = None
+_slack_client: Optional[WebClient] = None
+_slack_lock = threading.Lock()
+
+def get_slack_pool() -> SlackConnectionPool:
+    """컨테이너 공용 연결 풀 (warm 호출 간 TLS 연결 재사용)"""
+    global _slack_pool
+    with _slack_lock:
+        if _slack_pool is None:
+            _slack_pool = SlackConnectionPool(
+                max_idle=int(os.environ.get('SLACK_POOL_MAX_IDLE', '8')),
+                idle_timeout=float(os.environ.get('SLACK_POOL_IDLE_TIMEOUT', str(DEFAULT_IDLE_TIMEOUT)))
+            )
+        return _slack_pool
+
+def get_slack_client(token: Optional[str] = None) -> WebClient:
+    """컨테이너 공용 슬랙 클라이언트 (토큰이 바뀌면 같은 풀로 새로 생성, 연결 풀을 쓸 수 없는 slack_sdk 면 기본 클라이언트)"""
+    global _slack_client
+    token = token or os.environ.get('SLACK_BOT_TOKEN')
+    timeout = int(os.environ.get('SLACK_TIMEOUT', '10'))
+    if not pooled_transport_supported():
+        with _slack_lock:
+            if _slack_client is None or _slack_client.token != token:
+                logger.warning(f"slack_sdk {TRANSPORT_HOOK} changed, Slack connection pool is disabled")
+                _slack_client = WebClient(token=token, timeout=timeout)
+            return _slack_client
+    pool = get_slack_pool()
+    with _slack_lock:
+        if _slack_client is None or _slack_client.token != token:
+            _slack_client = PooledWebClient(token=token, pool=pool, timeout=timeout)
+        return _slack_client
+
+def prime_slack_connection() -> int:
+    """SLACK_PRIME_CONNECTION 설정 시 slack.com 연결을 미리 생성 (실패해도 첫 요청에서 다시 연결)"""
+    if os.environ.get('SLACK_PRIME_CONNECTION', 'false').lower() != 'true':
+        return 0
+    return get_slack_pool().prime(count=int(os.environ.get('SLACK_PRIME_CONNECTIONS', '1')))
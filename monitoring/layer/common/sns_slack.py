@@ -1,47 +1,65 @@
-import os
 import logging
-from typing import Optional, Dict, Any
-from slack_sdk import WebClient
+import uuid
+from typing import Optional, Dict, Any, List
 from slack_sdk.errors import SlackApiError
 from datetime import datetime
-from .constant import ServiceType, SlackConfig
+from .constant import ServiceType, MonitoringType, SlackConfig
 from .utils import init_alarm
 from .monitoring_details import MonitoringDetails
 from .message_blocks import MessageBlockBuilder
+from .tracing import span
+from .outbox import SlackOutbox
+from .slack_transport import get_slack_client
+from .latency import get_latency_recorder
+from .alert_history import get_alert_history, record_from_message
+from .flood import FloodSummary
+from .fleet_sweep import ServiceChange
+from .thresholds import ThresholdBreach
 
 class SlackAlarm:
     """슬랙 알람 클래스"""
     
-    def __init__(self, channel: str, monitoring_details: MonitoringDetails):
+    def __init__(self, channel: str, monitoring_details: MonitoringDetails,
+                 outbox: Optional[SlackOutbox] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.channel = channel
         self.monitoring_details = monitoring_details
+        self.outbox = outbox
         self._init_slack_client()
         self.thread_ts = None
+        self.thread_key = None  # 아웃박스 사용 시 부모 메시지의 멱등성 키
         
     def _init_slack_client(self) -> None:
         """슬랙 클라이언트 초기화"""
         try:
             init_alarm()
-            self.client = WebClient(token=os.environ.get('SLACK_BOT_TOKEN'))
+            # 호출 간 keep-alive 연결을 재사용하는 공용 클라이언트
+            self.client = get_slack_client()
+            if self.outbox and self.outbox.client is None:
+                self.outbox.client = self.client
             self.logger.info("Slack client initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Slack client: {str(e)}")
             raise
 
     def send_error_alert(self, service_type: ServiceType, error_msg: str,
-                        error_id: str, log_group: str) -> str:
+                        error_id: str, log_group: str,
+                        idempotency_key: Optional[str] = None,
+                        region: Optional[str] = None,
+                        source_time: Optional[float] = None,
+                        related: Optional[Dict[str, str]] = None) -> str:
         """에러 알림 전송"""
         try:
             blocks = MessageBlockBuilder.create_error_blocks(
                 service_type=service_type,
                 error_msg=error_msg,
-                error_id=error_id
+                error_id=error_id,
+                region=region,
+                related=related
             )
             
-            result = self._send_message(blocks)
-            self.thread_ts = result['ts']
-            return result['ts']
+            return self._post_alert(blocks, idempotency_key, source_time,
+                                    self._latency_labels(service_type, MonitoringType.ERROR))
             
         except SlackApiError as e:
             self.logger.error(f"Error sending error alert: {str(e)}")
@@ -50,51 +68,134 @@ class SlackAlarm:
             raise
 
     def send_batch_alert(self, service_type: ServiceType, job_name: str,
-                        status: str, job_id: str) -> str:
+                        status: str, job_id: str,
+                        idempotency_key: Optional[str] = None,
+                        region: Optional[str] = None,
+                        source_time: Optional[float] = None) -> str:
         """배치 작업 알림 전송"""
         try:
             blocks = MessageBlockBuilder.create_batch_blocks(
                 service_type=service_type,
                 job_name=job_name,
                 status=status,
-                job_id=job_id
+                job_id=job_id,
+                region=region
             )
             
-            result = self._send_message(blocks)
-            self.thread_ts = result['ts']
-            return result['ts']
+            return self._post_alert(blocks, idempotency_key, source_time,
+                                    self._latency_labels(service_type, MonitoringType.BATCH))
             
         except SlackApiError as e:
             self.logger.error(f"Error sending batch alert: {str(e)}")
             raise
 
     def send_rag_performance(self, service_type: ServiceType, accuracy: float,
-                           threshold: float, pipeline_id: str) -> str:
+                           threshold: float, pipeline_id: str,
+                           idempotency_key: Optional[str] = None,
+                           source_time: Optional[float] = None,
+                           breaches: Optional[List[ThresholdBreach]] = None) -> str:
         """RAG 성능 알림 전송"""
         try:
             blocks = MessageBlockBuilder.create_rag_blocks(
                 service_type=service_type,
                 accuracy=accuracy,
                 threshold=threshold,
-                pipeline_id=pipeline_id
+                pipeline_id=pipeline_id,
+                breaches=breaches
             )
             
-            result = self._send_message(blocks)
-            self.thread_ts = result['ts']
-            return result['ts']
+            return self._post_alert(blocks, idempotency_key, source_time,
+                                    self._latency_labels(service_type, MonitoringType.RAG))
             
         except SlackApiError as e:
             self.logger.error(f"Error sending RAG performance alert: {str(e)}")
             raise
 
+    def send_flood_summary(self, service_type: ServiceType, summary: FloodSummary,
+                           idempotency_key: Optional[str] = None) -> str:
+        """에러 폭주 모드 요약 전송"""
+        try:
+            blocks = MessageBlockBuilder.create_flood_summary_blocks(
+                service_type=service_type,
+                summary=summary
+            )
+
+            return self._post_alert(blocks, idempotency_key, None,
+                                    self._latency_labels(service_type, MonitoringType.ERROR))
+
+        except SlackApiError as e:
+            self.logger.error(f"Error sending flood summary: {str(e)}")
+            raise
+
+    def send_fleet_status(self, service_type: ServiceType, change: ServiceChange,
+                          idempotency_key: Optional[str] = None) -> str:
+        """정기 스윕에서 상태가 바뀐 서비스 알림 전송"""
+        try:
+            blocks = MessageBlockBuilder.create_fleet_status_blocks(
+                service_type=service_type,
+                change=change
+            )
+
+            return self._post_alert(blocks, idempotency_key, None,
+                                    self._latency_labels(service_type, MonitoringType.ERROR))
+
+        except SlackApiError as e:
+            self.logger.error(f"Error sending fleet status: {str(e)}")
+            raise
+
+    def send_thread_reply(self, blocks: list, text: Optional[str] = None,
+                          idempotency_key: Optional[str] = None) -> Optional[str]:
+        """현재 알림 스레드에 답글 전송 (아웃박스 사용 시 같은 스레드 답글과 묶어서 전송)"""
+        if self.outbox and (self.thread_key or self.thread_ts):
+            key = idempotency_key or str(uuid.uuid4())
+            self.outbox.enqueue_reply(key=key, channel=self.channel, blocks=blocks, text=text,
+                                      thread_ts=None if self.thread_key else self.thread_ts,
+                                      thread_key=self.thread_key)
+            return key
+        if not self.thread_ts:
+            self.logger.error("No thread to reply to")
+            return None
+
+        result = self._send_message(blocks, thread_ts=self.thread_ts)
+        return result['ts']
+
+    def _post_alert(self, blocks: list, idempotency_key: Optional[str] = None,
+                    source_time: Optional[float] = None,
+                    labels: Optional[Dict[str, str]] = None) -> str:
+        """알림 전송 (아웃박스 사용 시 저장 후 멱등성 키 반환)"""
+        if self.outbox:
+            key = idempotency_key or str(uuid.uuid4())
+            self.outbox.enqueue(key=key, channel=self.channel, blocks=blocks,
+                                source_time=source_time, labels=labels)
+            self.thread_key = key
+            return key
+
+        result = self._send_message(blocks)
+        self.thread_ts = result['ts']
+        if source_time is not None and labels:
+            get_latency_recorder().observe(labels['service'], labels['alert_type'],
+                                           source_time, float(result['ts']))
+        if labels:
+            get_alert_history().append(record_from_message(
+                labels['service'], labels['alert_type'], self.channel, idempotency_key or result['ts'],
+                float(result['ts']), blocks, source_time=source_time
+            ))
+            get_alert_history().maybe_flush()
+        return result['ts']
+
+    @staticmethod
+    def _latency_labels(service_type: ServiceType, monitoring_type: MonitoringType) -> Dict[str, str]:
+        return {'service': service_type.name, 'alert_type': monitoring_type.name}
+
     def _send_message(self, blocks: list, thread_ts: Optional[str] = None) -> Dict[str, Any]:
         """메시지 전송 공통 로직"""
         try:
-            response = self.client.chat_postMessage(
-                channel=self.channel,
-                blocks=blocks,
-                thread_ts=thread_ts
-            )
+            with span('slack.chat_postMessage'):
+                response = self.client.chat_postMessage(
+                    channel=self.channel,
+                    blocks=blocks,
+                    thread_ts=thread_ts
+                )
             
             if not response['ok']:
                 raise SlackApiError(f"Failed to send message: {response['error']}", response)
@@ -108,10 +209,11 @@ class SlackAlarm:
     def get_ts_of_service_message(self, service_nm: str) -> Optional[str]:
         """서비스별 최근 메시지 조회"""
         try:
-            response = self.client.conversations_history(
-                channel=self.channel,
-                limit=100
-            )
+            with span('slack.conversations_history'):
+                response = self.client.conversations_history(
+                    channel=self.channel,
+                    limit=100
+                )
             
             for message in response['messages']:
                 if ('blocks' in message and 
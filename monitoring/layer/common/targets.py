@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import logging
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import boto3
+from .resilience import aws_client, bounded_timeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION') or 'ap-northeast-2'
+# 역할 자격 증명 만료 전에 미리 갱신하는 여유 시간(초)
+CREDENTIAL_REFRESH_MARGIN = 300
+
+@dataclass(frozen=True)
+class AWSTarget:
+    """조회 대상 (리전, 교차 계정 역할)"""
+    region: str = DEFAULT_REGION
+    role_arn: Optional[str] = None
+
+    @property
+    def account_id(self) -> Optional[str]:
+        return self.role_arn.split(':')[4] if self.role_arn else None
+
+    @property
+    def label(self) -> str:
+        return f"{self.account_id}/{self.region}" if self.role_arn else self.region
+
+    @classmethod
+    def parse(cls, value: str) -> 'AWSTarget':
+        """'region' 또는 'role_arn@region' 형식 파싱"""
+        role_arn, _, region = value.strip().rpartition('@')
+        return cls(region=region or DEFAULT_REGION, role_arn=role_arn or None)
+
+def load_targets(value: Optional[str] = None) -> List[AWSTarget]:
+    """MONITORING_TARGETS 환경변수에서 대상 목록 조회 (JSON 목록 또는 쉼표 구분, 없으면 현재 리전)"""
+    value = value if value is not None else os.environ.get('MONITORING_TARGETS', '')
+    if not value.strip():
+        return [AWSTarget()]
+    if value.lstrip().startswith('['):
+        return [AWSTarget(region=item.get('region', DEFAULT_REGION), role_arn=item.get('role_arn'))
+                for item in json.loads(value)]
+    return [AWSTarget.parse(item) for item in value.split(',') if item.strip()]
+
+class TargetClients:
+    """대상별 boto3 클라이언트 캐시 (역할은 STS AssumeRole 로 전환, 만료 전 재발급)"""
+
+    def __init__(self, session_name: str = "monitoring"):
+        self.session_name = session_name
+        self._sessions: Dict[AWSTarget, Tuple[boto3.session.Session, float]] = {}
+        self._clients: Dict[Tuple[AWSTarget, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def client(self, target: AWSTarget, service: str):
+        with self._lock:
+            cached = self._clients.get((target, service))
+            if cached and cached[1] > time.time():
+                return cached[0]
+            if not target.role_arn:
+                # 역할 전환이 없으면 기본 세션 사용
+                client, expires_at = aws_client(service, region_name=target.region), float('inf')
+            else:
+                session, expires_at = self._get_session(target)
+                client = aws_client(service, session=session, region_name=target.region)
+            self._clients[(target, service)] = (client, expires_at)
+            return client
+
+    def _get_session(self, target: AWSTarget) -> Tuple[boto3.session.Session, float]:
+        cached = self._sessions.get(target)
+        if cached and cached[1] > time.time():
+            return cached
+        credentials = aws_client('sts').assume_role(
+            RoleArn=target.role_arn,
+            RoleSessionName=self.session_name
+        )['Credentials']
+        session = boto3.session.Session(
+            aws_access_key_id=credentials['AccessKeyId'],
+            aws_secret_access_key=credentials['SecretAccessKey'],
+            aws_session_token=credentials['SessionToken'],
+            region_name=target.region
+        )
+        entry = (session, credentials['Expiration'].timestamp() - CREDENTIAL_REFRESH_MARGIN)
+        self._sessions[target] = entry
+        return entry
+
+class TargetExecutor:
+    """여러 대상에 같은 조회를 동시에 실행 (대상별 제한 시간 초과 또는 실패한 대상은 결과에서 제외)"""
+
+    def __init__(self, max_workers: int = 8, timeout: float = 10.0):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="target")
+
+    def map(self, fn: Callable[[AWSTarget], Any], targets: Sequence[AWSTarget],
+            timeout: Optional[float] = None) -> Dict[AWSTarget, Any]:
+        if len(targets) == 1:
+            return self._run_inline(fn, targets[0])
+
+        # 호출 마감 / 트레이스가 작업 스레드에도 전달되도록 컨텍스트 복사
+        futures = {target: self._executor.submit(contextvars.copy_context().run, fn, target)
+                   for target in targets}
+        deadline = time.monotonic() + bounded_timeout(timeout or self.timeout)
+        results = {}
+        for target, future in futures.items():
+            try:
+                results[target] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning(f"Target {target.label} timed out")
+            except Exception as e:
+                logger.error(f"Target {target.label} failed: {str(e)}")
+        return results
+
+    @staticmethod
+    def _run_inline(fn: Callable[[AWSTarget], Any], target: AWSTarget) -> Dict[AWSTarget, Any]:
+        # 대상이 하나면 스레드 전환 없이 실행
+        try:
+            return {target: fn(target)}
+        except Exception as e:
+            logger.error(f"Target {target.label} failed: {str(e)}")
+            return {}
+
+_target_clients = TargetClients()
+_target_executor: Optional[TargetExecutor] = None
+_target_executor_lock = threading.Lock()
+
+def get_target_clients() -> TargetClients:
+    return _target_clients
+
+def get_target_executor() -> TargetExecutor:
+    """컨테이너 공용 실행기 (호출 간 스레드 재사용)"""
+    global _target_executor
+    with _target_executor_lock:
+        if _target_executor is None:
+            _target_executor = TargetExecutor(
+                max_workers=int(os.environ.get('TARGET_MAX_WORKERS', '8')),
+                timeout=float(os.environ.get('TARGET_TIMEOUT', '10'))
+            )
+        return _target_executor
@@ -0,0 +1,210 @@
+import os
+import json
+import logging
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from .constant import MonitoringType, ServiceType
+
+# numpy 는 규칙을 처음 컴파일 / 비교할 때 import (에러 알림만 처리하는 호출의 콜드 스타트에서 제외)
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 설정 파일이 없을 때 사용하는 기본 규칙
+# RAG 규칙에 threshold 가 없으면 서비스 임계값 (ServiceConfig.threshold) + offset 과 비교
+DEFAULT_THRESHOLD_RULES = [
+    {"metric": "accuracy", "alert": True,
+     "suggestion": "전반적인 정확도가 낮습니다. 데이터 품질을 검토하세요."},
+    {"metric": "precision",
+     "suggestion": "Precision이 낮습니다. 검색 결과의 정확도 향상이 필요합니다."},
+    {"metric": "recall",
+     "suggestion": "Recall이 낮습니다. 관련 문서 검색 범위를 넓히는 것을 고려하세요."},
+    {"metric": "f1",
+     "suggestion": "F1 Score가 낮습니다. Precision과 Recall의 균형을 맞추세요."},
+    {"metric": "mrr", "offset": 0.2,
+     "suggestion": "MRR이 낮습니다. 가장 관련성 높은 결과가 상위에 랭크되도록 개선이 필요합니다."},
+    {"monitoring_type": "BATCH", "metric": "fail_ratio", "threshold": 0.05, "higher_is_bad": True,
+     "suggestion": "처리 실패 비율이 높습니다. 실패 건의 원본 데이터와 작업 로그를 확인하세요."}
+]
+
+RuleKey = Tuple[MonitoringType, ServiceType]
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    metric: str
+    monitoring_type: MonitoringType = MonitoringType.RAG
+    threshold: Optional[float] = None
+    offset: float = 0.0
+    higher_is_bad: bool = False
+    # 지표 값이 없을 때 값 (기존 검사와 같이 0 으로 판단, NaN 이면 판단하지 않음)
+    missing: float = 0.0
+    alert: bool = False  # True 이면 위반 시 알림 대상, False 이면 개선 제안만
+    suggestion: str = ""
+    service: Optional[ServiceType] = None
+    pipeline: Optional[str] = None  # RAG 파이프라인 ID / 배치 작업명 glob 패턴
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ThresholdRule":
+        """설정 값 검증 후 규칙 생성"""
+        try:
+            rule = cls(
+                metric=data['metric'],
+                monitoring_type=MonitoringType[data.get('monitoring_type', 'RAG')],
+                threshold=float(data['threshold']) if data.get('threshold') is not None else None,
+                offset=float(data.get('offset', 0.0)),
+                higher_is_bad=bool(data.get('higher_is_bad', False)),
+                missing=float(data.get('missing', 0.0)),
+                alert=bool(data.get('alert', False)),
+                suggestion=data.get('suggestion', ""),
+                service=ServiceType[data['service']] if data.get('service') else None,
+                pipeline=data.get('pipeline') or None
+            )
+        except KeyError as e:
+            raise ValueError(f"Invalid threshold rule {data}: unknown value {e}") from e
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid threshold rule {data}: {e}") from e
+        if rule.threshold is None and rule.monitoring_type != MonitoringType.RAG:
+            raise ValueError(f"Invalid threshold rule {data}: threshold is required for {rule.monitoring_type.name}")
+        return rule
+
+    def resolve_threshold(self, service_type: ServiceType) -> float:
+        return self.threshold if self.threshold is not None else service_type.value.threshold + self.offset
+
+@dataclass
+class ThresholdBreach:
+    metric: str
+    value: float
+    threshold: float
+    higher_is_bad: bool
+    alert: bool
+    suggestion: str = ""
+
+@dataclass
+class ThresholdResult:
+    breaches: List[ThresholdBreach] = field(default_factory=list)
+    thresholds: Dict[str, float] = field(default_factory=dict)  # 지표별 적용된 임계값
+
+    @property
+    def alert(self) -> bool:
+        return any(breach.alert for breach in self.breaches)
+
+    @property
+    def suggestions(self) -> List[str]:
+        return [breach.suggestion for breach in self.breaches if breach.suggestion]
+
+@dataclass(frozen=True)
+class _CompiledRules:
+    rules: Tuple[ThresholdRule, ...]
+    metrics: Tuple[str, ...]
+    thresholds: 'np.ndarray'
+    higher_is_bad: 'np.ndarray'
+    missing: 'np.ndarray'
+
+class ThresholdRules:
+    """지표 임계값 규칙 (로드 시점에 (모니터링 유형, 서비스) 별 배열로 컴파일해 모든 지표를 한 번에 비교)
+
+    같은 지표에 여러 규칙이 맞으면 전체 < 서비스 < 파이프라인 < 서비스 + 파이프라인 순으로 구체적인 규칙을 사용.
+    """
+
+    def __init__(self, rules: List[ThresholdRule]):
+        self.rules = rules
+        self._compile()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ThresholdRules":
+        return cls([ThresholdRule.from_dict(rule) for rule in config.get('rules', [])])
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ThresholdRules":
+        """THRESHOLD_CONFIG_PATH 의 JSON 설정 로드 (없으면 기본 규칙 사용)"""
+        path = path or os.environ.get('THRESHOLD_CONFIG_PATH')
+        if not path:
+            return cls.from_config({'rules': DEFAULT_THRESHOLD_RULES})
+        with open(path, encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def _compile(self) -> None:
+        """파이프라인 조건이 없는 규칙은 (유형, 서비스) 별로 미리 병합하고 파이프라인 규칙은 유형별로 분리"""
+        self._base: Dict[RuleKey, Dict[str, ThresholdRule]] = {}
+        self._by_pipeline: Dict[MonitoringType, List[ThresholdRule]] = {}
+        ordered = sorted(self.rules, key=lambda rule: (rule.pipeline is not None, rule.service is not None))
+        for monitoring_type in MonitoringType:
+            for service_type in ServiceType:
+                self._base[(monitoring_type, service_type)] = {
+                    rule.metric: rule for rule in ordered
+                    if rule.pipeline is None and self._matches(rule, monitoring_type, service_type)
+                }
+            self._by_pipeline[monitoring_type] = [rule for rule in ordered
+                                                  if rule.pipeline and rule.monitoring_type == monitoring_type]
+        self._resolve_cached = lru_cache(maxsize=1024)(self._resolve)
+
+    @staticmethod
+    def _matches(rule: ThresholdRule, monitoring_type: MonitoringType, service_type: ServiceType) -> bool:
+        return rule.monitoring_type == monitoring_type and (rule.service is None or rule.service == service_type)
+
+    def _resolve(self, monitoring_type: MonitoringType, service_type: ServiceType,
+                 pipeline: Optional[str]) -> _CompiledRules:
+        import numpy as np
+        rules = dict(self._base[(monitoring_type, service_type)])
+        if pipeline:
+            for rule in self._by_pipeline[monitoring_type]:
+                if (rule.service is None or rule.service == service_type) and fnmatchcase(pipeline, rule.pipeline):
+                    rules[rule.metric] = rule
+        compiled = tuple(rules.values())
+        return _CompiledRules(
+            rules=compiled,
+            metrics=tuple(rules),
+            thresholds=np.array([rule.resolve_threshold(service_type) for rule in compiled], dtype=float),
+            higher_is_bad=np.array([rule.higher_is_bad for rule in compiled], dtype=bool),
+            missing=np.array([rule.missing for rule in compiled], dtype=float)
+        )
+
+    def evaluate(self, monitoring_type: MonitoringType, service_type: ServiceType,
+                 metrics: Dict[str, Any], pipeline: Optional[str] = None) -> ThresholdResult:
+        """지표 값을 규칙 임계값과 한 번에 비교 (숫자가 아닌 값은 값이 없는 것으로 처리)"""
+        import numpy as np
+        compiled = self._resolve_cached(monitoring_type, service_type, pipeline)
+        if not compiled.rules:
+            return ThresholdResult()
+        values = compiled.missing.copy()
+        for i, metric in enumerate(compiled.metrics):
+            value = metrics.get(metric)
+            if value is not None:
+                try:
+                    values[i] = float(value)
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring non-numeric metric {metric}={value!r}")
+
+        # NaN 은 비교 결과가 False 가 되어 위반으로 보지 않음
+        with np.errstate(invalid='ignore'):
+            breached = np.where(compiled.higher_is_bad, values > compiled.thresholds, values < compiled.thresholds)
+        return ThresholdResult(
+            breaches=[ThresholdBreach(compiled.metrics[i], float(values[i]), float(compiled.thresholds[i]),
+                                      compiled.rules[i].higher_is_bad, compiled.rules[i].alert,
+                                      compiled.rules[i].suggestion)
+                      for i in np.flatnonzero(breached)],
+            thresholds=dict(zip(compiled.metrics, compiled.thresholds.tolist()))
+        )
+
+def batch_metrics(detail: Dict[str, Any]) -> Dict[str, float]:
+    """Batch 이벤트 마지막 시도의 processedStats 숫자 값과 실패 비율 (fail_ratio)"""
+    attempts = detail.get('attempts') or [{}]
+    stats = (attempts[-1].get('container') or {}).get('processedStats') or {}
+    metrics = {key: float(value) for key, value in stats.items()
+               if isinstance(value, (int, float)) and not isinstance(value, bool)}
+    if metrics.get('total_processed') and 'fail_count' in metrics:
+        metrics['fail_ratio'] = metrics['fail_count'] / metrics['total_processed']
+    return metrics
+
+_threshold_rules: Optional[ThresholdRules] = None
+
+def get_threshold_rules() -> ThresholdRules:
+    """컨테이너 단위로 재사용되는 임계값 규칙"""
+    global _threshold_rules
+    if _threshold_rules is None:
+        _threshold_rules = ThresholdRules.load()
+        logger.info(f"Threshold rules compiled with {len(_threshold_rules.rules)} rules")
+    return _threshold_rules
@@ -0,0 +1,167 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 프로파일링 설정 (코드 재배포 없이 환경변수만으로 활성화)
+PROFILE_ENV = "MONITORING_PROFILE"          # cprofile | tracemalloc
+PROFILE_DIR_ENV = "MONITORING_PROFILE_DIR"  # 프로파일 덤프 경로 (기본값 /tmp)
+PROFILE_TOP_N = 25
+
+_cold_start = True
+_profiled = False
+_current_trace: contextvars.ContextVar[Optional["InvocationTrace"]] = contextvars.ContextVar(
+    "invocation_trace", default=None
+)
+
+class InvocationTrace:
+    """호출 단위 구간(span) 기록"""
+
+    def __init__(self, handler_name: str, context: Any, cold_start: bool):
+        self.handler_name = handler_name
+        self.request_id = getattr(context, 'aws_request_id', None)
+        self.cold_start = cold_start
+        self.started_at = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def add_span(self, name: str, started_at: float, duration: float,
+                 error: Optional[str] = None, **attrs: Any) -> None:
+        span_record = {
+            'name': name,
+            'start_ms': round((started_at - self.started_at) * 1000, 3),
+            'duration_ms': round(duration * 1000, 3)
+        }
+        if error:
+            span_record['error'] = error
+        if attrs:
+            span_record.update(attrs)
+        self.spans.append(span_record)
+
+    def to_record(self, status: str) -> Dict[str, Any]:
+        stages: Dict[str, float] = {}
+        for span_record in self.spans:
+            stages[span_record['name']] = round(
+                stages.get(span_record['name'], 0.0) + span_record['duration_ms'], 3
+            )
+        return {
+            'type': 'invocation_trace',
+            'handler': self.handler_name,
+            'request_id': self.request_id,
+            'cold_start': self.cold_start,
+            'status': status,
+            'duration_ms': round((time.perf_counter() - self.started_at) * 1000, 3),
+            'stages': stages,
+            'spans': self.spans
+        }
+
+def current_trace() -> Optional[InvocationTrace]:
+    """현재 호출의 트레이스 조회"""
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    """구간 소요시간 측정 (트레이스 밖에서는 아무 동작도 하지 않음)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e.__class__.__name__
+        raise
+    finally:
+        trace.add_span(name, started_at, time.perf_counter() - started_at, error=error, **attrs)
+
+@contextmanager
+def use_trace(trace: Optional[InvocationTrace]) -> Iterator[None]:
+    """다른 스레드에서 호출 트레이스에 구간을 기록 (스레드는 contextvars 를 상속하지 않음)"""
+    token = _current_trace.set(trace)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+class _InvocationProfiler:
+    """단일 호출 프로파일러 (cProfile / tracemalloc)"""
+
+    def __init__(self, mode: str, handler_name: str, request_id: Optional[str]):
+        self.mode = mode
+        self.output_dir = os.environ.get(PROFILE_DIR_ENV, '/tmp')
+        self.file_prefix = f"{handler_name}-{request_id or int(time.time())}"
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def start(self) -> None:
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.mode == 'tracemalloc':
+            tracemalloc.start(25)
+
+    def stop(self) -> None:
+        try:
+            if self.profiler:
+                self.profiler.disable()
+                path = os.path.join(self.output_dir, f"{self.file_prefix}.prof")
+                self.profiler.dump_stats(path)
+                stream = io.StringIO()
+                pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+                logger.info(f"cProfile dumped to {path}\n{stream.getvalue()}")
+            elif tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                path = os.path.join(self.output_dir, f"{self.file_prefix}.tracemalloc")
+                snapshot.dump(path)
+                top_stats = "\n".join(str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N])
+                logger.info(f"tracemalloc snapshot dumped to {path} (peak {peak} bytes)\n{top_stats}")
+        except Exception as e:
+            logger.error(f"Failed to dump profile: {str(e)}")
+
+def _start_profiler(handler_name: str, request_id: Optional[str]) -> Optional[_InvocationProfiler]:
+    """환경변수가 설정된 경우 컨테이너당 한 번만 프로파일링"""
+    global _profiled
+    mode = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if _profiled or mode not in ('cprofile', 'tracemalloc'):
+        return None
+
+    _profiled = True
+    profiler = _InvocationProfiler(mode, handler_name, request_id)
+    profiler.start()
+    return profiler
+
+def traced_handler(func: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """핸들러 호출마다 구간 기록을 구조화 로그 한 건으로 출력"""
+
+    @wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        global _cold_start
+        trace = InvocationTrace(func.__name__, context, _cold_start)
+        _cold_start = False
+        token = _current_trace.set(trace)
+        profiler = _start_profiler(func.__name__, trace.request_id)
+        status = 'error'
+        try:
+            result = func(event, context)
+            status = 'ok'
+            return result
+        finally:
+            if profiler:
+                profiler.stop()
+            _current_trace.reset(token)
+            logger.info(json.dumps(trace.to_record(status), ensure_ascii=False))
+
+    return wrapper
@@ -1,44 +1,42 @@
 import os 
-import boto3
 import logging
+import warnings
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from botocore.exceptions import ClientError
-from .constant import ServiceType, SlackConfig
+from .constant import MonitoringType, ServiceType
+from .tracing import span
+from .secrets_provider import get_slack_secrets
+from .resilience import CircuitOpenError, DeadlineExceeded, aws_client, get_circuit_breaker
+from .thresholds import get_threshold_rules
 
 logger = logging.getLogger(__name__)
 
 def init_slack_tokens() -> None:
-    """슬랙 토큰 초기화"""
+    """슬랙 토큰 초기화 (get_parameters 일괄 조회 후 TTL 동안 캐시)"""
     try:
-        ssm = boto3.client('ssm')
-        for token_name, token_path in SlackConfig.TOKENS.items():
-            if not os.environ.get(token_name):
-                parameter = ssm.get_parameter(
-                    Name=token_path,
-                    WithDecryption=True
-                )
-                os.environ[token_name] = parameter['Parameter']['Value']
+        with span('ssm.init_slack_tokens'):
+            get_slack_secrets().export_to_environ()
     except ClientError as e:
         logger.error(f"Failed to initialize Slack tokens: {str(e)}")
         raise
 
 def init_alarm() -> None:
     """알람 전용 슬랙 봇 초기화"""
-    if not os.environ.get('SLACK_BOT_TOKEN'):
+    if not os.environ.get('SLACK_BOT_TOKEN') or get_slack_secrets().loaded:
         init_slack_tokens()
 
 def init_event() -> None:
     """이벤트 처리용 슬랙 봇 초기화"""
     required_tokens = ['SLACK_BOT_TOKEN', 'SLACK_APP_TOKEN', 'SLACK_SIGNING_SECRET']
-    if not all(os.environ.get(token) for token in required_tokens):
+    if not all(os.environ.get(token) for token in required_tokens) or get_slack_secrets().loaded:
         init_slack_tokens()
 
 def get_cloudwatch_logs(log_group: str, query: str, 
                        start_time: int, end_time: int) -> List[Dict[str, Any]]:
     """CloudWatch 로그 조회"""
     try:
-        logs_client = boto3.client('cloudwatch-logs')
+        logs_client = aws_client('logs')
         
         # 에러 로그 조회인 경우
         if "ERROR" in query:
@@ -47,12 +45,13 @@ def get_cloudwatch_logs(log_group: str, query: str,
         elif not log_group:
             log_group = "/aws/lambda/DEV-monitoring"
             
-        response = logs_client.filter_log_events(
-            logGroupName=log_group,
-            filterPattern=query,
-            startTime=start_time,
-            endTime=end_time
-        )
+        with get_circuit_breaker("logs").guard():
+            response = logs_client.filter_log_events(
+                logGroupName=log_group,
+                filterPattern=query,
+                startTime=start_time,
+                endTime=end_time
+            )
         return response.get('events', [])
     except Exception as e:
         logger.error(f"Failed to get CloudWatch logs: {str(e)}")
@@ -74,21 +73,25 @@ def format_error_message(service_type: ServiceType, error_msg: str,
         }
 
         # CloudWatch에 에러 로그 기록
-        logs_client = boto3.client('logs')
+        logs_client = aws_client('logs')
         try:
-            logs_client.put_log_events(
-                logGroupName=log_group,
-                logStreamName=f"error-{formatted_msg['error_id']}",
-                logEvents=[{
-                    'timestamp': int(datetime.now().timestamp() * 1000),
-                    'message': f"ERROR {service_type.name} {error_msg}"
-                }]
-            )
+            with span('logs.put_log_events'), get_circuit_breaker("logs").guard():
+                logs_client.put_log_events(
+                    logGroupName=log_group,
+                    logStreamName=f"error-{formatted_msg['error_id']}",
+                    logEvents=[{
+                        'timestamp': int(datetime.now().timestamp() * 1000),
+                        'message': f"ERROR {service_type.name} {error_msg}"
+                    }]
+                )
         except logs_client.exceptions.ResourceNotFoundException:
             logs_client.create_log_stream(
                 logGroupName=log_group,
                 logStreamName=f"error-{formatted_msg['error_id']}"
             )
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # 로그 기록은 알림 전송보다 우선하지 않음
+            logger.warning(f"Skipped error log write: {str(e)}")
             
         return formatted_msg
     except Exception as e:
@@ -104,33 +107,41 @@ def put_monitoring_metrics(namespace: str, metric_name: str,
                          value: float, dimensions: List[Dict[str, str]]) -> None:
     """CloudWatch 메트릭 기록"""
     try:
-        cloudwatch = boto3.client('cloudwatch')
-        cloudwatch.put_metric_data(
-            Namespace=namespace,
-            MetricData=[{
-                'MetricName': metric_name,
-                'Value': value,
-                'Unit': 'Count',
-                'Dimensions': dimensions
-            }]
-        )
+        with span('cloudwatch.put_metric_data'), get_circuit_breaker("cloudwatch").guard():
+            cloudwatch = aws_client('cloudwatch')
+            cloudwatch.put_metric_data(
+                Namespace=namespace,
+                MetricData=[{
+                    'MetricName': metric_name,
+                    'Value': value,
+                    'Unit': 'Count',
+                    'Dimensions': dimensions
+                }]
+            )
     except Exception as e:
         logger.error(f"Failed to put monitoring metrics: {str(e)}")
 
-def get_performance_suggestions(metrics: Dict[str, float], 
-                             threshold: float = 0.7) -> List[str]:
-    """성능 개선 제안사항 생성"""
-    suggestions = []
-    
-    metrics_checks = {
-        'accuracy': "전반적인 정확도가 낮습니다. 데이터 품질을 검토하세요.",
-        'precision': "정밀도가 낮습니다. 검색 결과의 정확성을 높이세요.",
-        'recall': "재현율이 낮습니다. 관련 문서 검색 범위를 확장하세요.",
-        'mrr': "MRR이 낮습니다. 랭킹 알고리즘을 개선하세요."
-    }
-    
-    for metric_name, message in metrics_checks.items():
-        if metrics.get(metric_name, 0) < threshold:
-            suggestions.append(message)
-        
+# threshold 인자를 넘기는 이전 호출에서 쓰던 지표별 제안 (모든 지표를 같은 임계값과 비교)
+LEGACY_SUGGESTIONS = {
+    'accuracy': "전반적인 정확도가 낮습니다. 데이터 품질을 검토하세요.",
+    'precision': "정밀도가 낮습니다. 검색 결과의 정확성을 높이세요.",
+    'recall': "재현율이 낮습니다. 관련 문서 검색 범위를 확장하세요.",
+    'mrr': "MRR이 낮습니다. 랭킹 알고리즘을 개선하세요."
+}
+
+def get_performance_suggestions(metrics: Dict[str, float], threshold: Optional[float] = None,
+                                service_type: ServiceType = ServiceType.DEV,
+                                pipeline_id: Optional[str] = None) -> List[str]:
+    """성능 개선 제안사항 생성 (임계값 규칙의 위반 지표별 제안)
+
+    threshold 는 이전 호환용 (deprecated): 넘기면 임계값 규칙 대신 모든 지표를 그 값과 비교
+    """
+    if threshold is not None:
+        warnings.warn("get_performance_suggestions(threshold=...) is deprecated; "
+                      "configure THRESHOLD_CONFIG_PATH rules instead", DeprecationWarning, stacklevel=2)
+        suggestions = [message for metric, message in LEGACY_SUGGESTIONS.items()
+                       if metrics.get(metric, 0) < threshold]
+    else:
+        suggestions = get_threshold_rules().evaluate(MonitoringType.RAG, service_type, metrics,
+                                                     pipeline_id).suggestions
     return suggestions if suggestions else ["현재 성능이 양호합니다."]